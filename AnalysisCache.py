@@ -0,0 +1,109 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import hashlib
+import os
+import typing
+from AtomicWrite import write_atomically
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+EVICTION_TARGET = 0.9  # evict down to this fraction of max_bytes
+ENTRY_SUFFIX = ".xml"
+
+
+class AnalysisCache:
+    """A persistent, content-addressed store of finished analyzer output.
+
+    Entries are keyed by the SHA-256 of the analyzer version and the source,
+    so an entry can never be stale: a changed file or a new analyzer simply
+    misses. The modification time of an entry is refreshed on every hit and
+    the least recently used entries are removed once the cache grows past
+    max_bytes. Several processes may share one cache directory. The size of
+    the directory is only scanned for on the first put, so opening a cache
+    and reading from it cost nothing per entry.
+    """
+
+    def __init__(self, directory: str, version: str,
+                 max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Args:
+            directory (str): where the entries are stored, created if needed.
+            version (str): the analyzer version, part of every key.
+            max_bytes (int): size cap of all entries together.
+        """
+        self.directory = directory
+        self.version = version
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.size: typing.Optional[int] = None  # unknown until the first put
+
+    def key(self, source: str) -> str:
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(b'\0')
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> typing.Optional[str]:
+        """Returns the cached output for key, or None on a miss."""
+        path = self.path(key)
+        try:
+            with open(path, 'r') as entry:
+                output = entry.read()
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:  # a miss, or evicted by another process
+            return None
+        return output
+
+    def put(self, key: str, output: str) -> None:
+        """Stores output under key, evicting old entries if needed."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:  # the entry this one replaces, if another put stored it already
+            replaced_size = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced_size = 0
+        write_atomically(path, output)  # so readers never see half an entry
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self.entries())
+        else:
+            self.size += os.path.getsize(path) - replaced_size
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def entries(self) -> typing.List[typing.Tuple[float, int, str]]:
+        """(last use, size, path) of every entry in the cache."""
+        entries = []
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the cache is below
+        EVICTION_TARGET of its cap.
+        """
+        entries = sorted(self.entries())
+        self.size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICTION_TARGET
+        for _, size, path in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
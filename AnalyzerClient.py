@@ -0,0 +1,117 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import typing
+
+# Protocol of AnalyzerDaemon: every message is one line of JSON, in both
+# directions. A batch {"requests": [...]} is answered with {"results": [...]}
+# in the same order, {"command": "ping"} and {"command": "shutdown"} with a
+# status object. A request has either a "path" (on the daemon's machine) or
+# an inline "source", and optionally "format", "engine", "recover",
+# "tokenizer" (see JackAnalyzer) and "write", which makes the daemon write
+# the output next to path instead of returning it. A result has "output" or
+# "output_path", plus "error" and "diagnostics" when analysis failed.
+#
+# This module must stay cheap to import: it is what a client process loads.
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f'jack-analyzer-{os.getuid()}.sock')
+RECEIVE_SIZE = 1 << 16
+
+
+def send_message(connection: socket.socket, message: dict) -> None:
+    connection.sendall(json.dumps(message).encode() + b'\n')
+
+
+def read_message(reader: typing.BinaryIO) -> typing.Optional[dict]:
+    """Reads one message from a connection's file, None once it is closed.
+
+    Raises:
+        ValueError: the line is not JSON, or not a JSON object.
+    """
+    line = reader.readline()
+    if not line:
+        return None
+    message = json.loads(line)
+    if not isinstance(message, dict):
+        raise ValueError(f'expected a JSON object, got {type(message).__name__}')
+    return message
+
+
+def call(message: dict, socket_path: str = DEFAULT_SOCKET,
+         timeout: typing.Optional[float] = None) -> dict:
+    """Sends one message to the daemon and returns its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(socket_path)
+        send_message(connection, message)
+        with connection.makefile('rb', RECEIVE_SIZE) as reader:
+            reply = read_message(reader)
+    if reply is None:
+        raise ConnectionError(f'{socket_path}: connection closed without a reply')
+    return reply
+
+
+def analyze(requests: typing.List[dict], socket_path: str = DEFAULT_SOCKET,
+            timeout: typing.Optional[float] = None) -> typing.List[dict]:
+    """Analyzes a batch of requests on the daemon, see the protocol above."""
+    reply = call({"requests": requests}, socket_path, timeout)
+    if "error" in reply:
+        raise ValueError(reply["error"])
+    return reply["results"]
+
+
+def jack_files(argument_path: str) -> typing.List[str]:
+    """Same selection as JackAnalyzer.files_to_analyze, without importing it."""
+    if os.path.isdir(argument_path):
+        files = [os.path.join(argument_path, filename)
+                 for filename in sorted(os.listdir(argument_path))]
+    else:
+        files = [argument_path]
+    return [path for path in files
+            if os.path.splitext(path)[1].lower() == ".jack"]
+
+
+if "__main__" == __name__:
+    # Analyzes the given files or directories on a running AnalyzerDaemon,
+    # writing the output next to each input like JackAnalyzer does. "-"
+    # analyzes the source on stdin and prints the output instead.
+    parser = argparse.ArgumentParser(prog="AnalyzerClient")
+    parser.add_argument("input_paths", nargs="*")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="the daemon's socket")
+    parser.add_argument("--format", default="xml")
+    parser.add_argument("--engine", default="recursive")
+    parser.add_argument("--tokenizer", default="single_pass")
+    parser.add_argument("--recover", action="store_true")
+    parser.add_argument("--timeout", type=float, help="seconds to wait for the daemon")
+    parser.add_argument("--ping", action="store_true", help="check that the daemon is up")
+    parser.add_argument("--shutdown", action="store_true", help="stop the daemon")
+    args = parser.parse_args()
+    if args.ping or args.shutdown:
+        print(json.dumps(call({"command": "shutdown" if args.shutdown else "ping"},
+                              args.socket, args.timeout)))
+        sys.exit()
+    options = {"format": args.format, "engine": args.engine,
+               "tokenizer": args.tokenizer, "recover": args.recover}
+    if args.input_paths == ["-"]:
+        result, = analyze([dict(options, source=sys.stdin.read())], args.socket, args.timeout)
+        sys.stdout.write(result["output"])
+        if "error" in result:
+            sys.exit(result["error"])
+        sys.exit()
+    input_paths = [path for argument in args.input_paths
+                   for path in jack_files(os.path.abspath(argument))]
+    results = analyze([dict(options, path=path, write=True) for path in input_paths],
+                      args.socket, args.timeout)
+    errors = [f'{path}: {result["error"]}'
+              for path, result in zip(input_paths, results) if "error" in result]
+    if errors:
+        sys.exit("\n".join([f'{len(errors)} of {len(input_paths)} files failed:'] + errors))
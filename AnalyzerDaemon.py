@@ -0,0 +1,191 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import io
+import os
+import socket
+import socketserver
+import threading
+import typing
+from concurrent.futures import Future, ProcessPoolExecutor
+from AnalysisCache import AnalysisCache, DEFAULT_MAX_BYTES
+from AnalyzerClient import DEFAULT_SOCKET, read_message, send_message
+from CompilationEngine import CompilationError
+from JackAnalyzer import ANALYZER_VERSION, BINARY_FORMATS, analyze_file, error_message, \
+    open_cache, output_path_for
+from JackTokenizer import SINGLE_PASS_MODE
+
+DEFAULT_MAX_PENDING = 256  # requests queued or running, over all connections
+
+worker_cache_options: dict = {}
+
+
+def init_worker(cache_directory: typing.Optional[str], cache_size: int) -> None:
+    worker_cache_options.update(directory=cache_directory, max_bytes=cache_size)
+
+
+def worker_cache(output_format: str,
+                 tokenizer_mode: str = SINGLE_PASS_MODE) -> typing.Optional[AnalysisCache]:
+    """The cache of this worker process for the configuration, see open_cache."""
+    directory = worker_cache_options.get("directory")
+    if not directory:
+        return None
+    return open_cache(directory, output_format, tokenizer_mode, worker_cache_options["max_bytes"])
+
+
+def analyze_request(request: dict) -> dict:
+    """Analyzes one request of a batch, in a worker process. Errors are
+    returned in the result, not raised, so a bad file does not fail the
+    batch.
+    """
+    if not isinstance(request, dict):
+        return {"error": "expected a request object"}
+    output_format = request.get("format", "xml")
+    options = {"output_format": output_format,
+               "engine": request.get("engine", "recursive"),
+               "recover": bool(request.get("recover")),
+               "tokenizer_mode": request.get("tokenizer", SINGLE_PASS_MODE)}
+    if output_format in BINARY_FORMATS:
+        return {"error": f'the {output_format} format can not be sent as text'}
+    output = io.StringIO()
+    result = {}
+    try:
+        cache = worker_cache(output_format, options["tokenizer_mode"])
+        if "source" in request:
+            analyze_file(io.StringIO(request["source"]), output, cache, **options)
+        else:
+            with open(request["path"], 'r') as input_file:
+                analyze_file(input_file, output, cache, **options)
+    except (Exception, CompilationError) as error:
+        result["error"] = error_message(error)
+        diagnostics = getattr(error, "diagnostics", [])
+        if diagnostics:
+            result["diagnostics"] = [
+                {"kind": diagnostic.kind, "expected": diagnostic.expected,
+                 "actual": diagnostic.actual, "position": diagnostic.position,
+                 "line": diagnostic.line, "column": diagnostic.column}
+                for diagnostic in diagnostics]
+    if request.get("write") and "path" in request:
+        result["output_path"] = output_path_for(request["path"], output_format)
+        try:
+            with open(result["output_path"], 'w') as output_file:
+                output_file.write(output.getvalue())
+        except OSError as error:
+            result.setdefault("error", error_message(error))
+    else:
+        result["output"] = output.getvalue()
+    return result
+
+
+class AnalyzerHandler(socketserver.StreamRequestHandler):
+    """Serves one client connection, which may send several messages."""
+
+    def handle(self) -> None:
+        while True:
+            try:
+                message = read_message(self.rfile)
+            except ValueError:
+                send_message(self.connection, {"error": "malformed message"})
+                continue
+            if message is None:
+                return
+            command = message.get("command")
+            if command == "ping":
+                send_message(self.connection, {"pid": os.getpid(), "version": ANALYZER_VERSION,
+                                               "jobs": self.server.jobs})
+            elif command == "shutdown":
+                send_message(self.connection, {"shutdown": True})
+                threading.Thread(target=self.server.shutdown).start()
+                return
+            elif isinstance(message.get("requests"), list):
+                send_message(self.connection, {"results": self.server.analyze(message["requests"])})
+            else:
+                send_message(self.connection, {"error": "expected requests or a command"})
+
+
+class AnalyzerDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """A long-running analyzer listening on a Unix domain socket.
+
+    The analyzer modules are imported (and their regular expressions and
+    parse tables built) once, in this process, and the worker processes
+    are forked from it warm. A batch is spread over the workers and
+    answered in one message. At most max_pending requests are queued or
+    running at a time; connections submitting more wait for a slot.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, jobs: int = 1,
+                 cache_directory: typing.Optional[str] = None,
+                 cache_size: int = DEFAULT_MAX_BYTES,
+                 max_pending: int = DEFAULT_MAX_PENDING) -> None:
+        remove_stale_socket(socket_path)
+        super().__init__(socket_path, AnalyzerHandler)
+        self.socket_path = socket_path
+        self.jobs = jobs
+        self.executor = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                            initargs=(cache_directory, cache_size))
+        self.slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, request: dict) -> Future:
+        self.slots.acquire()
+        future = self.executor.submit(analyze_request, request)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def analyze(self, requests: typing.List[dict]) -> typing.List[dict]:
+        futures = [self.submit(request) for request in requests]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as error:  # e.g. a worker process died
+                results.append({"error": error_message(error)})
+        return results
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """Removes the socket file left by a daemon that did not exit cleanly,
+    and refuses to start next to one that is still running.
+    """
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+            return
+    raise OSError(f'{socket_path}: another analyzer daemon is listening')
+
+
+if "__main__" == __name__:
+    # Serves analyze requests until a shutdown command or an interrupt.
+    # Use AnalyzerClient to talk to it.
+    parser = argparse.ArgumentParser(prog="AnalyzerDaemon")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="path of the Unix socket")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help="number of worker processes, 0 for one per core")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="share an AnalysisCache in DIR between the workers")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES,
+                        help="cache size cap in bytes")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="requests queued or running before clients have to wait")
+    args = parser.parse_args()
+    with AnalyzerDaemon(args.socket, args.jobs or os.cpu_count() or 1, args.cache,
+                        args.cache_size, args.max_pending) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
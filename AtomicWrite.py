@@ -0,0 +1,29 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import tempfile
+import typing
+
+TEMPORARY_SUFFIX = ".tmp"
+
+
+def write_atomically(path: str, output: typing.Union[str, bytes]) -> None:
+    """Replaces the file at path with output. Readers see the old file or
+    the new one, never a partly written one: output is written to a
+    temporary file next to path, which then replaces it, or is removed if
+    writing fails.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=TEMPORARY_SUFFIX)
+    try:
+        with os.fdopen(descriptor, 'wb' if isinstance(output, bytes) else 'w') as output_file:
+            output_file.write(output)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
@@ -0,0 +1,129 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from ParseTree import Node, ParseTree
+
+DEFAULT_ROOT = "Main.main"
+
+
+class CallGraph:
+    """The calls between the subroutines of a program, named "Class.name".
+
+    Built from the parse trees of all its classes: every doStatement and
+    call term is an edge. A call through a variable goes to a method of the
+    variable's declared type, a call without a receiver to the current
+    class. Calls to classes outside the program (the Jack OS) are kept as
+    edges but have no subroutine behind them.
+    """
+
+    def __init__(self) -> None:
+        self.calls: typing.Dict[str, typing.Set[str]] = {}
+        # class name -> its subroutine names, in source order
+        self.classes: typing.Dict[str, typing.List[str]] = {}
+
+    def __contains__(self, subroutine: str) -> bool:
+        return subroutine in self.calls
+
+    def add_class(self, tree: ParseTree) -> None:
+        tokens = tree.tokens
+        children = tree.root.children
+        class_name = tokens[children[1]].text
+        class_types = {}
+        self.classes[class_name] = []
+        for member in children[3:-1]:
+            if member.kind == "classVarDec":
+                declare(member.children, tokens, class_types)
+                continue
+            name = tokens[member.children[2]].text
+            self.classes[class_name].append(name)
+            types = dict(class_types)
+            parameters = member.children[4].children
+            for position in range(0, len(parameters), 3):
+                types[tokens[parameters[position + 1]].text] = tokens[parameters[position]].text
+            callees = self.calls[f'{class_name}.{name}'] = set()
+            stack = [member.children[6]]
+            while stack:
+                node = stack.pop()
+                children_of_node = node.children
+                if node.kind == "varDec":
+                    declare(children_of_node, tokens, types)
+                elif node.kind == "doStatement":
+                    callees.add(callee(children_of_node, 1, tokens, types, class_name))
+                elif node.kind == "term" and len(children_of_node) > 2 \
+                        and type(children_of_node[1]) is int \
+                        and tokens[children_of_node[1]].text in ("(", "."):
+                    callees.add(callee(children_of_node, 0, tokens, types, class_name))
+                # reversed, so nodes are popped in source order: the varDecs
+                # are declared before the statements using them
+                stack.extend(child for child in reversed(children_of_node)
+                             if type(child) is not int)
+
+    def reachable(self, roots: typing.Iterable[str]) -> typing.Set[str]:
+        """The subroutines of the program that can be called from roots."""
+        seen = {root for root in roots if root in self.calls}
+        stack = list(seen)
+        while stack:
+            for callee_name in self.calls[stack.pop()]:
+                if callee_name in self.calls and callee_name not in seen:
+                    seen.add(callee_name)
+                    stack.append(callee_name)
+        return seen
+
+    def unreachable(self, reachable: typing.Set[str]) \
+            -> typing.Tuple[typing.List[str], typing.List[str]]:
+        """The classes none of whose subroutines are reachable, and the
+        unreachable subroutines of the other classes, sorted.
+        """
+        classes, subroutines = [], []
+        for class_name in sorted(self.classes):
+            names = [f'{class_name}.{name}' for name in self.classes[class_name]]
+            dead = [name for name in names if name not in reachable]
+            if len(dead) == len(names):
+                classes.append(class_name)
+            else:
+                subroutines += dead
+        return classes, subroutines
+
+    def report(self, root: str, output_stream: typing.TextIO) -> None:
+        reachable = self.reachable([root])
+        classes, subroutines = self.unreachable(reachable)
+        live_classes = len(self.classes) - len(classes)
+        output_stream.write(f'reachable from {root}: {len(reachable)} of {len(self.calls)} '
+                            f'subroutines in {live_classes} of {len(self.classes)} classes\n')
+        output_stream.writelines(f'unreachable class {name}\n' for name in classes)
+        output_stream.writelines(f'unreachable subroutine {name}\n' for name in subroutines)
+
+
+def declare(children: list, tokens: list, types: typing.Dict[str, str]) -> None:
+    """Records the variables of a classVarDec or varDec with their type."""
+    variable_type = tokens[children[1]].text
+    for child in children[2:-1:2]:
+        types[tokens[child].text] = variable_type
+
+
+def callee(children: list, start: int, tokens: list, types: typing.Dict[str, str],
+           class_name: str) -> str:
+    """The subroutine called by the call starting at children[start]."""
+    name = tokens[children[start]].text
+    if tokens[children[start + 1]].text != ".":
+        return f'{class_name}.{name}'
+    receiver = name
+    return f'{types.get(receiver, receiver)}.{tokens[children[start + 2]].text}'
+
+
+def prune(tree: ParseTree, reachable: typing.Set[str]) -> ParseTree:
+    """A copy of tree without the subroutines that are not reachable. The
+    tokens are shared.
+    """
+    tokens = tree.tokens
+    class_name = tokens[tree.root.children[1]].text
+    root = Node(tree.root.kind)
+    root.children = [child for child in tree.root.children
+                     if type(child) is int or child.kind != "subroutineDec"
+                     or f'{class_name}.{tokens[child.children[2]].text}' in reachable]
+    return ParseTree(root, tokens)
@@ -0,0 +1,423 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from ParseTree import Node, ParseTree
+from SymbolTable import SymbolTable, SEGMENTS
+from VMWriter import VMWriter
+
+ARITHMETIC = {"+": "add", "-": "sub", "&amp": "and", "|": "or",
+              "&lt": "lt", "&gt": "gt", "=": "eq"}
+CALLS = {"*": "Math.multiply", "/": "Math.divide"}
+UNARY = {"-": "neg", "~": "not", "^": "shiftleft", "#": "shiftright"}
+KEYWORD_VALUES = {"TRUE": -1, "FALSE": 0, "NULL": 0}
+TRUE = -1  # an if or while condition holds only if "not" of it is 0
+SHIFTS = {1 << shift: shift for shift in range(15)}  # the positive powers of two
+
+
+def wrap(value: int) -> int:
+    """value as a 16-bit two's complement integer."""
+    value &= 0xFFFF
+    return value - 0x10000 if value & 0x8000 else value
+
+
+def binary(op: str, left: int, right: int) -> typing.Optional[int]:
+    """What the VM computes for left op right, None if it is an error."""
+    if op == "+":
+        return wrap(left + right)
+    if op == "-":
+        return wrap(left - right)
+    if op == "*":
+        return wrap(left * right)
+    if op == "/":
+        if right == 0:  # left to Math.divide, which reports it
+            return None
+        quotient = abs(left) // abs(right)  # truncated, as Math.divide
+        return wrap(-quotient if (left < 0) != (right < 0) else quotient)
+    if op == "&amp":
+        return wrap(left & right)
+    if op == "|":
+        return wrap(left | right)
+    if op == "&lt":
+        return TRUE if left < right else 0
+    if op == "&gt":
+        return TRUE if left > right else 0
+    return TRUE if left == right else 0
+
+
+def unary(op: str, value: int) -> int:
+    if op == "-":
+        return wrap(-value)
+    if op == "~":
+        return wrap(~value)
+    if op == "^":
+        return wrap(value << 1)
+    return value >> 1  # arithmetic, like shiftright
+
+
+class CodeGenerator:
+    """Compiles the ParseTree of a class into VM code.
+
+    With optimize, integer expressions are folded into constants (with
+    the VM's 16-bit wrap-around), multiplications and divisions by a power
+    of two become shifts, statements after a return and branches of a
+    constant condition are dropped, and the VMWriter removes redundant
+    commands.
+
+    Expressions are compiled without recursion, so any nesting depth the
+    parser accepts compiles too: the compile steps of an expression or a
+    term are generators, which yield the nested expressions and terms to
+    compile, and run(), which keeps them on an explicit stack.
+    """
+
+    def __init__(self, tree: ParseTree, output_stream: typing.TextIO,
+                 optimize: bool = True) -> None:
+        self.tree = tree
+        self.tokens = tree.tokens
+        self.writer = VMWriter(output_stream, optimize)
+        self.optimize = optimize
+        self.symbols = SymbolTable()
+        self.class_name = ""
+        self.labels = 0
+        self.folded: typing.Dict[int, typing.Optional[int]] = {}  # id(node) -> fold(node)
+
+    def text(self, child: int) -> typing.Any:
+        return self.tokens[child].text
+
+    def label(self, prefix: str) -> str:
+        self.labels += 1
+        return f'{prefix}{self.labels - 1}'
+
+    def compile_class(self) -> None:
+        children = self.tree.root.children
+        self.class_name = self.text(children[1])
+        for child in children[3:-1]:
+            if child.kind == "classVarDec":
+                self.compile_declaration(child.children, self.text(child.children[0]))
+            else:
+                self.compile_subroutine(child)
+        self.writer.flush()
+
+    def compile_declaration(self, children: list, kind: str) -> None:
+        """Defines the variables of a classVarDec or varDec."""
+        variable_type = self.type_name(children[1])
+        for child in children[2:-1:2]:
+            self.symbols.define(self.text(child), variable_type, kind)
+
+    def type_name(self, child: int) -> str:
+        token = self.tokens[child]
+        return token.text.lower() if token.type == "KEYWORD" else token.text
+
+    def compile_subroutine(self, node: Node) -> None:
+        children = node.children
+        kind, name = self.text(children[0]), self.text(children[2])
+        parameters, body = children[4].children, children[6].children
+        self.symbols.start_subroutine()
+        if kind == "METHOD":
+            self.symbols.define("this", self.class_name, "ARG")
+        for position in range(0, len(parameters), 3):
+            self.symbols.define(self.text(parameters[position + 1]),
+                                self.type_name(parameters[position]), "ARG")
+        for child in body[1:-2]:
+            self.compile_declaration(child.children, "VAR")
+        self.writer.write_function(f'{self.class_name}.{name}', self.symbols.var_count("VAR"))
+        if kind == "CONSTRUCTOR":
+            self.writer.write_push("constant", self.symbols.var_count("FIELD"))
+            self.writer.write_call("Memory.alloc", 1)
+            self.writer.write_pop("pointer", 0)
+        elif kind == "METHOD":
+            self.writer.write_push("argument", 0)
+            self.writer.write_pop("pointer", 0)
+        self.compile_statements(body[-2])
+
+    def compile_statements(self, node: Node) -> None:
+        for statement in node.children:
+            getattr(self, "compile_" + statement.kind)(statement.children)
+            if self.optimize and statement.kind == "returnStatement":
+                break  # the rest is unreachable
+
+    def compile_letStatement(self, children: list) -> None:
+        name = self.text(children[1])
+        if len(children) == 5:  # let name = expression;
+            self.compile_expression(children[3])
+            self.pop_variable(name)
+            return
+        self.push_variable(name)  # let name[index] = expression;
+        self.compile_expression(children[3])
+        self.writer.write_arithmetic("add")
+        self.compile_expression(children[6])
+        self.writer.write_pop("temp", 0)
+        self.writer.write_pop("pointer", 1)
+        self.writer.write_push("temp", 0)
+        self.writer.write_pop("that", 0)
+
+    def compile_ifStatement(self, children: list) -> None:
+        has_else = len(children) > 7
+        condition = self.fold(children[2])
+        if condition is not None:
+            if condition == TRUE:
+                self.compile_statements(children[5])
+            elif has_else:
+                self.compile_statements(children[9])
+            return
+        false_label = self.label("IF_FALSE")
+        self.compile_expression(children[2])
+        self.writer.write_arithmetic("not")
+        self.writer.write_if(false_label)
+        self.compile_statements(children[5])
+        if has_else:
+            end_label = self.label("IF_END")
+            self.writer.write_goto(end_label)
+            self.writer.write_label(false_label)
+            self.compile_statements(children[9])
+            self.writer.write_label(end_label)
+        else:
+            self.writer.write_label(false_label)
+
+    def compile_whileStatement(self, children: list) -> None:
+        condition = self.fold(children[2])
+        if condition is not None and condition != TRUE:
+            return  # the body never runs
+        start_label, end_label = self.label("WHILE_EXP"), self.label("WHILE_END")
+        self.writer.write_label(start_label)
+        if condition is None:
+            self.compile_expression(children[2])
+            self.writer.write_arithmetic("not")
+            self.writer.write_if(end_label)
+        self.compile_statements(children[5])
+        self.writer.write_goto(start_label)
+        self.writer.write_label(end_label)
+
+    def compile_doStatement(self, children: list) -> None:
+        self.compile_call(children[1:-1])
+        self.writer.write_pop("temp", 0)
+
+    def compile_returnStatement(self, children: list) -> None:
+        if len(children) == 3:
+            self.compile_expression(children[1])
+        else:
+            self.writer.write_push("constant", 0)
+        self.writer.write_return()
+
+    def compile_call(self, children: list) -> None:
+        """Compiles name(expressionList) or receiver.name(expressionList)."""
+        self.run(self.call_steps(children))
+
+    def call_steps(self, children: list) -> typing.Iterator[Node]:
+        arguments = children[-2].children[0::2]
+        if len(children) == 4:  # a method of this object
+            self.writer.write_push("pointer", 0)
+            name, receiver_class, n_args = self.text(children[0]), self.class_name, 1
+        else:
+            receiver, name = self.text(children[0]), self.text(children[2])
+            if self.symbols.lookup(receiver) is not None:  # a method of the variable
+                self.push_variable(receiver)
+                receiver_class, n_args = self.symbols.type_of(receiver), 1
+            else:
+                receiver_class, n_args = receiver, 0
+        yield from arguments
+        self.writer.write_call(f'{receiver_class}.{name}', n_args + len(arguments))
+
+    def push_variable(self, name: str) -> None:
+        _, kind, index = self.symbols.lookup(name)
+        self.writer.write_push(SEGMENTS[kind], index)
+
+    def pop_variable(self, name: str) -> None:
+        _, kind, index = self.symbols.lookup(name)
+        self.writer.write_pop(SEGMENTS[kind], index)
+
+    def fold(self, node: Node) -> typing.Optional[int]:
+        """The value of a constant expression or term, None if it is not
+        constant (or optimizing is off). The values of node and of the
+        expressions and terms it is folded from are found in one post-order
+        walk, and cached, so nested expressions are folded once.
+        """
+        if not self.optimize:
+            return None
+        folded = self.folded
+        if id(node) in folded:
+            return folded[id(node)]
+        stack = [(node, False)]
+        while stack:
+            current, operands_folded = stack.pop()
+            if operands_folded:
+                folded[id(current)] = self.fold_node(current)
+            elif id(current) not in folded:
+                stack.append((current, True))
+                stack.extend((operand, False) for operand in self.operands(current))
+        return folded[id(node)]
+
+    def operands(self, node: Node) -> typing.List[Node]:
+        """The expressions and terms the value of node is folded from."""
+        children = node.children
+        if node.kind == "expression":
+            return children[0::2]
+        first = children[0]
+        if type(first) is int and self.tokens[first].type == "SYMBOL":  # (expression) or unary
+            return [children[1]]
+        return []
+
+    def fold_node(self, node: Node) -> typing.Optional[int]:
+        """fold(node), once its operands are folded."""
+        folded = self.folded
+        children = node.children
+        if node.kind == "expression":
+            value = folded[id(children[0])]
+            for position in range(1, len(children), 2):
+                if value is None:
+                    return None
+                right = folded[id(children[position + 1])]
+                value = None if right is None else binary(self.text(children[position]), value, right)
+            return value
+        first = children[0]
+        if type(first) is not int:
+            return None
+        token = self.tokens[first]
+        if token.type == "INT_CONST":
+            return token.text
+        if token.type == "KEYWORD":
+            return KEYWORD_VALUES.get(token.text)
+        if token.type == "SYMBOL":
+            value = folded[id(children[1])]
+            if token.text == "(" or value is None:
+                return value
+            return unary(token.text, value)
+        return None
+
+    def push_constant(self, value: int) -> None:
+        """Pushes any 16-bit value, push constant only takes 0..32767."""
+        if value >= 0:
+            self.writer.write_push("constant", value)
+        elif value > -32768:
+            self.writer.write_push("constant", -value)
+            self.writer.write_arithmetic("neg")
+        else:
+            self.writer.write_push("constant", 32767)
+            self.writer.write_arithmetic("neg")
+            self.writer.write_push("constant", 1)
+            self.writer.write_arithmetic("sub")
+
+    def run(self, steps: typing.Iterator[Node]) -> None:
+        """Runs compile steps, and the steps of every expression and term
+        they yield, on a stack: a yielded node is compiled completely before
+        the steps which yielded it go on.
+        """
+        stack = [steps]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+            elif node.kind == "expression":
+                stack.append(self.expression_steps(node))
+            else:
+                stack.append(self.term_steps(node))
+
+    def compile_expression(self, node: Node) -> None:
+        self.run(self.expression_steps(node))
+
+    def expression_steps(self, node: Node) -> typing.Iterator[Node]:
+        children = node.children
+        pending = self.fold(children[0])  # a constant left operand, not pushed yet
+        if pending is None:
+            yield children[0]
+        for position in range(1, len(children), 2):
+            op, term = self.text(children[position]), children[position + 1]
+            right = self.fold(term)
+            if pending is not None:
+                if right is not None and binary(op, pending, right) is not None:
+                    pending = binary(op, pending, right)
+                    continue
+                if op == "*" and pending in SHIFTS:  # 2^k * term
+                    yield term
+                    self.shift("shiftleft", SHIFTS[pending])
+                    pending = None
+                    continue
+                self.push_constant(pending)
+                pending = None
+            if op == "*" and right in SHIFTS:
+                self.shift("shiftleft", SHIFTS[right])
+            elif op == "/" and right in SHIFTS:
+                self.divide(SHIFTS[right])
+            else:
+                yield term
+                if op in CALLS:
+                    self.writer.write_call(CALLS[op], 2)
+                else:
+                    self.writer.write_arithmetic(ARITHMETIC[op])
+        if pending is not None:
+            self.push_constant(pending)
+
+    def shift(self, command: str, count: int) -> None:
+        for _ in range(count):
+            self.writer.write_arithmetic(command)
+
+    def divide(self, shift: int) -> None:
+        """Divides the top of the stack by 2^shift, truncating towards zero
+        like Math.divide: a negative dividend is biased by 2^shift - 1 before
+        the arithmetic shift, using (x < 0) = -1 as the mask.
+        """
+        if shift == 0:
+            return
+        self.writer.write_pop("temp", 1)
+        self.writer.write_push("temp", 1)
+        self.writer.write_push("temp", 1)
+        self.writer.write_push("constant", 0)
+        self.writer.write_arithmetic("lt")
+        self.writer.write_push("constant", (1 << shift) - 1)
+        self.writer.write_arithmetic("and")
+        self.writer.write_arithmetic("add")
+        self.shift("shiftright", shift)
+
+    def compile_term(self, node: Node) -> None:
+        self.run(self.term_steps(node))
+
+    def term_steps(self, node: Node) -> typing.Iterator[Node]:
+        value = self.fold(node)
+        if value is not None:
+            self.push_constant(value)
+            return
+        children = node.children
+        first = children[0]
+        if type(first) is not int:
+            raise Exception(f'Unexpected {first.kind} in a term')
+        token = self.tokens[first]
+        if token.type == "INT_CONST":
+            self.writer.write_push("constant", token.text)
+        elif token.type == "STRING_CONST":
+            self.writer.write_push("constant", len(token.text))
+            self.writer.write_call("String.new", 1)
+            for char in token.text:
+                self.writer.write_push("constant", ord(char))
+                self.writer.write_call("String.appendChar", 2)
+        elif token.type == "KEYWORD":
+            if token.text == "THIS":
+                self.writer.write_push("pointer", 0)
+            else:
+                self.writer.write_push("constant", 0)
+                if token.text == "TRUE":
+                    self.writer.write_arithmetic("not")
+        elif token.type == "SYMBOL":
+            yield children[1]  # (expression), or the term of a unary op
+            if token.text != "(":
+                self.writer.write_arithmetic(UNARY[token.text])
+        elif len(children) == 1:
+            self.push_variable(token.text)
+        elif self.text(children[1]) == "[":
+            self.push_variable(token.text)
+            yield children[2]
+            self.writer.write_arithmetic("add")
+            self.writer.write_pop("pointer", 1)
+            self.writer.write_push("that", 0)
+        else:
+            yield from self.call_steps(children)
+
+
+def write_vm(tree: ParseTree, output_stream: typing.TextIO, optimize: bool = True) -> None:
+    """Writes the VM code of the class, a serializer like those of
+    ParseTree.SERIALIZERS.
+    """
+    CodeGenerator(tree, output_stream, optimize).compile_class()
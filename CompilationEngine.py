@@ -6,12 +6,76 @@ as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
 import typing
-from JackTokenizer import JackTokenizer
+from JackTokenizer import JackTokenizer, located, location_of
 from JackTokenizer import Token
+from Emitter import XmlEmitter
+from LookaheadStream import LookaheadStream
+
+BINARY_OPS = ["+", "-", "*", "/", "&amp", "|", "&lt", "&gt", "="]
+UNARY_OPS = ["-", "~", "^", "#"]
+KEYWORD_CONSTANTS = ["TRUE", "FALSE", "NULL", "THIS"]
+
+# states of compile_nested: starting an expression or a term, and having
+# completed one
+EXPRESSION, TERM, EXPRESSION_END, TERM_END = range(4)
+# its continuations, what is left to parse of the rule enclosing a nested
+# term (AFTER_OPERAND, AFTER_UNARY) or expression (the others)
+DONE, AFTER_OPERAND, AFTER_UNARY, AFTER_ARGUMENT, AFTER_INDEX, AFTER_GROUP = range(6)
+
+# synchronizing tokens of the recovery mode
+STATEMENT_KEYWORDS = ["LET", "DO", "IF", "WHILE", "RETURN"]
+SUBROUTINE_KEYWORDS = ["CONSTRUCTOR", "FUNCTION", "METHOD"]
+DECLARATION_SYNC = [";", "STATIC", "FIELD"] + SUBROUTINE_KEYWORDS
+STATEMENT_SYNC = [";", "}", "VAR"] + STATEMENT_KEYWORDS + SUBROUTINE_KEYWORDS
+SUBROUTINE_SYNC = SUBROUTINE_KEYWORDS
+MEMBER_SYNC = ["STATIC", "FIELD"] + SUBROUTINE_KEYWORDS
+
+# diagnostic kinds
+UNEXPECTED_TOKEN = "unexpected token"
+UNEXPECTED_END = "unexpected end of file"
+STRAY_TOKENS = "tokens between class members"
+TRAILING_TOKENS = "tokens after the end of the class"
+UNKNOWN_CLASS = "unknown class"
+UNKNOWN_SUBROUTINE = "unknown subroutine"
 
 
 class CompilationError(BaseException):
-    pass
+    def __init__(self, message: str = "", diagnostics: list = ()) -> None:
+        super().__init__(message)
+        self.diagnostics = list(diagnostics)
+
+
+class Diagnostic:
+    """A syntax error found in recovery mode. position is the index of the
+    offending token in the file's token stream, line and column its place
+    in the source (None when the token source does not know it, or at the
+    end of the file).
+    """
+    __slots__ = ('kind', 'expected', 'actual', 'position', 'line', 'column')
+
+    def __init__(self, kind: str, expected: typing.Any, actual: typing.Any, position: int,
+                 line: typing.Optional[int] = None, column: typing.Optional[int] = None) -> None:
+        self.kind = kind
+        self.expected = expected
+        self.actual = actual
+        self.position = position
+        self.line = line
+        self.column = column
+
+    def __str__(self) -> str:
+        place = f'token {self.position}' if self.line is None \
+            else f'line {self.line}, column {self.column}'
+        return f'{place}: {self.kind}: expected {self.expected}, got {self.actual}'
+
+
+class ParseError(CompilationError):
+    """Raised in recovery mode to abandon the current rule. It is caught
+    at the nearest synchronizing point.
+    """
+
+    def __init__(self, diagnostic: Diagnostic) -> None:
+        super().__init__(str(diagnostic), [diagnostic])
+        self.diagnostic = diagnostic
 
 
 class CompilationEngine:
@@ -19,73 +83,217 @@ class CompilationEngine:
     output stream.
     """
 
-    def __init__(self, input_stream, output_stream) -> None:
+    def __init__(self, input_stream, output_stream, emitter=None, recover: bool = False,
+                 index=None) -> None:
         """
         Creates a new compilation engine with the given input and output. The
         next routine called must be compileClass()
-        :param input_stream: The input stream.
+        :param input_stream: The input stream, or a ready token source with
+            a token_generator(): a JackTokenizer in another mode than the
+            default, or a TokenStream.
         :param output_stream: The output stream.
+        :param emitter: receives the parse instead of an XmlEmitter writing
+            to output_stream, e.g. a ParseTree.TreeBuilder.
+        :param recover: instead of stopping at the first syntax error, record
+            a Diagnostic, skip to a synchronizing token and keep parsing.
+        :param index: a ProjectIndex. User-defined types and subroutine
+            calls are then resolved against it, and unknown ones reported.
         """
-        # Your code goes here!
-        # Note that you can write to output_stream like so:
-        output_stream.write("<token>\n")
         self.output_stream = output_stream
-        self.tokenizer = JackTokenizer(input_stream)
-        self.generator = input_stream.token_generator()
-        self.cur_token: Token = next(self.generator)
-        self.cur_indent = 0
-
+        self.emitter = emitter if emitter is not None else XmlEmitter(output_stream)
+        self.tokenizer = input_stream if hasattr(input_stream, "token_generator") \
+            else JackTokenizer(input_stream)
+        self.tokens = LookaheadStream(self.tokenizer.token_generator())
+        self.cur_token: Token = self.tokens.current
+        self.recover = recover
+        self.diagnostics: typing.List[Diagnostic] = []
+        self.last_skipped: typing.Optional[Token] = None
+        self.index = index
+        self.class_info = None  # the index entry of the class being parsed
+        self.variables: typing.Dict[str, str] = {}  # name -> type, in the current subroutine
 
     def eat(self, typ: list = None, text: list = None, check_type = False, check_text = False):  # eat function
         if self.cur_token:  # checking if reaches end of file
             if check_type and self.cur_token.type not in typ:
-                raise Exception(f'Expected to get a token from type {typ} but got {self.cur_token.text} from type {self.cur_token.type} instead')
-            elif check_text and self.cur_token.text not in text:
-                raise Exception(f'Expected to get a token from {text} but got {self.cur_token.text} instead')
-            self.output_stream.write(self.write_indent() + self.cur_token.token_string())
-            self.cur_token = next(self.generator)
+                self.error(typ, f'Expected to get a token from type {typ} but got {self.cur_token.text} from type {self.cur_token.type} instead')
+            elif check_text and (self.cur_token.text not in text or
+                                 self.cur_token.type in ["IDENTIFIER", "STRING_CONST"]):
+                self.error(text, f'Expected to get a token from {text} but got {self.cur_token.text} instead')
+            self.emitter.token(self.cur_token)
+            self.cur_token = self.tokens.advance()
+            return
+        self.error(typ if check_type else text, "NO TOKEN TO WRITE")
+
+    @property
+    def position(self) -> int:
+        """The index of cur_token in the token stream."""
+        return self.tokens.position
+
+    def error(self, expected: typing.Any, message: str, kind: str = None) -> None:
+        """Reports a syntax error at the current token: raises an Exception
+        with message, or a ParseError with a Diagnostic in recovery mode.
+        """
+        location = location_of(self.tokenizer, self.cur_token)
+        if not self.recover:
+            raise Exception(located(message, location))
+        if kind is None:
+            kind = UNEXPECTED_TOKEN if self.cur_token else UNEXPECTED_END
+        actual = self.cur_token.text if self.cur_token else None
+        raise ParseError(Diagnostic(kind, expected, actual, self.position, *(location or ())))
+
+    def report(self, kind: str, expected: typing.Any, name: Token, position: int, message: str) -> None:
+        """Reports a name the index does not know, the token at position.
+        Unlike a syntax error this does not stop the rule in recovery mode.
+        """
+        location = location_of(self.tokenizer, name)
+        if not self.recover:
+            raise Exception(located(message, location))
+        self.diagnostics.append(Diagnostic(kind, expected, name.text, position, *(location or ())))
+
+    def resolve_type(self) -> None:
+        """Checks that the current token, a class name used as a type, is a
+        class of the index.
+        """
+        name = self.cur_token.text
+        if name not in self.index:
+            self.report(UNKNOWN_CLASS, "class", self.cur_token, self.position, f'Unknown class {name}')
+
+    def resolve_call(self, receiver: typing.Optional[Token], receiver_position: int,
+                     name: Token, position: int) -> None:
+        """Checks the subroutine called as receiver.name(...), or name(...)
+        without a receiver. A receiver is a variable (a call of a method of
+        its type) or a class.
+        """
+        receiver_name = receiver.text if receiver else None
+        if receiver is None:
+            class_info = self.class_info
+        elif receiver_name in self.variables:  # None for a primitive type
+            class_info = self.index.lookup(self.variables[receiver_name] or "")
+        elif self.class_info is not None and self.class_info.variable_type(receiver_name):
+            class_info = self.index.lookup(self.class_info.variable_type(receiver_name))
+        elif receiver_name in self.index:
+            class_info = self.index.lookup(receiver_name)
+        else:
+            self.report(UNKNOWN_CLASS, "class or variable", receiver, receiver_position,
+                        f'Unknown class or variable {receiver_name}')
             return
-        raise Exception("NO TOKEN TO WRITE")
+        if class_info is not None and name.text not in class_info.subroutines:
+            self.report(UNKNOWN_SUBROUTINE, f'a subroutine of {class_info.name}', name, position,
+                        f'Unknown subroutine {class_info.name}.{name.text}')
+
+    def declare(self, variable_type: typing.Optional[str]) -> None:
+        """Records the current token as a variable of the subroutine."""
+        if self.index is not None and self.cur_token:
+            self.variables[self.cur_token.text] = variable_type
+
+    def skip(self) -> None:
+        """Drops the current token without emitting it."""
+        self.last_skipped = self.cur_token
+        self.cur_token = self.tokens.advance()
+
+    def with_recovery(self, compile_rule, sync: list) -> None:
+        """Runs compile_rule. In recovery mode a syntax error inside it is
+        recorded, its open elements are closed and tokens are skipped up to
+        the next synchronizing token in sync (a ';' is skipped too).
+        """
+        if not self.recover:
+            compile_rule()
+            return
+        depth, position = self.emitter.depth, self.position
+        try:
+            compile_rule()
+        except ParseError as error:
+            self.diagnostics.append(error.diagnostic)
+            self.emitter.unwind(depth)
+            if self.position == position and self.cur_token:  # always make progress
+                self.skip()
+            while self.cur_token and not (self.cur_token.type in ["KEYWORD", "SYMBOL"]
+                                          and self.cur_token.text in sync):
+                self.skip()
+            if self.cur_token and self.cur_token.text == ";":
+                self.skip()
 
     def compile_class(self) -> None:
-        """Compiles a complete class."""
-        self.output_stream.write("<class>\n")
-        self.cur_indent += 1
+        """Compiles a complete class. In recovery mode, raises a single
+        CompilationError holding every Diagnostic once the class is parsed.
+        """
+        try:
+            self.emitter.open("class")
+            self.with_recovery(self.compile_class_header, DECLARATION_SYNC)
+            while True:
+                while self.cur_token and self.cur_token.text in ["STATIC", "FIELD"]:  # compile all the fields of class
+                    self.with_recovery(self.compile_class_var_dec, DECLARATION_SYNC)
+                while self.cur_token and self.cur_token.text in ["CONSTRUCTOR", "FUNCTION", "METHOD"]:  # compile all function in class
+                    self.with_recovery(self.compile_subroutine, SUBROUTINE_SYNC)
+                if not (self.recover and self.at_stray_token()):
+                    break
+                # skip to the next member, so the errors in it are reported too
+                self.with_recovery(self.compile_stray_tokens, MEMBER_SYNC)
+            self.with_recovery(self.compile_class_end, [])
+            self.emitter.unwind(0)
+        finally:  # on errors too, so the output shows where parsing stopped
+            self.emitter.flush()
+        if self.diagnostics:
+            raise CompilationError(f'{len(self.diagnostics)} syntax errors:\n' +
+                                   "\n".join(str(diagnostic) for diagnostic in self.diagnostics),
+                                   self.diagnostics)
+
+    def compile_class_header(self) -> None:
         self.eat(text = ["CLASS"], check_text= True)
-        class_name = self.cur_token.text
+        if self.index is not None and self.cur_token:
+            self.class_info = self.index.lookup(self.cur_token.text)
         self.eat(typ = ["IDENTIFIER"], check_type= True)
         self.eat(text = ["{"], check_text= True)
 
-        self.compile_class_var_dec()
+    def at_stray_token(self) -> bool:
+        """Whether the current token is neither a class member nor the
+        closing "}" of the class, the last token of the file.
+        """
+        if not self.cur_token:
+            return False
+        return self.cur_token.text != "}" or self.tokens.peek() is not None
+
+    def compile_stray_tokens(self) -> None:
+        self.error(MEMBER_SYNC, f'Expected a class member but got {self.cur_token.text} instead',
+                   STRAY_TOKENS)
 
-        self.eat(text = ["}"], check_text= True)
+    def compile_class_end(self) -> None:
+        if self.recover and not self.cur_token and self.last_skipped \
+                and self.last_skipped.text == "}":  # recovery skipped the closing brace
+            self.emitter.token(self.last_skipped)
+        else:
+            self.eat(text = ["}"], check_text= True)
         if self.cur_token:  # not a function or a class field
-            raise Exception("illegal format")
-        self.output_stream.write("</class>\n")
-
+            self.error("end of file", "illegal format", TRAILING_TOKENS)
+        self.emitter.close("class")
 
     def compile_class_var_dec(self) -> None:
         """Compiles a static declaration or a field declaration."""
-        if not self.cur_token:
-            return
-        if self.cur_token.text not in ["STATIC", "FIELD"]:  # if there are no fields in the begin of class
-            self.compile_subroutine()
-            return
-
-        self.output_stream.write("<classVarDec>\n")
-        self.cur_indent += 1
-
-        while self.cur_token.text in ["STATIC", "FIELD"]:  # compile all the fields of class
-            self.eat(text = ["STATIC", "FIELD"], check_text= True)
-            self.eat(text=["INT", "CHAR", "BOOLEAN", "CLASS_NAME"], check_text= True)
+        self.emitter.open("classVarDec")
+        self.eat(text = ["STATIC", "FIELD"], check_text= True)
+        self.compile_type()
+        self.eat(typ=["IDENTIFIER"], check_type=True)
+        while self.cur_token and self.cur_token.text == ",":
+            self.eat(text=[","], check_text=True)
             self.eat(typ=["IDENTIFIER"], check_type=True)
-            while self.cur_token.text == ",":
-                self.eat(text=[","], check_text=True)
-                self.eat(typ=["IDENTIFIER"], check_type=True)
-            self.eat(text=[";"], check_text=True)
+        self.eat(text=[";"], check_text=True)
+        self.emitter.close("classVarDec")
 
-        self.output_stream.write("</classVarDec>\n")
-        self.compile_subroutine()
+    def compile_type(self, allow_void: bool = False) -> typing.Optional[str]:
+        """Compiles a type: a primitive type keyword or a class name.
+
+        Returns:
+            typing.Optional[str]: the class name, None for a primitive type.
+        """
+        if self.cur_token and self.cur_token.type == "KEYWORD":
+            self.eat(text=["INT", "CHAR", "BOOLEAN", "VOID"] if allow_void else ["INT", "CHAR", "BOOLEAN"],
+                     check_text=True)
+            return None
+        class_name = self.cur_token.text if self.cur_token else None
+        if self.index is not None and self.cur_token and self.cur_token.type == "IDENTIFIER":
+            self.resolve_type()
+        self.eat(typ=["IDENTIFIER"], check_type=True)
+        return class_name
 
     def compile_subroutine(self) -> None:
         """
@@ -93,120 +301,127 @@ class CompilationEngine:
         You can assume that classes with constructors have at least one field,
         you will understand why this is necessary in project 11.
         """
-        if not self.cur_token or self.cur_token.text not in ["CONSTRUCTOR", "FUNCTION", "METHOD"]:
-            return
-
-        self.output_stream.write("<subroutineDec>\n")
-        self.cur_indent += 1
+        self.emitter.open("subroutineDec")
+        self.variables = {}
+        self.eat(text=["CONSTRUCTOR", "FUNCTION", "METHOD"], check_text=True)
+        self.compile_type(allow_void=True)
+        self.eat(typ=["IDENTIFIER"], check_type=True)
+        self.eat(text=["("], check_text=True)
+        self.compile_parameter_list()
+        self.eat(text=[")"], check_text=True)
+        self.compile_subroutine_body()
+        self.emitter.close("subroutineDec")
 
-        while self.cur_token.text in ["CONSTRUCTOR", "FUNCTION", "METHOD"]:  # compile all function in class
-            self.eat(text=["CONSTRUCTOR", "FUNCTION", "METHOD"], check_text=True)
-            if self.cur_token.type is "KEYWORD":
-                self.eat(text=["INT", "CHAR", "BOOLEAN", "CLASS_NAME", "VOID"], check_text=True)
-            elif self.cur_token.type == "IDENTIFIER":
-                self.eat(typ=["IDENTIFIER"], check_type=True)
-            else:
-                raise Exception
-            self.eat(typ=["IDENTIFIER"], check_type=True)
-            self.eat(text=["("], check_text=True)
-            self.compile_parameter_list()
-            self.eat(text=[")"], check_text=True)
-            # subroutine body
-            self.eat(text=["{"], check_text=True)
-            while self.cur_token.text != "RETURN":
-                if self.cur_token.text == "VAR":
-                    self.compile_var_dec()
-                if self.cur_token.text == "LET":
-                    self.compile_let()
-                if self.cur_token.text == "DO":
-                    self.compile_do()
-                if self.cur_token.text == "IF":
-                    self.compile_if()
-                if self.cur_token.text == "WHILE":
-                    self.compile_while()
-            # subroutine return
-            if self.cur_token.text == "RETURN":
-                self.compile_return()
-            else:  # every function in jack needs a return
-                raise Exception("Function finished running without return")
-            self.eat(text=["}"], check_text=True)
-        self.output_stream.write("</subroutineDec>\n")
+    def compile_subroutine_body(self) -> None:
+        """Compiles the body of a subroutine, including the enclosing "{}"."""
+        self.emitter.open("subroutineBody")
+        self.eat(text=["{"], check_text=True)
+        while self.cur_token and self.cur_token.text == "VAR":
+            self.with_recovery(self.compile_var_dec, STATEMENT_SYNC)
+        self.compile_statements()
+        self.eat(text=["}"], check_text=True)
+        self.emitter.close("subroutineBody")
 
     def compile_parameter_list(self) -> None:
         """Compiles a (possibly empty) parameter list, not including the
         enclosing "()".
         """
-        if self.cur_token.text == ")":  # if no parameters in the list
-            return
-        self.output_stream.write("<parameterList>\n")
-        self.eat(text=["INT", "CHAR", "BOOLEAN"], check_text=True)
-        self.eat(typ=["IDENTIFIER"], check_type=True)
-        while self.cur_token.text == ",":
-            self.eat(text=[","], check_text=True)
-            self.eat(text=["INT", "CHAR", "BOOLEAN", "VOID"], check_text= True)
+        self.emitter.open("parameterList")
+        if self.cur_token and self.cur_token.text != ")":  # if there are parameters in the list
+            self.declare(self.compile_type())
             self.eat(typ=["IDENTIFIER"], check_type=True)
-        self.output_stream.write("</parameterList>\n")
+            while self.cur_token and self.cur_token.text == ",":
+                self.eat(text=[","], check_text=True)
+                self.declare(self.compile_type())
+                self.eat(typ=["IDENTIFIER"], check_type=True)
+        self.emitter.close("parameterList")
 
     def compile_var_dec(self) -> None:
         """Compiles a var declaration."""
-        self.output_stream.write("<varDec>\n")
+        self.emitter.open("varDec")
         self.eat(text=["VAR"], check_text=True)
-        if self.cur_token and self.cur_token.type is "KEYWORD":
-            self.eat(text= ["INT", "CHAR", "BOOLEAN"], check_text=True)
-        elif self.cur_token and self.cur_token.type is "IDENTIFIER":
-            self.eat(typ=["IDENTIFIER"], check_type= True)
-        else:
-            raise Exception(f'No Type declaration')
+        variable_type = self.compile_type()
+        self.declare(variable_type)
         self.eat(typ=["IDENTIFIER"], check_type=True)
-        while self.cur_token.text == ",":
-            self.eat(text=[","], check_type=True)
-            self.eat(text=["IDENTIFIER"], check_text=True)
+        while self.cur_token and self.cur_token.text == ",":
+            self.eat(text=[","], check_text=True)
+            self.declare(variable_type)
+            self.eat(typ=["IDENTIFIER"], check_type=True)
         self.eat(text=[";"], check_text=True)
-        self.output_stream.write("</varDec>\n")
+        self.emitter.close("varDec")
 
     def compile_statements(self) -> None:
         """Compiles a sequence of statements, not including the enclosing
         "{}".
         """
-        # Your code goes here!
-        pass
+        self.emitter.open("statements")
+        while self.cur_token:
+            if self.cur_token.text == "LET":
+                self.with_recovery(self.compile_let, STATEMENT_SYNC)
+            elif self.cur_token.text == "DO":
+                self.with_recovery(self.compile_do, STATEMENT_SYNC)
+            elif self.cur_token.text == "IF":
+                self.with_recovery(self.compile_if, STATEMENT_SYNC)
+            elif self.cur_token.text == "WHILE":
+                self.with_recovery(self.compile_while, STATEMENT_SYNC)
+            elif self.cur_token.text == "RETURN":
+                self.with_recovery(self.compile_return, STATEMENT_SYNC)
+            elif self.recover and self.cur_token.text not in ["}"] + SUBROUTINE_KEYWORDS:  # not a statement
+                self.with_recovery(self.compile_unexpected_statement, STATEMENT_SYNC)
+            else:
+                break
+        self.emitter.close("statements")
+
+    def compile_unexpected_statement(self) -> None:
+        self.error(STATEMENT_KEYWORDS, f'Expected a statement but got {self.cur_token.text} instead')
 
     def compile_do(self) -> None:
         """Compiles a do statement."""
-        self.output_stream.write("<doStatement>\n")
+        self.emitter.open("doStatement")
         self.eat(text=["DO"], check_text=True)
-        self.eat(typ=['IDENTIFIER'], check_type=True)
-        if self.cur_token and self.cur_token.text:
-            if self.cur_token and self.cur_token.text == "(":
-                self.eat(text=['('], check_text=True)
-                self.compile_expression_list()
-                self.eat(text=[')'], check_text=True)
-                self.eat(text=["."], check_text=True)
-        self.eat(typ=['IDENTIFIER'], check_type=True)
-        self.eat(text=['('], check_text=True)
+        self.compile_call()
+        self.eat(text=[";"], check_text=True)
+        self.emitter.close("doStatement")
+
+    def compile_call(self) -> None:
+        """Compiles a subroutine call, from its first name to its ")"."""
+        self.compile_call_name()
         self.compile_expression_list()
         self.eat(text=[')'], check_text=True)
-        self.eat(text=[";"], check_text=True)
-        self.output_stream.write("</doStatement>\n")
+
+    def compile_call_name(self) -> None:
+        """Compiles the start of a subroutine call, up to and including its
+        "(", resolving it when there is an index.
+        """
+        name = self.cur_token
+        position = self.position
+        self.eat(typ=['IDENTIFIER'], check_type=True)
+        if self.cur_token and self.cur_token.text == ".":  # className|varName '.' subroutineName
+            self.eat(text=["."], check_text=True)
+            if self.index is not None and self.cur_token and self.cur_token.type == "IDENTIFIER":
+                self.resolve_call(name, position, self.cur_token, self.position)
+            self.eat(typ=['IDENTIFIER'], check_type=True)
+        elif self.index is not None:
+            self.resolve_call(None, position, name, position)
+        self.eat(text=['('], check_text=True)
 
     def compile_let(self) -> None:
         """Compiles a let statement."""
-        self.output_stream.write("<letStatement>\n")
-        self.cur_indent += 1
+        self.emitter.open("letStatement")
         self.eat(text=["LET"], check_text=True)
         self.eat(typ=['IDENTIFIER'], check_type=True)
         if self.cur_token and self.cur_token.text == "[":
+            self.eat(text=["["], check_text=True)
             self.compile_expression()
             self.eat(text=["]"], check_text=True)
         self.eat(text=["="], check_text=True)
         self.compile_expression()
         self.eat(text=[";"], check_text=True)
-        self.output_stream.write("</letStatement>\n")
+        self.emitter.close("letStatement")
 
     def compile_while(self) -> None:
         """Compiles a while statement."""
-        self.output_stream.write("<whileStatement>\n")
-        self.cur_indent += 1
+        self.emitter.open("whileStatement")
         self.eat(text=["WHILE"], check_text=True)
         self.eat(text=["("], check_text=True)
         self.compile_expression()
@@ -214,21 +429,20 @@ class CompilationEngine:
         self.eat(text=["{"], check_text=True)
         self.compile_statements()
         self.eat(text=["}"], check_text=True)
-        self.output_stream.write("</whileStatement>\n")
+        self.emitter.close("whileStatement")
 
     def compile_return(self) -> None:
         """Compiles a return statement."""
-        self.output_stream.write("<returnStatement>\n")
+        self.emitter.open("returnStatement")
         self.eat(text=["RETURN"], check_text=True)
-        if self.cur_token.text != ";":
+        if self.cur_token and self.cur_token.text != ";":
             self.compile_expression()
         self.eat(text=[";"], check_text=True)
-        self.output_stream.write("</returnStatement>\n")
+        self.emitter.close("returnStatement")
 
     def compile_if(self) -> None:
         """Compiles a if statement, possibly with a trailing else clause."""
-        self.output_stream.write("<ifStatement>\n")
-        self.cur_indent += 1
+        self.emitter.open("ifStatement")
         self.eat(text=["IF"], check_text=True)
         self.eat(text=["("], check_text=True)
         self.compile_expression()
@@ -241,32 +455,114 @@ class CompilationEngine:
             self.eat(text=["{"], check_text=True)
             self.compile_statements()
             self.eat(text=["}"], check_text=True)
-        self.output_stream.write("</ifStatement>\n")
+        self.emitter.close("ifStatement")
 
     def compile_expression(self) -> None:
         """Compiles an expression."""
-        self.eat(typ=['IDENTIFIER'], check_type=True)
+        self.compile_nested(EXPRESSION)
 
     def compile_term(self) -> None:
-        """Compiles a term.
-        This routine is faced with a slight difficulty when
-        trying to decide between some of the alternative parsing rules.
-        Specifically, if the current token is an identifier, the routing must
-        distinguish between a variable, an array entry, and a subroutine call.
-        A single look-ahead token, which may be one of "[", "(", or "." suffices
-        to distinguish between the three possibilities. Any other token is not
-        part of this term and should not be advanced over.
+        """Compiles a term."""
+        self.compile_nested(TERM)
+
+    def compile_nested(self, start: int) -> None:
+        """Compiles an expression or a term (start), with everything nested
+        in it. Iterative, so it handles any nesting depth in time linear in
+        the number of tokens: instead of recursing into a nested expression
+        or term, what is left of the enclosing rule is pushed on a stack as
+        a continuation, and resumed when the nested one is closed.
+
+        If the current token of a term is an identifier, the token after it
+        tells a variable, an array entry ("[") and a subroutine call ("(" or
+        ".") apart, and is peeked at before anything is eaten.
         """
-        # Your code goes here!
-        pass
+        emitter = self.emitter
+        stack = [DONE]
+        state = start
+        while True:
+            if state == EXPRESSION:
+                emitter.open("expression")
+                stack.append(AFTER_OPERAND)
+                state = TERM
+            elif state == TERM:
+                if not self.cur_token:
+                    self.error("term", "NO TOKEN TO WRITE")
+                emitter.open("term")
+                token = self.cur_token
+                state = TERM_END
+                if token.type in ["INT_CONST", "STRING_CONST"]:
+                    self.eat(typ=["INT_CONST", "STRING_CONST"], check_type=True)
+                elif token.type == "KEYWORD":
+                    self.eat(text=KEYWORD_CONSTANTS, check_text=True)
+                elif token.type == "IDENTIFIER":
+                    following = self.tokens.peek(1)
+                    lookahead = following.text if following and following.type == "SYMBOL" else None
+                    if lookahead in ["(", "."]:  # subroutine call
+                        self.compile_call_name()
+                        emitter.open("expressionList")
+                        if self.cur_token and not (self.cur_token.type == "SYMBOL"
+                                                   and self.cur_token.text == ")"):
+                            stack.append(AFTER_ARGUMENT)
+                            state = EXPRESSION
+                        else:
+                            emitter.close("expressionList")
+                            self.eat(text=[")"], check_text=True)
+                    elif lookahead == "[":  # array entry
+                        self.eat(typ=["IDENTIFIER"], check_type=True)
+                        self.eat(text=["["], check_text=True)
+                        stack.append(AFTER_INDEX)
+                        state = EXPRESSION
+                    else:  # variable
+                        self.eat(typ=["IDENTIFIER"], check_type=True)
+                elif token.text == "(":
+                    self.eat(text=["("], check_text=True)
+                    stack.append(AFTER_GROUP)
+                    state = EXPRESSION
+                elif token.type == "SYMBOL" and token.text in UNARY_OPS:
+                    self.eat(text=UNARY_OPS, check_text=True)
+                    stack.append(AFTER_UNARY)
+                    state = TERM
+                else:
+                    self.error("term", f'Expected a term but got {token.text} instead')
+            elif state == TERM_END:  # a term is complete
+                emitter.close("term")
+                continuation = stack.pop()
+                if continuation == AFTER_OPERAND:
+                    if self.cur_token and self.cur_token.type == "SYMBOL" \
+                            and self.cur_token.text in BINARY_OPS:
+                        self.eat(text=BINARY_OPS, check_text=True)
+                        stack.append(AFTER_OPERAND)
+                        state = TERM
+                    else:
+                        emitter.close("expression")
+                        state = EXPRESSION_END
+                elif continuation == DONE:
+                    return
+                # AFTER_UNARY: the unary term is complete too
+            else:  # EXPRESSION_END, an expression is complete
+                continuation = stack.pop()
+                state = TERM_END
+                if continuation == AFTER_ARGUMENT:
+                    if self.cur_token and self.cur_token.type == "SYMBOL" and self.cur_token.text == ",":
+                        self.eat(text=[","], check_text=True)
+                        stack.append(AFTER_ARGUMENT)
+                        state = EXPRESSION
+                    else:
+                        emitter.close("expressionList")
+                        self.eat(text=[")"], check_text=True)
+                elif continuation == AFTER_INDEX:
+                    self.eat(text=["]"], check_text=True)
+                elif continuation == AFTER_GROUP:
+                    self.eat(text=[")"], check_text=True)
+                else:  # DONE
+                    return
 
     def compile_expression_list(self) -> None:
         """Compiles a (possibly empty) comma-separated list of expressions."""
-        # Your code goes here!
-        pass
-
-    def write_indent(self):
-        indent = ""
-        for i in range(self.cur_indent):
-            indent = indent + " "
-        return indent
\ No newline at end of file
+        self.emitter.open("expressionList")
+        if self.cur_token and not (self.cur_token.type == "SYMBOL" and self.cur_token.text == ")"):
+            self.compile_expression()
+            while self.cur_token and self.cur_token.type == "SYMBOL" and self.cur_token.text == ",":
+                self.eat(text=[","], check_text=True)
+                self.compile_expression()
+        self.emitter.close("expressionList")
@@ -0,0 +1,82 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from JackTokenizer import TOKEN_TYPES
+from JackTokenizer import Token
+
+INDENT = " "
+INDENT_TABLE_SIZE = 64
+FLUSH_THRESHOLD = 1 << 13  # buffered writes before a bulk write
+
+# the text around a token's value, the same as Token.token_string()
+TOKEN_TAGS = {token_type: (f'<{token_type}> ', f' </{token_type}>\n')
+              for token_type in TOKEN_TYPES}
+
+
+class XmlEmitter:
+    """Writes the XML of a parse to an output stream.
+
+    The CompilationEngine reports its parse as open(kind) / token(token) /
+    close(kind) events. The emitter keeps the current depth, takes indent
+    prefixes from a precomputed table, and collects the output in a buffer
+    that is written in bulk, so the output stream sees one write per
+    FLUSH_THRESHOLD lines instead of several per token.
+    """
+
+    def __init__(self, output_stream: typing.TextIO,
+                 flush_threshold: int = FLUSH_THRESHOLD) -> None:
+        self.output_stream = output_stream
+        self.flush_threshold = flush_threshold
+        self.indents = [INDENT * depth for depth in range(INDENT_TABLE_SIZE)]
+        self.depth = 0
+        self.kinds = []  # the elements opened and not closed yet
+        self.buffer = []
+
+    def indent(self, depth: int) -> str:
+        indents = self.indents
+        while depth >= len(indents):  # deeper than ever before
+            indents.extend(INDENT * size
+                           for size in range(len(indents), 2 * len(indents)))
+        return indents[depth]
+
+    def open(self, kind: str) -> None:
+        """Starts the element of a non-terminal, e.g. "letStatement"."""
+        depth = self.depth
+        prefix = self.indents[depth] if depth < len(self.indents) else self.indent(depth)
+        self.buffer.append(f'{prefix}<{kind}>\n')
+        self.kinds.append(kind)
+        self.depth += 1
+        if len(self.buffer) >= self.flush_threshold:
+            self.flush()
+
+    def close(self, kind: str) -> None:
+        self.kinds.pop()
+        self.depth = depth = self.depth - 1
+        prefix = self.indents[depth] if depth < len(self.indents) else self.indent(depth)
+        self.buffer.append(f'{prefix}</{kind}>\n')
+
+    def token(self, token: Token) -> None:
+        depth = self.depth
+        prefix = self.indents[depth] if depth < len(self.indents) else self.indent(depth)
+        start, end = TOKEN_TAGS[token.type]
+        self.buffer.append(f'{prefix}{start}{token.text}{end}')
+        if len(self.buffer) >= self.flush_threshold:
+            self.flush()
+
+    def unwind(self, depth: int) -> None:
+        """Closes open elements until depth are left, used when the engine
+        abandons a rule to recover from a syntax error.
+        """
+        while self.depth > depth:
+            self.close(self.kinds[-1])
+
+    def flush(self) -> None:
+        """Writes everything buffered so far to the output stream."""
+        if self.buffer:
+            self.output_stream.write("".join(self.buffer))
+            self.buffer.clear()
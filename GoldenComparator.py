@@ -0,0 +1,170 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import re
+import typing
+from JackTokenizer import KEYWORD_VALUES
+
+# a tag, or the text between two tags
+ITEM_REGEX = re.compile(r'<[^<>]*>|[^<]+')
+# what the reference files of the spec write differently from the engine:
+# tag names, escapes with a ";" and keywords in lower case
+SPEC_TAGS = {"keyword": "KEYWORD", "symbol": "SYMBOL", "identifier": "IDENTIFIER",
+             "integerConstant": "INT_CONST", "stringConstant": "STRING_CONST"}
+REPLACEMENTS = [(f'<{slash}{spec}>', f'<{slash}{tag}>')
+                for spec, tag in SPEC_TAGS.items() for slash in ("", "/")]
+REPLACEMENTS += [("&lt;", "&lt"), ("&gt;", "&gt"), ("&amp;", "&amp")]
+REPLACEMENTS += [(f'<KEYWORD>{keyword}<', f'<KEYWORD>{value}<')
+                 for keyword, value in KEYWORD_VALUES.items()]
+READ_SIZE = 1 << 16  # characters of the reference file read at a time
+
+
+class OutputMismatch(Exception):
+    pass
+
+
+def complete(xml: str) -> int:
+    """The length of the start of xml which ends with a closing tag, so that
+    no element with text is cut in two.
+    """
+    start = xml.rfind("</")
+    return 0 if start < 0 else xml.find(">", start) + 1
+
+
+def canonical(xml: str) -> str:
+    """The XML in the engine's form, without the whitespace around tags and
+    with every other run of whitespace made a single space. xml has to be
+    complete, or the end of a file.
+    """
+    xml = " ".join(xml.split()).replace("> ", ">").replace(" <", "<")
+    for old, new in REPLACEMENTS:
+        if old in xml:
+            xml = xml.replace(old, new)
+    return xml
+
+
+def item_at(xml: str, position: int) -> typing.Tuple[int, str]:
+    """The index of the item of canonical xml around position, and the item
+    ("" at the end of xml).
+    """
+    start = position if xml.startswith("<", position) else \
+        max(xml.rfind("<", 0, position), xml.rfind(">", 0, position) + 1)
+    match = ITEM_REGEX.match(xml, start)
+    prefix = xml[:start]
+    texts = prefix.count(">") - prefix.count("><") - prefix.endswith(">")
+    return prefix.count("<") + texts, match.group() if match else ""
+
+
+def item_line(xml: str, index: int, line: int = 1) -> int:
+    """The line of the index-th item of xml, which starts at line. The
+    whitespace between two tags is not an item.
+    """
+    for match in ITEM_REGEX.finditer(xml):
+        text = match.group()
+        if not text.isspace():
+            if index == 0:
+                return line + xml.count("\n", 0, match.start() + len(text) - len(text.lstrip()))
+            index -= 1
+    return line + xml.count("\n")
+
+
+class GoldenComparator:
+    """A text output stream which compares the XML written to it with a
+    reference file, the output of another implementation or the spec's
+    own. Both are compared in canonical form, so they may differ in
+    whitespace, tag names, escapes and keyword case.
+
+    The reference file is read as the output comes, and the first write
+    which differs from it raises an OutputMismatch, which stops the engine.
+    What is written after that, as the engine unwinds, is ignored.
+    Each write is compared as a whole string, the first differing item and
+    its lines are only looked for then.
+    """
+
+    def __init__(self, reference_path: str, read_size: int = READ_SIZE) -> None:
+        self.reference_path = reference_path
+        self.read_size = read_size
+        self.reference_file = open(reference_path, 'r')
+        self.expected = ""  # the canonical reference not compared yet
+        self.reference_pending = ""  # read after the last closing tag
+        self.pending = ""  # written after the last closing tag
+        self.items = 0  # of the output compared so far
+        self.line = 1  # of the start of pending
+        self.failed = False
+
+    def read_expected(self, size: int) -> str:
+        """At least size characters of the canonical reference, unless it
+        ends before.
+        """
+        while len(self.expected) < size and not self.reference_file.closed:
+            text = self.reference_pending + self.reference_file.read(self.read_size)
+            if len(text) == len(self.reference_pending):  # the end of the file
+                self.expected += canonical(text)
+                self.reference_file.close()
+            else:
+                end = complete(text)
+                self.reference_pending = text[end:]
+                self.expected += canonical(text[:end])
+        return self.expected
+
+    def compare(self, xml: str) -> None:
+        actual = canonical(xml)
+        expected = self.read_expected(len(actual))
+        if not expected.startswith(actual):
+            position = 0
+            while position < len(expected) and actual[position] == expected[position]:
+                position += 1
+            index, actual_item = item_at(actual, position)
+            expected_item = item_at(expected, position)[1]
+            self.mismatch(item_line(xml, index, self.line), self.items + index,
+                          repr(expected_item) if expected_item else "the end of the file",
+                          repr(actual_item))
+        self.expected = expected[len(actual):]
+        self.items += item_at(actual, len(actual))[0]
+        self.line += xml.count("\n")
+
+    def mismatch(self, line: int, index: int, expected: str, actual: str) -> None:
+        self.failed = True
+        with open(self.reference_path, 'r') as reference_file:
+            reference_line = item_line(reference_file.read(), index)
+        raise OutputMismatch(f'output line {line} differs from {self.reference_path} line '
+                             f'{reference_line}: expected {expected}, got {actual}')
+
+    def write(self, text: str) -> int:
+        """Compares text, unless an earlier write differed already."""
+        if self.failed:
+            return len(text)
+        xml = self.pending + text
+        end = complete(xml)
+        self.pending = xml[end:]
+        self.compare(xml[:end])
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def finish(self) -> None:
+        """Checks that the reference file ends where the output does."""
+        self.compare(self.pending)
+        self.pending = ""
+        expected = self.read_expected(1)
+        if expected:
+            self.mismatch(self.line, self.items, repr(item_at(expected, 0)[1]),
+                          "the end of the output")
+
+    def close(self) -> None:
+        self.reference_file.close()
+
+    def __enter__(self) -> "GoldenComparator":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is None:
+                self.finish()
+        finally:
+            self.close()
@@ -0,0 +1,251 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from bisect import bisect_left, bisect_right
+from CompilationEngine import CompilationEngine
+from JackTokenizer import MASTER_REGEX, KEYWORD_VALUES, SYMBOL_VALUES, TYPE_CODES, LineIndex
+from ParseTree import Node, ParseTree, TreeBuilder
+from TokenStream import TokenStream
+
+KEYWORD_CODE = TYPE_CODES["KEYWORD"]
+SYMBOL_CODE = TYPE_CODES["SYMBOL"]
+IDENTIFIER_CODE = TYPE_CODES["IDENTIFIER"]
+INT_CONST_CODE = TYPE_CODES["INT_CONST"]
+STRING_CONST_CODE = TYPE_CODES["STRING_CONST"]
+
+# the class members an edit can be re-parsed in, and the rule parsing each
+MEMBER_RULES = {"classVarDec": "compile_class_var_dec", "subroutineDec": "compile_subroutine"}
+
+
+class TokenSlice:
+    """Feeds tokens [first, last) of a TokenStream to an engine."""
+
+    def __init__(self, stream: TokenStream, first: int, last: int) -> None:
+        self.stream = stream
+        self.first = first
+        self.last = last
+
+    def token_generator(self):
+        stream = self.stream
+        for index in range(self.first, self.last):
+            yield stream[index]
+        yield None
+
+    @property
+    def line_index(self) -> LineIndex:
+        return self.stream.line_index
+
+
+class Document:
+    """A Jack file kept parsed while it is edited.
+
+    After an edit only the tokens around it are lexed again, until the new
+    tokens line up with the old ones, and only the class member (a
+    subroutineDec or classVarDec) holding the changed tokens is parsed
+    again. Edits which reach outside a single member, or change its kind,
+    fall back to parsing the whole class.
+
+    The tree's token indices are stable ids, not positions: a re-parsed
+    member gets fresh ids at the end of tree.tokens and the ids of the
+    tokens it replaced are freed, so no other part of the tree has to be
+    renumbered. Positions in the source are kept by the TokenStream: the
+    Token.offset of a tree token is where it was when it was parsed, and is
+    not moved by later edits before it.
+    """
+
+    def __init__(self, source: str, engine_class=CompilationEngine) -> None:
+        """
+        Args:
+            source (str): the complete text of a Jack file.
+            engine_class: CompilationEngine or an engine with the same
+                compile_* rules, used for every parse. An engine without
+                the member rules (TableDrivenEngine) parses every edit
+                from the start of the class.
+        """
+        self.engine_class = engine_class
+        self.source = source
+        self.stream = TokenStream(source)
+        self.tree: typing.Optional[ParseTree] = None
+        # [position in root.children, first token, end token] per member
+        self.members: typing.List[typing.List[int]] = []
+        self.free_ids = 0  # ids in tree.tokens no longer in the tree
+        self.relexed = 0  # tokens lexed by the last edit
+        self.reparsed = 0  # tokens parsed by the last edit
+        self.parse()
+
+    def parse(self) -> None:
+        """Parses the whole class. Tree ids are token positions after it.
+        A file which does not parse is left without a tree.
+        """
+        self.tree = None
+        self.members = []
+        self.free_ids = 0
+        self.reparsed = len(self.stream)
+        builder = TreeBuilder()
+        self.engine_class(self.stream, None, builder).compile_class()
+        tree = builder.tree
+        position = 0
+        for child_index, child in enumerate(tree.root.children):
+            if type(child) is int:
+                position += 1
+                continue
+            size = sum(event == "token" for event, _ in ParseTree(child, tree.tokens).walk())
+            self.members.append([child_index, position, position + size])
+            position += size
+        self.tree = tree
+
+    def edit(self, start: int, end: int, text: str) -> ParseTree:
+        """Replaces source[start:end] with text and brings the tokens and the
+        tree up to date.
+
+        Returns:
+            ParseTree: the updated tree, also in self.tree. The updated
+            tokens are in self.stream.
+
+        Raises:
+            Exception: if the edited file does not parse. The source and the
+            tokens are still updated, and the next edit parses it all again.
+        """
+        old = self.stream
+        starts, ends = old.starts, old.ends
+        shift = len(text) - (end - start)
+        self.source = self.source[:start] + text + self.source[end:]
+        # the first token that may change ends after the start of the edited
+        # line (a stray quote before the edit may now open a string), lexing
+        # restarts after the token before it, where no comment can be open
+        first = bisect_right(ends, self.source.rfind('\n', 0, start) + 1)
+        position = ends[first - 1] if first else 0
+        last, count = bisect_left(starts, end), len(old)
+        tokens = []
+        self.relexed = 0
+        for match in MASTER_REGEX.finditer(self.source, position):
+            kind = match.lastgroup
+            if kind == "COMMENT":
+                continue
+            token_start = match.start()
+            if token_start >= start + len(text):
+                while last < count and starts[last] + shift < token_start:
+                    last += 1
+                if last < count and starts[last] + shift == token_start:
+                    break  # the same text follows, so do the same tokens
+            tokens.append(self.lexed(kind, match))
+            self.relexed += 1
+        else:
+            last = count
+        old.splice(first, last, tokens, shift, self.source)
+        self.reparsed = 0
+        if self.tree is None:
+            self.parse()
+        elif tokens or first != last:
+            self.reparse(first, last, len(tokens))
+        return self.tree
+
+    @staticmethod
+    def lexed(kind: str, match) -> typing.Tuple[int, int, int, typing.Any]:
+        """A MASTER_REGEX token match as a TokenStream.splice tuple."""
+        text = match.group()
+        if kind == "WORD":
+            if text in KEYWORD_VALUES:
+                return KEYWORD_CODE, match.start(), match.end(), KEYWORD_VALUES[text]
+            return IDENTIFIER_CODE, match.start(), match.end(), text
+        if kind == "SYMBOL":
+            return SYMBOL_CODE, match.start(), match.end(), SYMBOL_VALUES[text]
+        if kind == "INT_CONST":
+            return INT_CONST_CODE, match.start(), match.end(), int(text)
+        if kind == "STRING_CONST":
+            return STRING_CONST_CODE, match.start(), match.end(), text[1:-1]
+        return IDENTIFIER_CODE, match.start(), match.end(), text
+
+    def reparse(self, first: int, last: int, replaced: int) -> None:
+        """Re-parses the member holding old tokens [first, last), which
+        are now replaced tokens from first on.
+        """
+        member = self.enclosing_member(first, last)
+        if member is None:
+            self.parse()
+            return
+        child_index, member_first, member_end = member
+        member_end += replaced - (last - first)
+        root = self.tree.root
+        old_node = root.children[child_index]
+        builder = TreeBuilder()
+        engine = self.engine_class(TokenSlice(self.stream, member_first, member_end), None, builder)
+        try:
+            getattr(engine, MEMBER_RULES[old_node.kind])()
+            complete = engine.cur_token is None
+        except Exception:
+            complete = False
+        if not complete:  # the edit changed the member's extent, or broke it
+            self.parse()
+            return
+        self.reparsed = member_end - member_first
+        tree_tokens = self.tree.tokens
+        for event, token_id in ParseTree(old_node, tree_tokens).walk():
+            if event == "token":
+                tree_tokens[token_id] = None
+                self.free_ids += 1
+        node = builder.root
+        base = len(tree_tokens)
+        tree_tokens.extend(builder.tokens)
+        renumber(node, base)
+        root.children[child_index] = node
+        member[2] = member_end
+        delta = replaced - (last - first)
+        for later in self.members[self.members.index(member) + 1:]:
+            later[1] += delta
+            later[2] += delta
+        if self.free_ids > len(tree_tokens) // 2:
+            self.compact()
+
+    def enclosing_member(self, first: int, last: int) -> typing.Optional[typing.List[int]]:
+        """The member whose tokens include old tokens [first, last), or, for
+        tokens inserted before old token first, the member they are inside.
+        """
+        for member in self.members:
+            _, member_first, member_end = member
+            if first == last:
+                if member_first < first < member_end:
+                    return member
+            elif member_first <= first and last <= member_end:
+                return member
+        return None
+
+    def compact(self) -> None:
+        """Drops the freed ids, giving the tokens their source positions as
+        ids again.
+        """
+        old_tokens = self.tree.tokens
+        tokens = []
+        stack = [(self.tree.root, 0)]
+        while stack:  # in source order, like ParseTree.walk
+            node, position = stack.pop()
+            children = node.children
+            while position < len(children):
+                child = children[position]
+                position += 1
+                if type(child) is int:
+                    children[position - 1] = len(tokens)
+                    tokens.append(old_tokens[child])
+                else:
+                    stack.append((node, position))
+                    stack.append((child, 0))
+                    break
+        self.tree = ParseTree(self.tree.root, tokens)
+        self.free_ids = 0
+
+
+def renumber(node: Node, base: int) -> None:
+    """Adds base to every token id under node."""
+    stack = [node]
+    while stack:
+        children = stack.pop().children
+        for position, child in enumerate(children):
+            if type(child) is int:
+                children[position] = child + base
+            else:
+                stack.append(child)
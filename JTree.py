@@ -0,0 +1,206 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import mmap
+import struct
+import typing
+from array import array
+from JackTokenizer import Token, TOKEN_TYPES
+from ParseTree import Node, ParseTree
+
+# A .jtree file is, little-endian:
+#   HEADER   magic, version, value width, link width, record count,
+#            string count
+#   records  a record for every node and token of the tree, in source
+#            order, so record 0 is the root
+#   offsets  string count + 1 uint32 offsets into the string bytes
+#   strings  the UTF-8 bytes of every string, back to back
+# A record is a byte code, a value and a link, packed without padding; the
+# value and the link are unsigned integers of 1, 2 or 4 bytes, the fewest
+# that fit every value and link of the file. The code is NODE or 1 + the
+# index of the token type in TOKEN_TYPES, and HAS_CHILDREN is set in the
+# code of a node with children, whose first child is the next record. The
+# value is the string index of the node's kind or of the token's text,
+# except for INT_CONST tokens where it is the integer itself. The link is
+# the record index of the next sibling, 0 if there is none (the root is
+# never a sibling).
+MAGIC = b"JTRE"
+JTREE_VERSION = 2
+HEADER = struct.Struct("<4sHBBII")
+WIDTH_FORMATS = {1: "B", 2: "H", 4: "I"}
+NODE = 0
+HAS_CHILDREN = 0x80
+NONE = -1
+INT_CODE = 1 + TOKEN_TYPES.index("INT_CONST")
+MAX_INT = 32767  # the largest integer constant of Jack
+
+
+def width(largest: int) -> int:
+    """The fewest bytes of WIDTH_FORMATS which hold 0 to largest."""
+    return next(size for size in WIDTH_FORMATS if largest < 1 << (8 * size))
+
+
+def record_struct(value_width: int, link_width: int) -> struct.Struct:
+    return struct.Struct(f'<B{WIDTH_FORMATS[value_width]}{WIDTH_FORMATS[link_width]}')
+
+
+def write_jtree(tree: ParseTree, output_stream: typing.BinaryIO) -> None:
+    """Writes the tree in the binary .jtree format, see JTreeReader."""
+    strings: typing.Dict[str, int] = {}
+    codes, values, following = array('B'), array('L'), array('L')
+    stack: typing.List[int] = []  # record indexes of the open nodes
+    last_child: typing.List[int] = []  # their last child record so far
+    tokens = tree.tokens
+    for event, value in tree.walk():
+        if event == "close":
+            stack.pop()
+            last_child.pop()
+            continue
+        record = len(codes)
+        if stack:
+            if last_child[-1] == NONE:
+                codes[stack[-1]] |= HAS_CHILDREN
+            else:
+                following[last_child[-1]] = record
+            last_child[-1] = record
+        following.append(0)
+        if event == "open":
+            codes.append(NODE)
+            values.append(strings.setdefault(value, len(strings)))
+            stack.append(record)
+            last_child.append(NONE)
+        else:
+            token = tokens[value]
+            code = 1 + TOKEN_TYPES.index(token.type)
+            if code == INT_CODE and not 0 <= token.text <= MAX_INT:
+                raise Exception(f'Integer constant {token.text} is out of range '
+                                f'(0 to {MAX_INT})')
+            codes.append(code)
+            values.append(token.text if code == INT_CODE
+                          else strings.setdefault(token.text, len(strings)))
+    encoded = [string.encode() for string in strings]
+    offsets = [0]
+    for string in encoded:
+        offsets.append(offsets[-1] + len(string))
+    value_width, link_width = width(max(values)), width(len(codes) - 1)
+    record = record_struct(value_width, link_width)
+    parts = [HEADER.pack(MAGIC, JTREE_VERSION, value_width, link_width,
+                         len(codes), len(strings))]
+    parts += [record.pack(*fields) for fields in zip(codes, values, following)]
+    parts.append(struct.pack(f'<{len(offsets)}I', *offsets))
+    parts += encoded
+    output_stream.write(b"".join(parts))
+
+
+class JTreeReader:
+    """Reads a .jtree file in place: the file is memory-mapped and records
+    and strings are only decoded when asked for, so opening even a large
+    tree costs nothing. Records are addressed by index, the root is 0.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as input_file:
+            self.buffer = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, value_width, link_width, self.record_count, self.string_count = \
+            HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != JTREE_VERSION:
+            self.buffer.close()
+            raise Exception(f'{path} is not a version {JTREE_VERSION} .jtree file')
+        self.record_struct = record_struct(value_width, link_width)
+        self.offsets_start = HEADER.size + self.record_count * self.record_struct.size
+        self.strings_start = self.offsets_start + (self.string_count + 1) * 4
+        self.strings: typing.Dict[int, str] = {}
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    def __enter__(self) -> "JTreeReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def record(self, index: int) -> typing.Tuple[int, int, int, int]:
+        """The (code, value, first child, next sibling) of a record, NONE
+        for a missing child or sibling.
+        """
+        code, value, following = self.record_struct.unpack_from(
+            self.buffer, HEADER.size + index * self.record_struct.size)
+        first = NONE
+        if code & HAS_CHILDREN:
+            code, first = code & ~HAS_CHILDREN, index + 1
+        return code, value, first, following or NONE
+
+    def string(self, index: int) -> str:
+        string = self.strings.get(index)
+        if string is None:
+            start, end = struct.unpack_from("<II", self.buffer, self.offsets_start + index * 4)
+            string = self.strings[index] = \
+                self.buffer[self.strings_start + start:self.strings_start + end].decode()
+        return string
+
+    def is_token(self, index: int) -> bool:
+        return self.record(index)[0] != NODE
+
+    def kind(self, index: int) -> str:
+        """The kind of a node, e.g. "letStatement"."""
+        return self.string(self.record(index)[1])
+
+    def token(self, index: int) -> Token:
+        code, value = self.record(index)[:2]
+        return Token(value if code == INT_CODE else self.string(value), TOKEN_TYPES[code - 1])
+
+    def children(self, index: int) -> typing.Iterator[int]:
+        child = self.record(index)[2]
+        while child != NONE:
+            yield child
+            child = self.record(child)[3]
+
+    def walk(self) -> typing.Iterator[typing.Tuple[str, typing.Any]]:
+        """Yields the same events as ParseTree.walk, with tokens as their
+        record index.
+        """
+        stack: typing.List[int] = []
+        index = 0
+        while True:
+            code, value, first, following = self.record(index)
+            if code == NODE:
+                yield "open", self.string(value)
+                if first != NONE:
+                    stack.append(index)
+                    index = first
+                    continue
+                yield "close", self.string(value)
+            else:
+                yield "token", index
+            while following == NONE:
+                if not stack:
+                    return
+                index = stack.pop()
+                code, value, first, following = self.record(index)
+                yield "close", self.string(value)
+            index = following
+
+    def tree(self) -> ParseTree:
+        """Decodes the whole file into a ParseTree."""
+        tokens: typing.List[Token] = []
+        root = None
+        stack: typing.List[Node] = []
+        for event, value in self.walk():
+            if event == "open":
+                node = Node(value)
+                if stack:
+                    stack[-1].children.append(node)
+                else:
+                    root = node
+                stack.append(node)
+            elif event == "close":
+                stack.pop()
+            else:
+                stack[-1].children.append(len(tokens))
+                tokens.append(self.token(value))
+        return ParseTree(root, tokens)
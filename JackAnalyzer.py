@@ -5,49 +5,557 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import argparse
+import io
 import os
+import queue
 import sys
+import threading
+import time
 import typing
-from CompilationEngine import CompilationEngine
-from JackTokenizer import JackTokenizer
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from AnalysisCache import AnalysisCache, DEFAULT_MAX_BYTES
+from AtomicWrite import write_atomically
+from CallGraph import CallGraph, DEFAULT_ROOT, prune
+from CodeGenerator import write_vm
+from CompilationEngine import CompilationEngine, CompilationError
+from GoldenComparator import GoldenComparator
+from JTree import write_jtree
+from JackTokenizer import JackTokenizer, SINGLE_PASS_MODE, LEGACY_MODE, STREAMING_MODE, MMAP_MODE
+from ParallelParser import compile_class_parallel
+from ParseTree import SERIALIZERS, TreeBuilder, parse_tree
+from Profiler import Profiler
+from ProjectIndex import ProjectIndex
+from TableDrivenEngine import TableDrivenEngine
+from Watcher import POLL_INTERVAL, ReferenceMap, Watcher, class_name_of
+
+# part of every AnalysisCache key, bump it whenever the output changes
+ANALYZER_VERSION = "1.0"
+OUTPUT_EXTENSIONS = {"xml": ".xml", "json": ".json", "sexp": ".sexp", "vm": ".vm",
+                     "jtree": ".jtree"}
+# everything written from a finished ParseTree
+WRITERS = dict(SERIALIZERS, vm=write_vm, jtree=write_jtree)
+BINARY_FORMATS = {"jtree"}  # written to binary files, so neither cached nor pipelined
+ENGINES = {"recursive": CompilationEngine, "table": TableDrivenEngine}
+TOKENIZER_MODES = (SINGLE_PASS_MODE, STREAMING_MODE, LEGACY_MODE, MMAP_MODE)
+PIPELINE_QUEUE_SIZE = 16  # files read ahead, and outputs waiting to be written
+
+# the AnalysisCache of this process for each directory and configuration
+process_caches: typing.Dict[typing.Tuple[str, str, int], AnalysisCache] = {}
+
+
+def open_cache(cache_directory: str, output_format: str = "xml",
+               tokenizer_mode: str = SINGLE_PASS_MODE,
+               cache_size: int = DEFAULT_MAX_BYTES) -> AnalysisCache:
+    """The cache of this process for the configuration, opened once and
+    kept for the next files. The output format and the tokenizer mode are
+    part of every key, so no configuration is served another's output.
+    """
+    version = f'{ANALYZER_VERSION}/{output_format}/{tokenizer_mode}'
+    key = (cache_directory, version, cache_size)
+    if key not in process_caches:
+        process_caches[key] = AnalysisCache(cache_directory, version, cache_size)
+    return process_caches[key]
+
+
+def compile_file(input_file: typing.TextIO, output_file: typing.TextIO,
+                 output_format: str = "xml", engine: str = "recursive",
+                 recover: bool = False, profiler: typing.Optional[Profiler] = None,
+                 tokenizer_mode: str = SINGLE_PASS_MODE,
+                 index: typing.Optional[ProjectIndex] = None) -> None:
+    engine_class = ENGINES[engine]
+    options = {"recover": True} if recover else {}
+    if index is not None:
+        options["index"] = index
+    builder = None
+    if output_format != "xml":  # XML is written while parsing, the rest from a tree
+        builder = options["emitter"] = TreeBuilder()
+        output_file, tree_output_file = None, output_file
+    if profiler is None:
+        tokenizer = JackTokenizer(input_file, tokenizer_mode)
+        try:
+            engine_class(tokenizer, output_file, **options).compile_class()
+        finally:
+            tokenizer.close()
+    else:
+        profiler.compile_class(engine_class, input_file, output_file,
+                               tokenizer_mode, **options)
+    if builder is not None:
+        WRITERS[output_format](builder.tree, tree_output_file)
 
 
 def analyze_file(
-        input_file: typing.TextIO, output_file: typing.TextIO) -> None:
+        input_file: typing.TextIO, output_file: typing.TextIO,
+        cache: typing.Optional[AnalysisCache] = None,
+        output_format: str = "xml", engine: str = "recursive",
+        recover: bool = False, profiler: typing.Optional[Profiler] = None,
+        tokenizer_mode: str = SINGLE_PASS_MODE,
+        index: typing.Optional[ProjectIndex] = None) -> None:
     """Analyzes a single file.
 
     Args:
         input_file (typing.TextIO): the file to analyze.
         output_file (typing.TextIO): writes all output to this file.
+        cache (AnalysisCache): if given, a file whose source was analyzed
+            before is not tokenized or parsed again.
+        output_format (str): one of WRITERS: a ParseTree serialization, or
+            optimized VM code. output_file is binary for BINARY_FORMATS,
+            which can not be cached.
+        engine (str): one of ENGINES, both produce the same output.
+        recover (bool): report every syntax error of the file at once, see
+            CompilationEngine.
+        profiler (Profiler): if given, collects timings of the parse.
+        tokenizer_mode (str): one of TOKENIZER_MODES, all produce the same
+            output. MMAP_MODE only maps input_file when there is no cache,
+            which has to read the source to key it.
+        index (ProjectIndex): if given, class names and subroutine calls
+            are resolved against it (recursive engine only). Cached outputs
+            would not be checked, so the CLI rejects an index with a cache.
+    """
+    if cache is None:
+        compile_file(input_file, output_file, output_format, engine, recover, profiler,
+                     tokenizer_mode, index)
+        return
+    source = input_file.read()
+    key = cache.key(source)
+    output = cache.get(key)
+    if output is None:
+        buffer = io.StringIO()
+        compile_file(io.StringIO(source), buffer, output_format, engine, recover, profiler,
+                     tokenizer_mode, index)
+        output = buffer.getvalue()
+        cache.put(key, output)
+    output_file.write(output)
+
+
+def analyze_path(input_path: str, output_path: str,
+                 cache_directory: typing.Optional[str] = None,
+                 cache_size: int = DEFAULT_MAX_BYTES,
+                 output_format: str = "xml",
+                 engine: str = "recursive",
+                 recover: bool = False,
+                 profiler: typing.Optional[Profiler] = None,
+                 tokenizer_mode: str = SINGLE_PASS_MODE,
+                 index: typing.Optional[ProjectIndex] = None,
+                 reference_directory: typing.Optional[str] = None) -> typing.Optional[str]:
+    """Opens input_path and output_path and analyzes the input into the
+    output. Runs in a worker process when analyzing with several jobs.
+    With a reference_directory nothing is written, the output is compared
+    with the file of the same name there, see open_output.
+
+    Returns:
+        typing.Optional[str]: None on success, otherwise the error message.
+    """
+    try:
+        cache = None
+        if cache_directory:
+            cache = open_cache(cache_directory, output_format, tokenizer_mode, cache_size)
+        output_mode = 'wb' if output_format in BINARY_FORMATS else 'w'
+        with open(input_path, 'r') as input_file, \
+                open_output(output_path, output_mode, reference_directory) as output_file:
+            analyze_file(input_file, output_file, cache, output_format, engine, recover, profiler,
+                         tokenizer_mode, index)
+    except (Exception, CompilationError) as error:
+        return error_message(error)
+    return None
+
+
+def open_output(output_path: str, mode: str = 'w',
+                reference_directory: typing.Optional[str] = None) -> typing.IO:
+    """Opens output_path for writing or, with a reference_directory, a
+    GoldenComparator which checks the XML written to it against the file
+    named like output_path in reference_directory.
+    """
+    if reference_directory is None:
+        return open(output_path, mode)
+    return GoldenComparator(os.path.join(reference_directory, os.path.basename(output_path)))
+
+
+def error_message(error: BaseException) -> str:
+    return f'{type(error).__name__}: {error}'
+
+
+def analyze_pipelined(input_paths: typing.List[str], output_paths: typing.List[str],
+                      queue_size: int = PIPELINE_QUEUE_SIZE,
+                      cache_directory: typing.Optional[str] = None,
+                      cache_size: int = DEFAULT_MAX_BYTES,
+                      output_format: str = "xml", **options) -> typing.List[typing.Optional[str]]:
+    """Analyzes the files like analyze_path does, in three stages: a reader
+    thread reads the next files while this thread analyzes, and a writer
+    thread writes the finished outputs. The stages are connected by queues
+    of queue_size files, so a slow stage holds the others back instead of
+    letting memory grow. The other options are passed on to analyze_file.
+
+    Returns:
+        typing.List[typing.Optional[str]]: like analyze_path, the error
+        message of every file, or None.
+    """
+    results: typing.List[typing.Optional[str]] = [None] * len(input_paths)
+    sources = queue.Queue(queue_size)
+    outputs = queue.Queue(queue_size)
+
+    def read_stage() -> None:
+        try:
+            for index, input_path in enumerate(input_paths):
+                try:
+                    with open(input_path, 'r') as input_file:
+                        sources.put((index, input_file.read()))
+                except Exception as error:  # e.g. a file which is not text
+                    sources.put((index, error))
+        finally:
+            sources.put(None)  # the analysis never waits on a dead reader
+
+    def write_stage() -> None:
+        for index, output in iter(outputs.get, None):
+            try:
+                with open(output_paths[index], 'w') as output_file:
+                    output_file.write(output)
+            except Exception as error:
+                results[index] = error_message(error)
+
+    stages = [threading.Thread(target=read_stage, daemon=True),
+              threading.Thread(target=write_stage, daemon=True)]
+    for stage in stages:
+        stage.start()
+    cache = None
+    if cache_directory:
+        cache = open_cache(cache_directory, output_format,
+                           options.get("tokenizer_mode", SINGLE_PASS_MODE), cache_size)
+    for index, source in iter(sources.get, None):
+        if isinstance(source, Exception):
+            results[index] = error_message(source)
+            continue
+        buffer = io.StringIO()
+        try:
+            analyze_file(io.StringIO(source), buffer, cache, output_format, **options)
+        except (Exception, CompilationError) as error:
+            results[index] = error_message(error)
+        outputs.put((index, buffer.getvalue()))  # partial output on errors, as analyze_path
+    outputs.put(None)
+    for stage in stages:
+        stage.join()
+    return results
+
+
+def files_to_analyze(argument_path: str) -> typing.List[str]:
+    """Returns the .jack files to analyze, sorted so that every run
+    handles (and reports) them in the same order.
+    """
+    if os.path.isdir(argument_path):
+        files = [os.path.join(argument_path, filename)
+                 for filename in sorted(os.listdir(argument_path))]
+    else:
+        files = [argument_path]
+    return [path for path in files
+            if os.path.splitext(path)[1].lower() == ".jack"]
+
+
+def output_path_for(input_path: str, output_format: str = "xml") -> str:
+    return os.path.splitext(input_path)[0] + OUTPUT_EXTENSIONS[output_format]
+
+
+def analyze_paths(input_paths: typing.List[str], jobs: int = 1, pipeline: bool = False,
+                  **options) -> typing.List[typing.Tuple[str, str]]:
+    """Analyzes every input path, on a pool of jobs processes if jobs > 1.
+    A failing file does not stop the others. The options are passed on to
+    analyze_path. A profiler can not be shared between processes, so
+    profiled files are always analyzed in this process. When analyzing in
+    this process, pipeline overlaps the file I/O with the analysis, see
+    analyze_pipelined.
+
+    Returns:
+        typing.List[typing.Tuple[str, str]]: (input path, error message) for
+        every file that failed, in input order.
+    """
+    output_format = options.get("output_format", "xml")
+    output_paths = [output_path_for(path, output_format) for path in input_paths]
+    analyze = partial(analyze_path, **options)
+    if jobs > 1 and len(input_paths) > 1 and not options.get("profiler"):
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(input_paths) // (jobs * 4))
+            results = list(executor.map(
+                analyze, input_paths, output_paths, chunksize=chunksize))
+    elif pipeline:
+        results = analyze_pipelined(input_paths, output_paths, **options)
+    else:
+        results = [analyze(input_path, output_path)
+                   for input_path, output_path in zip(input_paths, output_paths)]
+    return [(input_path, error)
+            for input_path, error in zip(input_paths, results) if error]
+
+
+def analyze_split(input_paths: typing.List[str],
+                  jobs: int) -> typing.List[typing.Tuple[str, str]]:
+    """Analyzes the files one after the other into XML, parsing the
+    subroutines of each on a pool of jobs processes, for classes too big
+    for one process. The output is the same as analyze_path's.
+
+    Returns:
+        typing.List[typing.Tuple[str, str]]: (input path, error message) for
+        every file that failed, in input order.
+    """
+    errors = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for input_path in input_paths:
+            try:
+                with open(input_path, 'r') as input_file:
+                    source = input_file.read()
+                with open(output_path_for(input_path), 'w') as output_file:
+                    compile_class_parallel(source, output_file, executor, jobs)
+            except (Exception, CompilationError) as error:
+                errors.append((input_path, error_message(error)))
+    return errors
+
+
+def analyze_program(input_paths: typing.List[str], report_file: typing.TextIO,
+                    root: str = DEFAULT_ROOT, prune_output: bool = False,
+                    output_format: str = "xml", engine: str = "recursive",
+                    tokenizer_mode: str = SINGLE_PASS_MODE) -> typing.List[typing.Tuple[str, str]]:
+    """Analyzes the input paths as one program: builds the call graph of
+    all the classes and writes the subroutines and classes that root can
+    not reach to report_file. With prune_output those are left out of the
+    outputs, and a class with nothing reachable gets no output at all.
+    Pruning is skipped when a file fails, as its calls are unknown.
+
+    Returns:
+        typing.List[typing.Tuple[str, str]]: (input path, error message) for
+        every file that failed, in input order.
+    """
+    trees, errors = {}, []
+    for input_path in input_paths:
+        try:
+            with open(input_path, 'r') as input_file:
+                tokenizer = JackTokenizer(input_file, tokenizer_mode)
+                try:
+                    trees[input_path] = parse_tree(tokenizer, ENGINES[engine])
+                finally:
+                    tokenizer.close()
+        except (Exception, CompilationError) as error:
+            errors.append((input_path, error_message(error)))
+    graph = CallGraph()
+    for tree in trees.values():
+        graph.add_class(tree)
+    if root not in graph:
+        raise Exception(f'{root} is not a subroutine of the program')
+    graph.report(root, report_file)
+    reachable = graph.reachable([root])
+    if errors:
+        prune_output = False
+    for input_path, tree in trees.items():
+        if prune_output:
+            tree = prune(tree, reachable)
+            if not any(type(child) is not int and child.kind == "subroutineDec"
+                       for child in tree.root.children):
+                continue
+        output_mode = 'wb' if output_format in BINARY_FORMATS else 'w'
+        with open(output_path_for(input_path, output_format), output_mode) as output_file:
+            WRITERS[output_format](tree, output_file)
+    return errors
+
+
+def rebuild_file(input_path: str, output_format: str = "xml", engine: str = "recursive",
+                 recover: bool = False, tokenizer_mode: str = SINGLE_PASS_MODE,
+                 index: typing.Optional[ProjectIndex] = None) -> typing.Set[str]:
+    """Analyzes input_path and replaces its output atomically. Unlike
+    analyze_path, a file that fails leaves its old output in place.
+
+    Returns:
+        typing.Set[str]: the identifiers of the file, which include every
+        class it refers to.
     """
-    # Your code goes here!
-    # It might be good to start by creating a new JackTokenizer and CompilationEngine:
-    # tokenizer = JackTokenizer(input_file)
-    # engine = CompilationEngine(tokenizer, output_file)
-    pass
+    options = {"recover": True} if recover else {}
+    if index is not None:
+        options["index"] = index
+    with open(input_path, 'r') as input_file:
+        tokenizer = JackTokenizer(input_file, tokenizer_mode)
+        try:
+            tree = parse_tree(tokenizer, ENGINES[engine], **options)
+        finally:
+            tokenizer.close()
+    output = io.BytesIO() if output_format in BINARY_FORMATS else io.StringIO()
+    WRITERS[output_format](tree, output)
+    write_atomically(output_path_for(input_path, output_format), output.getvalue())
+    return {token.text for token in tree.tokens if token.type == "IDENTIFIER"}
+
+
+def watch(directory: str, poll_interval: float = POLL_INTERVAL,
+          output_format: str = "xml", engine: str = "recursive", recover: bool = False,
+          tokenizer_mode: str = SINGLE_PASS_MODE,
+          index: typing.Optional[ProjectIndex] = None, index_path: typing.Optional[str] = None,
+          log_stream: typing.TextIO = sys.stdout) -> None:
+    """Analyzes the files of directory, then polls it every poll_interval
+    seconds and analyzes again the files that changed, and the files which
+    refer to the class of a changed or removed file. Every rebuild, and
+    every file failing in it, is logged to log_stream. Runs until
+    interrupted.
+
+    Args:
+        index (ProjectIndex): if given, updated before every rebuild and
+            saved to index_path.
+        The other options are rebuild_file's.
+    """
+    watcher = Watcher(directory)
+    references = ReferenceMap()
+    while True:
+        changed, removed = watcher.poll()
+        if changed or removed:
+            start = time.perf_counter()
+            if index is not None and index.update(directory):
+                index.save(index_path)
+            for input_path in removed:
+                references.remove(input_path)
+            dependents = references.dependents(
+                class_name_of(input_path) for input_path in changed + removed) - set(changed)
+            errors = []
+            for input_path in sorted(set(changed) | dependents):
+                try:
+                    references.set(input_path, rebuild_file(input_path, output_format, engine,
+                                                            recover, tokenizer_mode, index))
+                except (Exception, CompilationError) as error:
+                    errors.append((input_path, error_message(error)))
+            milliseconds = (time.perf_counter() - start) * 1000
+            total = len(changed) + len(dependents)
+            log_stream.write(f'{time.strftime("%H:%M:%S")} rebuilt {total - len(errors)} of '
+                             f'{total} files ({len(changed)} changed, {len(dependents)} dependent, '
+                             f'{len(removed)} removed, {len(errors)} failed) '
+                             f'in {milliseconds:.1f} ms\n')
+            log_stream.writelines(f'{input_path}: {error}\n' for input_path, error in errors)
+            log_stream.flush()
+        time.sleep(poll_interval)
+
+
+def error_report(errors: typing.List[typing.Tuple[str, str]], total: int) -> str:
+    lines = [f'{len(errors)} of {total} files failed:']
+    lines += [f'{input_path}: {error}' for input_path, error in errors]
+    return "\n".join(lines)
 
 
 if "__main__" == __name__:
     # Parses the input path and calls analyze_file on each input file.
-    # This opens both the input and the output files!
-    # Both are closed automatically when the code finishes running.
     # If the output file does not exist, it is created automatically in the
     # correct path, using the correct filename.
-    if not len(sys.argv) == 2:
-        sys.exit("Invalid usage, please use: JackAnalyzer <input path>")
-    argument_path = os.path.abspath(sys.argv[1])
-    if os.path.isdir(argument_path):
-        files_to_assemble = [
-            os.path.join(argument_path, filename)
-            for filename in os.listdir(argument_path)]
+    parser = argparse.ArgumentParser(prog="JackAnalyzer")
+    parser.add_argument("input_path")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes, 0 for one per core")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="skip files whose output is cached in DIR")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES,
+                        help="cache size cap in bytes")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="xml",
+                        help="output format, written next to each input file")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="recursive",
+                        help="recursive descent or table-driven LL(1) parser")
+    parser.add_argument("--tokenizer", choices=TOKENIZER_MODES, default=SINGLE_PASS_MODE,
+                        help="tokenizer implementation, mmap lexes the mapped file's bytes")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="read and write files on threads while analyzing, "
+                             "when analyzing in this process")
+    parser.add_argument("--index", metavar="FILE",
+                        help="resolve class names and calls against a project index "
+                             "kept up to date in FILE")
+    parser.add_argument("--call-graph", metavar="FILE", nargs="?", const="-",
+                        help="analyze the files as one program and report what the root "
+                             "can not reach, to FILE or to stdout")
+    parser.add_argument("--root", default=DEFAULT_ROOT,
+                        help="the entry point of the call graph, as Class.subroutine")
+    parser.add_argument("--prune", action="store_true",
+                        help="leave what the root can not reach out of the outputs")
+    parser.add_argument("--split-subroutines", action="store_true",
+                        help="parse the subroutines of each class on the --jobs workers, "
+                             "for very large classes")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep analyzing the files of the input directory as they "
+                             "change, and the files referring to them")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL,
+                        help="seconds between two checks for changes in --watch mode")
+    parser.add_argument("--compare", metavar="DIR",
+                        help="write nothing, compare the XML of each file with the file "
+                             "of the same name in DIR and report the first difference")
+    parser.add_argument("--recover", action="store_true",
+                        help="report all syntax errors of each file, not only the first")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write per-phase and per-rule timings to FILE, "
+                             "analyzing in this process")
+    parser.add_argument("--profile-format", choices=["json", "collapsed"],
+                        help="defaults to json for a .json FILE, else to collapsed stacks")
+    args = parser.parse_args()
+    if args.recover and args.engine != "recursive":
+        parser.error("--recover is only supported by the recursive engine")
+    if args.index and args.engine != "recursive":
+        parser.error("--index is only supported by the recursive engine")
+    if args.index and args.cache:
+        parser.error("--index does not support --cache, cached outputs are not resolved "
+                     "against the index")
+    if args.format in BINARY_FORMATS and (args.cache or args.pipeline):
+        parser.error(f'--format {args.format} does not support --cache or --pipeline')
+    if args.prune and not args.call_graph:
+        parser.error("--prune needs --call-graph")
+    if args.call_graph and (args.recover or args.index or args.profile):
+        parser.error("--call-graph does not support --recover, --index or --profile")
+    if args.split_subroutines and (args.format != "xml" or args.engine != "recursive"
+                                   or args.recover or args.index or args.profile or args.cache
+                                   or args.pipeline or args.call_graph):
+        parser.error("--split-subroutines only supports XML output of the recursive engine, "
+                     "without other options")
+    if args.watch and not os.path.isdir(args.input_path):
+        parser.error("--watch needs a directory")
+    if args.watch and (args.cache or args.pipeline or args.profile or args.call_graph
+                       or args.split_subroutines):
+        parser.error("--watch does not support --cache, --pipeline, --profile, --call-graph "
+                     "or --split-subroutines")
+    if args.compare and (args.format != "xml" or args.pipeline or args.watch or args.call_graph
+                         or args.split_subroutines):
+        parser.error("--compare only supports XML output, without --pipeline, --watch, "
+                     "--call-graph or --split-subroutines")
+    if args.compare and not os.path.isdir(args.compare):
+        parser.error(f'--compare: {args.compare} is not a directory')
+    jobs = args.jobs or os.cpu_count() or 1
+    profiler = Profiler() if args.profile else None
+    input_paths = files_to_analyze(os.path.abspath(args.input_path))
+    index = None
+    if args.index:
+        index = ProjectIndex.load(args.index)
+        for directory in sorted({os.path.dirname(path) for path in input_paths}):
+            index.update(directory)
+        index.save(args.index)
+    if args.watch:
+        try:
+            watch(os.path.abspath(args.input_path), args.poll_interval, args.format, args.engine,
+                  args.recover, args.tokenizer, index, args.index)
+        except KeyboardInterrupt:
+            sys.exit(0)
+    if args.split_subroutines:
+        errors = analyze_split(input_paths, jobs)
+    elif args.call_graph:
+        report_file = sys.stdout if args.call_graph == "-" else open(args.call_graph, 'w')
+        try:
+            errors = analyze_program(input_paths, report_file, args.root, args.prune,
+                                     args.format, args.engine, args.tokenizer)
+        except Exception as error:
+            sys.exit(error_message(error))
+        finally:
+            if report_file is not sys.stdout:
+                report_file.close()
+    elif args.compare:
+        errors = analyze_paths(input_paths, jobs, cache_directory=args.cache,
+                               cache_size=args.cache_size, engine=args.engine,
+                               recover=args.recover, profiler=profiler,
+                               tokenizer_mode=args.tokenizer, index=index,
+                               reference_directory=args.compare)
     else:
-        files_to_assemble = [argument_path]
-    for input_path in files_to_assemble:
-        filename, extension = os.path.splitext(input_path)
-        if extension.lower() != ".jack":
-            continue
-        output_path = filename + ".xml"
-        with open(input_path, 'r') as input_file, \
-                open(output_path, 'w') as output_file:
-            pass
-        analyze_file(input_file, output_file)
+        errors = analyze_paths(input_paths, jobs, args.pipeline, cache_directory=args.cache,
+                               cache_size=args.cache_size, output_format=args.format,
+                               engine=args.engine, recover=args.recover, profiler=profiler,
+                               tokenizer_mode=args.tokenizer, index=index)
+    if profiler:
+        profile_format = args.profile_format or \
+            ("json" if args.profile.endswith(".json") else "collapsed")
+        with open(args.profile, 'w') as profile_file:
+            if profile_format == "json":
+                profiler.write_json(profile_file)
+            else:
+                profiler.write_collapsed(profile_file)
+    if errors:
+        sys.exit(error_report(errors, len(input_paths)))
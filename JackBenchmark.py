@@ -0,0 +1,308 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+from CompilationEngine import CompilationEngine
+from JackAnalyzer import analyze_paths, files_to_analyze
+from JackTokenizer import JackTokenizer, LEGACY_MODE, MMAP_MODE, SINGLE_PASS_MODE, STREAMING_MODE
+from TableDrivenEngine import TableDrivenEngine
+
+# corpus sizes: (files, subroutines per class, statements per subroutine,
+# expression nesting depth, lines per comment block)
+SIZES = {
+    "small": (4, 10, 20, 6, 4),
+    "medium": (8, 40, 60, 12, 10),
+    "large": (8, 100, 120, 24, 20),
+}
+BINARY_OPS = ["+", "-", "*", "/", "&", "|", "<", ">", "="]
+UNARY_OPS = ["-", "~", "^", "#"]
+TINY_CLASS = "class Tiny { function void main() { return; } }\n"
+
+
+class CorpusGenerator:
+    """Generates valid Jack classes of controlled size. The same seed always
+    generates the same corpus, so benchmark runs are comparable.
+    """
+
+    def __init__(self, seed: int = 0, subroutines: int = 10, statements: int = 20,
+                 depth: int = 6, comment_lines: int = 4) -> None:
+        self.random = random.Random(seed)
+        self.subroutines = subroutines
+        self.statements = statements
+        self.depth = depth
+        self.comment_lines = comment_lines
+
+    def comment(self, indent: str) -> typing.List[str]:
+        words = ["the", "value", "of", "each", "field", "is", "kept", "in", "range"]
+        lines = [indent + "/**"]
+        lines += [indent + " * " + " ".join(self.random.choices(words, k=8))
+                  for _ in range(self.comment_lines)]
+        return lines + [indent + " */"]
+
+    def expression(self, depth: int) -> str:
+        """An expression nested depth levels deep. Only one term per level
+        is nested, so the size grows linearly with depth.
+        """
+        count = self.random.randint(1, 3)
+        nested = self.random.randrange(count) if depth > 0 else -1
+        terms = []
+        for position in range(count):
+            choice = self.random.random()
+            if position == nested:
+                inner = self.expression(depth - 1)
+                if choice < 0.4:
+                    term = f'({inner})'
+                elif choice < 0.6:
+                    term = self.random.choice(UNARY_OPS) + f'({inner})'
+                elif choice < 0.8:
+                    term = f'a[{inner}]'
+                else:
+                    term = f'Math.max({inner}, x)'
+            elif choice < 0.5:
+                term = str(self.random.randint(0, 32767))
+            else:
+                term = self.random.choice(["x", "y", "i", "this", "true", "null"])
+            terms.append(term)
+        return f' {self.random.choice(BINARY_OPS)} '.join(terms)
+
+    def statements_block(self, count: int, indent: str, nesting: int) -> typing.List[str]:
+        lines = []
+        for _ in range(count):
+            choice = self.random.random()
+            depth = self.random.randint(0, self.depth)
+            if nesting < 3 and choice < 0.1:
+                lines.append(f'{indent}if ({self.expression(1)}) {{')
+                lines += self.statements_block(3, indent + "    ", nesting + 1)
+                lines.append(indent + "} else {")
+                lines += self.statements_block(2, indent + "    ", nesting + 1)
+                lines.append(indent + "}")
+            elif nesting < 3 and choice < 0.2:
+                lines.append(f'{indent}while (i < {self.random.randint(1, 100)}) {{')
+                lines += self.statements_block(3, indent + "    ", nesting + 1)
+                lines.append(indent + "}")
+            elif choice < 0.35:
+                lines.append(f'{indent}do Output.printString("line {self.random.randint(0, 99)}");')
+            elif choice < 0.4:
+                lines.append(indent + "// keep going")
+            else:
+                lines.append(f'{indent}let x = {self.expression(depth)};')
+        return lines
+
+    def generate_class(self, name: str) -> str:
+        lines = self.comment("")
+        lines.append(f'class {name} {{')
+        lines.append("    field int x, y;")
+        lines.append("    static Array a;")
+        for index in range(self.subroutines):
+            lines += self.comment("    ")
+            lines.append(f'    method int run{index}(int i, boolean flag) {{')
+            lines.append("        var int z;")
+            lines += self.statements_block(self.statements, " " * 8, 0)
+            lines.append("        return x;")
+            lines.append("    }")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+def best_time(run: typing.Callable[[], typing.Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(run: typing.Callable[[], typing.Any]) -> int:
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(run: typing.Callable[[], typing.Any], first: typing.Callable[[], typing.Any],
+            tokens: int, lines: int, repeat: int) -> dict:
+    """Throughput, peak memory and startup (time until the first output) of
+    one benchmark.
+    """
+    seconds = best_time(run, repeat)
+    return {
+        "seconds": seconds,
+        "tokens_per_second": tokens / seconds,
+        "lines_per_second": lines / seconds,
+        "peak_memory_bytes": peak_memory(run),
+        "startup_seconds": best_time(first, repeat),
+    }
+
+
+def tokenizer_benchmark(path: str, mode: str, tokens: int, lines: int, repeat: int) -> dict:
+    """Tokenizes the file at path, which MMAP_MODE maps, opened in binary
+    mode, and the other modes read.
+    """
+    file_mode = 'rb' if mode == MMAP_MODE else 'r'
+
+    def run():
+        with open(path, file_mode) as input_file:
+            tokenizer = JackTokenizer(input_file, mode)
+            for _ in tokenizer.token_generator():
+                pass
+            tokenizer.close()
+
+    def first():
+        with open(path, file_mode) as input_file:
+            tokenizer = JackTokenizer(input_file, mode)
+            generator = tokenizer.token_generator()
+            next(generator)
+            generator.close()
+            tokenizer.close()
+    return measure(run, first, tokens, lines, repeat)
+
+
+def engine_benchmark(source: str, engine_class, tokens: int, lines: int, repeat: int) -> dict:
+    def run():
+        engine_class(io.StringIO(source), io.StringIO()).compile_class()
+
+    class FirstWrite(io.StringIO):
+        def write(self, text):
+            raise StopIteration  # the first bulk write ends the run
+
+    def first():
+        try:
+            engine_class(io.StringIO(source), FirstWrite()).compile_class()
+        except StopIteration:
+            pass
+    return measure(run, first, tokens, lines, repeat)
+
+
+def pipeline_benchmark(directory: str, tokens: int, lines: int, repeat: int) -> dict:
+    input_paths = files_to_analyze(directory)
+
+    def run():
+        errors = analyze_paths(input_paths)
+        if errors:
+            raise RuntimeError(errors)
+
+    analyzer = os.path.join(os.path.dirname(os.path.abspath(__file__)), "JackAnalyzer.py")
+    with tempfile.TemporaryDirectory() as tiny_directory:
+        tiny_path = os.path.join(tiny_directory, "Tiny.jack")
+        with open(tiny_path, 'w') as tiny:
+            tiny.write(TINY_CLASS)
+
+        def first():  # a cold process analyzing a tiny file
+            subprocess.run([sys.executable, analyzer, tiny_path], check=True)
+        return measure(run, first, tokens, lines, repeat)
+
+
+def generate_corpus(size: str = "small", seed: int = 0) -> typing.List[str]:
+    """The sources of the corpus, class BenchN in the N-th source."""
+    files, subroutines, statements, depth, comment_lines = SIZES[size]
+    generator = CorpusGenerator(seed, subroutines, statements, depth, comment_lines)
+    return [generator.generate_class(f'Bench{index}') for index in range(files)]
+
+
+def write_corpus(directory: str, sources: typing.List[str]) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for index, source in enumerate(sources):
+        with open(os.path.join(directory, f'Bench{index}.jack'), 'w') as output:
+            output.write(source)
+
+
+def run_benchmarks(size: str = "small", seed: int = 0, repeat: int = 3) -> dict:
+    sources = generate_corpus(size, seed)
+    source = sources[0]  # the single-file benchmarks use the first class
+    tokens = sum(1 for token in JackTokenizer(io.StringIO(source)).token_generator() if token)
+    lines = source.count("\n")
+    results = {
+        "metadata": {
+            "size": size, "seed": seed, "repeat": repeat,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "tokens": tokens, "lines": lines, "files": len(sources),
+        },
+        "benchmarks": {},
+    }
+    benchmarks = results["benchmarks"]
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(directory, sources)
+        path = os.path.join(directory, "Bench0.jack")
+        for mode in [SINGLE_PASS_MODE, STREAMING_MODE, LEGACY_MODE, MMAP_MODE]:
+            benchmarks[f'tokenizer.{mode}'] = tokenizer_benchmark(path, mode, tokens, lines, repeat)
+        for engine_class in [CompilationEngine, TableDrivenEngine]:
+            benchmarks[f'engine.{engine_class.__name__}'] = engine_benchmark(
+                source, engine_class, tokens, lines, repeat)
+        all_tokens = sum(1 for class_source in sources for token in
+                         JackTokenizer(io.StringIO(class_source)).token_generator() if token)
+        all_lines = sum(class_source.count("\n") for class_source in sources)
+        benchmarks["pipeline.JackAnalyzer"] = pipeline_benchmark(
+            directory, all_tokens, all_lines, repeat)
+    return results
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> typing.List[str]:
+    """The benchmarks whose throughput dropped by more than tolerance (a
+    fraction) compared to baseline.
+    """
+    found = []
+    for name, result in results["benchmarks"].items():
+        old = baseline["benchmarks"].get(name)
+        if not old:
+            continue
+        ratio = result["tokens_per_second"] / old["tokens_per_second"]
+        if ratio < 1 - tolerance:
+            found.append(f'{name}: {ratio:.2f}x of baseline throughput')
+    return found
+
+
+def report(results: dict) -> str:
+    lines = [f'{"benchmark":<32}{"tokens/s":>12}{"lines/s":>12}{"peak KiB":>12}{"startup ms":>12}']
+    for name, result in results["benchmarks"].items():
+        lines.append(f'{name:<32}{result["tokens_per_second"]:>12.0f}'
+                     f'{result["lines_per_second"]:>12.0f}'
+                     f'{result["peak_memory_bytes"] / 1024:>12.0f}'
+                     f'{result["startup_seconds"] * 1000:>12.1f}')
+    return "\n".join(lines)
+
+
+if "__main__" == __name__:
+    parser = argparse.ArgumentParser(prog="JackBenchmark")
+    parser.add_argument("--size", choices=list(SIZES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", metavar="FILE", help="save the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE",
+                        help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed throughput drop against the baseline")
+    parser.add_argument("--write-corpus", metavar="DIR",
+                        help="only write the generated corpus to DIR")
+    args = parser.parse_args()
+    if args.write_corpus:
+        write_corpus(args.write_corpus, generate_corpus(args.size, args.seed))
+        sys.exit()
+    results = run_benchmarks(args.size, args.seed, args.repeat)
+    print(report(results))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r') as baseline_file:
+            found = regressions(results, json.load(baseline_file), args.tolerance)
+        if found:
+            sys.exit("performance regressions:\n" + "\n".join(found))
@@ -4,14 +4,19 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import io
+import mmap
 import typing
 import re
+from array import array
+from bisect import bisect_right
 
 END_COMMENT = ['//']
 COMMENT = ['/', '/']
 DOCUMENTATION = ['/', '*/']
-CLOSED_COMMENT_REGEX = r'\/\/?\*.*\*\/'
-OPEN_COMMENT_REGEX = r'\/\/.*'
+# comments, and strings which may hold what looks like one: kept as they are
+LEGACY_COMMENT_REGEX = re.compile(r'("[^"\n]*")|/\*.*?(?:\*/|\Z)|//[^\n]*', re.DOTALL)
+BLANKED_REGEX = re.compile(r'[^\n]')  # what comment_cleaner turns into spaces
 ALL_COMMENTS = set(END_COMMENT+COMMENT+DOCUMENTATION)
 
 
@@ -35,16 +40,66 @@ OBJECTIVE_REFERENCE = ['this']
 
 KEYWORD = set(PROGRAM_COMPONENTS+PRIMITIVE_TYPES+VARIABLE_DECLARATIONS+STATEMENTS+CONSTANT_VALUES+OBJECTIVE_REFERENCE)
 
-CLASS_NAMES = []
-FUNCTION_NAMES = []
-REGEX = r'"?\w+"?|\/\/|\\/|\/\+|-|\\/|&|\||~|<|>|\(|\)|\[|\]|\{|}|,|;|=|\.|\+|-|\|\/|&|\||~|<|>|\^|#'
-
-
+REGEX = r'"[^"\n]*"|"?\w+"?|\/\/|\\/|\/\+|-|\\/|&|\||~|<|>|\(|\)|\[|\]|\{|}|,|;|=|\.|\+|-|\|\/|&|\||~|<|>|\^|#|\*|\/'
+
+# single pass lexer: one precompiled pattern that classifies every token and
+# skips comments. Whitespace and unknown characters are never matched, so
+# finditer steps over them exactly like re.findall(REGEX) does per line.
+MASTER_REGEX = re.compile(r'''
+    (?P<COMMENT>/\*.*?(?:\*/|\Z)|//[^\n]*)
+  | (?P<WORD>[A-Za-z_]\w*)
+  | (?P<SYMBOL>[{}()\[\].,;=+\-*/&|~<>^#])
+  | (?P<INT_CONST>\d+)(?!\w)
+  | (?P<STRING_CONST>"[^"\n]*")
+  | (?P<DIGIT_WORD>\w+)
+''', re.VERBOSE | re.DOTALL)
+
+SYMBOL_VALUES = {symbol: symbol for symbol in SYMBOLS}
+SYMBOL_VALUES.update({'<': '&lt', '>': '&gt', '&': '&amp'})
+KEYWORD_VALUES = {keyword: keyword.upper() for keyword in KEYWORD}
+
+# streaming lexer: same pattern, plus a group for a string constant that is
+# still open when the chunk ends, so it can be completed with the next chunk
+# instead of being split.
+STREAM_REGEX = re.compile(MASTER_REGEX.pattern.replace(
+    '(?P<WORD>', '''(?P<PARTIAL>"[^"\\n]*\\Z)
+  | (?P<WORD>''', 1), re.VERBOSE | re.DOTALL)
+STREAM_CHUNK_SIZE = 1 << 16
+NEWLINE_REGEX = re.compile(r'\n')
+NEWLINE_BYTES_REGEX = re.compile(rb'\n')
+
+# compact token type codes, used where a full type string per token is too
+# expensive (TokenStream stores them in a byte array)
+TOKEN_TYPES = ("KEYWORD", "SYMBOL", "IDENTIFIER", "INT_CONST", "STRING_CONST")
+TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+# bytes lexer for memory-mapped files: the same pattern with the keywords in
+# a group of their own, so a token is classified without copying its bytes.
+# Spans are only sliced and decoded when their value is asked for.
+MASTER_BYTES_REGEX = re.compile(MASTER_REGEX.pattern.replace(
+    '(?P<WORD>', '(?P<KEYWORD>(?:' + '|'.join(sorted(KEYWORD)) + r''')(?!\w))
+  | (?P<WORD>''', 1).encode(), re.VERBOSE | re.DOTALL)
+BYTES_GROUP_CODES = {"KEYWORD": TYPE_CODES["KEYWORD"], "SYMBOL": TYPE_CODES["SYMBOL"],
+                     "WORD": TYPE_CODES["IDENTIFIER"], "DIGIT_WORD": TYPE_CODES["IDENTIFIER"],
+                     "INT_CONST": TYPE_CODES["INT_CONST"],
+                     "STRING_CONST": TYPE_CODES["STRING_CONST"], "COMMENT": None}
+KEYWORD_BYTES_VALUES = {keyword.encode(): value for keyword, value in KEYWORD_VALUES.items()}
+SYMBOL_BYTE_VALUES = {ord(symbol): value for symbol, value in SYMBOL_VALUES.items()}
+
+LEGACY_MODE = "legacy"
+SINGLE_PASS_MODE = "single_pass"
+STREAMING_MODE = "streaming"
+MMAP_MODE = "mmap"
+
+
+
+
+LEGACY_REGEX = re.compile(REGEX)
 
 
 def regex_maker(cur_line: str):
-    return re.findall(REGEX, cur_line)
-
+    """The token texts of a line, each with its column."""
+    return [(match.group(), match.start()) for match in LEGACY_REGEX.finditer(cur_line)]
 
 
 class JackTokenizer:
@@ -131,32 +186,224 @@ class JackTokenizer:
     Note that ^, # correspond to shiftleft and shiftright, respectively.
     """
 
-    def __init__(self, input_stream: typing.TextIO) -> None:
+    def __init__(self, input_stream: typing.TextIO, mode: str = SINGLE_PASS_MODE,
+                 chunk_size: int = STREAM_CHUNK_SIZE) -> None:
         """Opens the input stream and gets ready to tokenize it.
 
         Args:
             input_stream (typing.TextIO): input stream.
+            mode (str): SINGLE_PASS_MODE scans the whole file once with
+                MASTER_REGEX, LEGACY_MODE blanks comments out and lexes line by
+                line, STREAMING_MODE reads the stream in chunk_size blocks
+                and never holds more than a block (plus one open token) in
+                memory, MMAP_MODE maps the file and lexes its bytes in place.
+                All modes produce the same tokens.
+            chunk_size (int): block size used by STREAMING_MODE.
         """
-        # Your code goes here!
-        # A good place to start is to read all the lines of the input:
-        #
         self.cur_token = None
         self.cur_line = None
+        self.line_offset = 0  # of cur_line in the source, in LEGACY_MODE
+        self.mode = mode
+        self.lines: typing.Optional[LineIndex] = None
+        if mode == STREAMING_MODE:
+            self.input_stream = input_stream
+            self.chunk_size = chunk_size
+            return
+        if mode == MMAP_MODE:
+            self.buffer = self.map_input(input_stream)
+            return
         file = input_stream.read()
-        comment_clean_input = self.comment_cleaner(file)
-        self.input_lines = [line for line in comment_clean_input.splitlines() if line != '']
-        pass
+        if mode == LEGACY_MODE:
+            self.source = self.comment_cleaner(file)
+        elif mode == SINGLE_PASS_MODE:
+            self.source = file
+        else:
+            raise ValueError(f'Unknown tokenizer mode {mode}')
+
+    @staticmethod
+    def map_input(input_stream: typing.TextIO) -> typing.Union[mmap.mmap, bytes]:
+        """Maps the file behind input_stream read-only, its pages are shared
+        through the OS page cache instead of being copied into a str. Streams
+        without a file, and empty files (which can not be mapped), are read.
+        """
+        try:
+            return mmap.mmap(input_stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, io.UnsupportedOperation, ValueError, OSError):
+            return input_stream.read().encode()
+
+    def close(self) -> None:
+        """Unmaps the file of MMAP_MODE, does nothing in the other modes."""
+        if self.mode == MMAP_MODE and isinstance(self.buffer, mmap.mmap):
+            try:
+                self.buffer.close()
+            except BufferError:  # a generator stopped by an error still scans it
+                pass  # unmapped when the generator is collected
 
     def comment_cleaner(self, input_stream):
-        comment_clean_input = re.sub(CLOSED_COMMENT_REGEX, '', input_stream, flags=re.DOTALL)
-        comment_clean_input = re.sub(OPEN_COMMENT_REGEX, '', comment_clean_input)
-        return comment_clean_input
+        """Blanks the comments out, keeping their line breaks, so that every
+        token stays at its offset in the source.
+        """
+        return LEGACY_COMMENT_REGEX.sub(
+            lambda match: match.group(1) or BLANKED_REGEX.sub(' ', match.group()), input_stream)
 
     def token_generator(self):
-        for cur_line in self.input_lines:
+        if self.mode == SINGLE_PASS_MODE:
+            return self.single_pass_generator()
+        if self.mode == STREAMING_MODE:
+            return self.streaming_generator()
+        if self.mode == MMAP_MODE:
+            return self.mmap_generator()
+        return self.legacy_generator()
+
+    @property
+    def line_index(self) -> typing.Optional["LineIndex"]:
+        """The LineIndex that Token.offset refers to. SINGLE_PASS_MODE,
+        LEGACY_MODE and MMAP_MODE build it from the source the first time it
+        is asked for, STREAMING_MODE as it reads, since it does not keep the
+        source.
+        """
+        if self.mode in (SINGLE_PASS_MODE, LEGACY_MODE):
+            if self.lines is None:
+                self.lines = LineIndex.of(self.source)
+        elif self.mode == MMAP_MODE:
+            if self.lines is None:
+                self.lines = LineIndex.of(self.buffer)
+        return self.lines
+
+    def span_generator(self) -> typing.Iterator[typing.Tuple[int, int, int]]:
+        """MMAP_MODE only: yields (type code, start, end) of every token as
+        byte offsets into the mapped file. Nothing is copied or decoded, use
+        value() for the spans whose value is needed.
+        """
+        codes = BYTES_GROUP_CODES
+        for match in MASTER_BYTES_REGEX.finditer(self.buffer):
+            code = codes[match.lastgroup]
+            if code is not None:
+                start, end = match.span()
+                yield code, start, end
+
+    def value(self, code: int, start: int, end: int) -> typing.Any:
+        """The value of a span_generator() span, as Token.text holds it."""
+        token_type = TOKEN_TYPES[code]
+        if token_type == "SYMBOL":
+            return SYMBOL_BYTE_VALUES[self.buffer[start]]
+        if token_type == "KEYWORD":
+            return KEYWORD_BYTES_VALUES[self.buffer[start:end]]
+        if token_type == "INT_CONST":
+            return int(self.buffer[start:end])
+        if token_type == "STRING_CONST":
+            return self.buffer[start + 1:end - 1].decode()
+        return self.buffer[start:end].decode()
+
+    def mmap_generator(self):
+        buffer = self.buffer
+        keyword_values = KEYWORD_BYTES_VALUES
+        symbol_values = SYMBOL_BYTE_VALUES
+        for match in MASTER_BYTES_REGEX.finditer(buffer):
+            kind = match.lastgroup
+            if kind == "WORD" or kind == "DIGIT_WORD":
+                yield Token(buffer[match.start():match.end()].decode(), "IDENTIFIER", match.start())
+            elif kind == "SYMBOL":
+                yield Token(symbol_values[buffer[match.start()]], "SYMBOL", match.start())
+            elif kind == "KEYWORD":
+                yield Token(keyword_values[buffer[match.start():match.end()]], "KEYWORD",
+                            match.start())
+            elif kind == "INT_CONST":
+                yield Token(int(buffer[match.start():match.end()]), "INT_CONST", match.start())
+            elif kind == "STRING_CONST":
+                yield Token(buffer[match.start() + 1:match.end() - 1].decode(), "STRING_CONST",
+                            match.start())
+        yield None
+
+    def single_pass_generator(self):
+        keyword_values = KEYWORD_VALUES
+        symbol_values = SYMBOL_VALUES
+        for match in MASTER_REGEX.finditer(self.source):
+            kind = match.lastgroup
+            if kind == "WORD":
+                text = match.group()
+                if text in keyword_values:
+                    yield Token(keyword_values[text], "KEYWORD", match.start())
+                else:
+                    yield Token(text, "IDENTIFIER", match.start())
+            elif kind == "SYMBOL":
+                yield Token(symbol_values[match.group()], "SYMBOL", match.start())
+            elif kind == "INT_CONST":
+                yield Token(int(match.group()), "INT_CONST", match.start())
+            elif kind == "STRING_CONST":
+                yield Token(match.group()[1:-1], "STRING_CONST", match.start())
+            elif kind == "DIGIT_WORD":  # e.g. 3abc, which token_type() calls an identifier
+                yield Token(match.group(), "IDENTIFIER", match.start())
+        yield None
+
+    def streaming_generator(self):
+        keyword_values = KEYWORD_VALUES
+        symbol_values = SYMBOL_VALUES
+        read = self.input_stream.read
+        self.lines = lines = LineIndex()
+        buffer = ""
+        base = 0  # source offset of buffer[0]
+        skip_until = None  # terminator of a comment that outgrew its chunk
+        eof = False
+        while not eof:
+            chunk = read(self.chunk_size)
+            eof = not chunk
+            lines.extend(base + len(buffer), chunk)
+            buffer += chunk
+            if skip_until:
+                end = buffer.find(skip_until)
+                if end == -1:
+                    if not eof:
+                        base += max(len(buffer) - 1, 0)
+                        buffer = buffer[-1:]  # may hold the '*' of '*/'
+                        continue
+                    base += len(buffer)
+                    buffer = ""
+                else:
+                    base += end + len(skip_until)
+                    buffer = buffer[end + len(skip_until):]
+                skip_until = None
+            pattern = MASTER_REGEX if eof else STREAM_REGEX
+            limit = len(buffer)
+            rest = limit
+            for match in pattern.finditer(buffer):
+                kind = match.lastgroup
+                if not eof and (kind == "PARTIAL" or match.end() == limit):
+                    rest = match.start()
+                    if kind == "COMMENT":
+                        text = match.group()
+                        if text[1] == '/':
+                            skip_until = '\n'
+                            rest = limit
+                        elif len(text) < 4 or not text.endswith('*/'):
+                            skip_until = '*/'
+                            rest = max(limit - 1, rest + 2)
+                    break
+                if kind == "WORD":
+                    text = match.group()
+                    if text in keyword_values:
+                        yield Token(keyword_values[text], "KEYWORD", base + match.start())
+                    else:
+                        yield Token(text, "IDENTIFIER", base + match.start())
+                elif kind == "SYMBOL":
+                    yield Token(symbol_values[match.group()], "SYMBOL", base + match.start())
+                elif kind == "INT_CONST":
+                    yield Token(int(match.group()), "INT_CONST", base + match.start())
+                elif kind == "STRING_CONST":
+                    yield Token(match.group()[1:-1], "STRING_CONST", base + match.start())
+                elif kind == "DIGIT_WORD":
+                    yield Token(match.group(), "IDENTIFIER", base + match.start())
+            base += rest
+            buffer = buffer[rest:]
+        yield None
+
+    def legacy_generator(self):
+        self.line_offset = 0
+        for cur_line in self.source.splitlines(keepends=True):
             self.cur_line = regex_maker(cur_line)
             while self.has_more_tokens():
                 yield self.advance()
+            self.line_offset += len(cur_line)
         yield None
 
     def process_token(self, cur_token_text, token_type):
@@ -186,13 +433,13 @@ class JackTokenizer:
         This method should be called if has_more_tokens() is true. 
         Initially there is no current token.
         """
-        cur_token_text = ""
+        cur_token_text, column = "", 0
         while cur_token_text == "" and self.cur_line:
-            cur_token_text = self.cur_line.pop(0)
+            cur_token_text, column = self.cur_line.pop(0)
         if cur_token_text != "":
             token_type = self.token_type(cur_token_text)
             cur_token_text = self.process_token(cur_token_text, token_type)
-            return Token(cur_token_text, token_type)
+            return Token(cur_token_text, token_type, self.line_offset + column)
 
     def token_type(self, token_text) -> str:
         """
@@ -204,7 +451,7 @@ class JackTokenizer:
             return "SYMBOL"
         elif token_text in KEYWORD:
             return "KEYWORD"
-        elif token_text == '"' and token_text == '"':
+        elif token_text[0] == '"' and token_text[-1] == '"':
             return "STRING_CONST"
         else:
             try:
@@ -278,9 +525,16 @@ class JackTokenizer:
 
 
 class Token:
-    def __init__(self, text: str, token_type: str) -> None:
+    """A token of the source. offset is where it starts in the source (in
+    bytes in MMAP_MODE, otherwise in characters), or None when unknown; see
+    LineIndex for its line and column.
+    """
+    __slots__ = ('text', 'type', 'offset')
+
+    def __init__(self, text: str, token_type: str, offset: typing.Optional[int] = None) -> None:
         self.text = text
         self.type = token_type
+        self.offset = offset
 
     def set_type(self, token_type):
         self.type = token_type
@@ -289,4 +543,49 @@ class Token:
         self.text = text
 
     def token_string(self) -> str:
-        return f'<{self.type}> {self.text} </{self.type}>\n'
\ No newline at end of file
+        return f'<{self.type}> {self.text} </{self.type}>\n'
+
+
+class LineIndex:
+    """The offsets at which the lines of a source start, 4 bytes per line.
+    The line and column of a source offset are found by bisecting them, so
+    tokens only need to carry their offset.
+    """
+    __slots__ = ('starts',)
+
+    def __init__(self) -> None:
+        self.starts = array('I', [0])
+
+    @classmethod
+    def of(cls, source: typing.Union[str, bytes, mmap.mmap]) -> "LineIndex":
+        """Indexes a complete source, a str or the bytes of a file."""
+        index = cls()
+        index.extend(0, source)
+        return index
+
+    def extend(self, offset: int, text: typing.Union[str, bytes, mmap.mmap]) -> None:
+        """Adds the lines starting in text, the part of the source at offset."""
+        newline = NEWLINE_REGEX if isinstance(text, str) else NEWLINE_BYTES_REGEX
+        self.starts.extend(offset + match.end() for match in newline.finditer(text))
+
+    def location(self, offset: int) -> typing.Tuple[int, int]:
+        """The 1-based line and column of offset."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+
+def location_of(token_source, token: typing.Optional[Token]) -> typing.Optional[typing.Tuple[int, int]]:
+    """The line and column of a token of token_source (a JackTokenizer or
+    any source with a line_index), or None when they are not known.
+    """
+    line_index = getattr(token_source, "line_index", None)
+    if token is None or token.offset is None or line_index is None:
+        return None
+    return line_index.location(token.offset)
+
+
+def located(message: str, location: typing.Optional[typing.Tuple[int, int]]) -> str:
+    """Prefixes an error message with its line and column, if known."""
+    if location is None:
+        return message
+    return f'line {location[0]}, column {location[1]}: {message}'
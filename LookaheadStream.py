@@ -0,0 +1,58 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from JackTokenizer import Token
+
+DEFAULT_LOOKAHEAD = 16  # a power of two
+
+
+class LookaheadStream:
+    """A token generator with lookahead: peek(k) is the token k places
+    after the current one, read ahead into a fixed ring buffer of size
+    tokens. Past the end of the generator every token is None.
+    """
+
+    def __init__(self, generator: typing.Iterator[typing.Optional[Token]],
+                 size: int = DEFAULT_LOOKAHEAD) -> None:
+        if size & (size - 1):
+            raise Exception(f'Lookahead size {size} is not a power of two')
+        self.generator = generator
+        self.buffer: typing.List[typing.Optional[Token]] = [None] * size
+        self.mask = size - 1
+        self.position = 0  # number of tokens advanced over
+        self.filled = 0  # number of tokens read from the generator
+        self.fill(0)
+
+    def fill(self, k: int) -> None:
+        """Reads ahead until the token at position + k is buffered, and on
+        into the free rest of the buffer so that fill runs once per buffer.
+        """
+        buffer, mask, generator = self.buffer, self.mask, self.generator
+        if k > mask:
+            raise Exception(f'Lookahead of {k + 1} tokens exceeds the buffer of {mask + 1}')
+        end = self.position + mask + 1
+        for filled in range(self.filled, end):
+            buffer[filled & mask] = next(generator, None)
+        self.filled = end
+
+    @property
+    def current(self) -> typing.Optional[Token]:
+        return self.buffer[self.position & self.mask]
+
+    def peek(self, k: int = 1) -> typing.Optional[Token]:
+        """The token k places after the current one."""
+        if self.position + k >= self.filled:
+            self.fill(k)
+        return self.buffer[(self.position + k) & self.mask]
+
+    def advance(self) -> typing.Optional[Token]:
+        """Moves to the next token and returns it."""
+        self.position += 1
+        if self.position == self.filled:
+            self.fill(0)
+        return self.buffer[self.position & self.mask]
@@ -0,0 +1,114 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import io
+import re
+import typing
+from concurrent.futures import Executor
+from CompilationEngine import CompilationEngine, CompilationError
+from Emitter import XmlEmitter
+from JackTokenizer import MASTER_REGEX
+
+# what the pre-scan looks at: comments and strings (to skip the braces in
+# them), braces, and the keywords starting a subroutine
+SPLIT_REGEX = re.compile(r'''
+    (?P<COMMENT>/\*.*?(?:\*/|\Z)|//[^\n]*|"[^"\n]*")
+  | (?P<OPEN>\{)
+  | (?P<CLOSE>})
+  | (?P<SUBROUTINE>\b(?:constructor|function|method)\b)
+''', re.VERBOSE | re.DOTALL)
+MIN_SUBROUTINES = 2  # fewer are parsed in this process
+CHUNKS_PER_WORKER = 4
+
+
+def split_class(source: str) -> typing.Optional[typing.Tuple[typing.List[int], int]]:
+    """Pre-scans the tokens of a class, counting braces, for its members.
+
+    Returns:
+        The source offsets where the subroutines start (the words which
+        start them at brace depth 1) and the offset of the "}" closing the
+        class, or None if the class does not end with that "}" and so can
+        only be parsed, and fail, as a whole.
+    """
+    depth = 0
+    starts = []
+    for match in SPLIT_REGEX.finditer(source):
+        kind = match.lastgroup
+        if kind == "OPEN":
+            depth += 1
+        elif kind == "CLOSE":
+            depth -= 1
+            if depth == 0:
+                end = match.start()
+                if any(token.lastgroup != "COMMENT"
+                       for token in MASTER_REGEX.finditer(source, end + 1)):
+                    return None  # tokens after the class
+                return starts, end
+        elif kind == "SUBROUTINE" and depth == 1:
+            starts.append(match.start())
+    return None
+
+
+def compile_subroutines(sources: typing.List[str]) -> typing.Optional[typing.List[str]]:
+    """Parses subroutineDecs, each source holding exactly one, into their
+    XML at the depth they have in a class. Runs in a worker process.
+
+    Returns:
+        typing.Optional[typing.List[str]]: the XML of every source, None if
+        one of them is not a single valid subroutineDec.
+    """
+    outputs = []
+    for source in sources:
+        output = io.StringIO()
+        emitter = XmlEmitter(output)
+        emitter.depth = 1  # inside <class>
+        engine = CompilationEngine(io.StringIO(source), None, emitter)
+        try:
+            engine.compile_subroutine()
+        except (Exception, CompilationError):
+            return None
+        if engine.cur_token is not None:
+            return None
+        emitter.flush()
+        outputs.append(output.getvalue())
+    return outputs
+
+
+def compile_class_parallel(source: str, output_stream: typing.TextIO,
+                           executor: Executor, workers: int) -> None:
+    """Writes the same XML as CompilationEngine.compile_class, parsing the
+    subroutines of the class on the worker processes of executor.
+
+    The class is split at its top-level subroutine keywords by split_class.
+    The class without its subroutines is parsed here, and the XML of the
+    subroutines, in chunks of several per task, is put back before its
+    closing "}". If any part fails, the whole class is parsed again here,
+    so errors and partial output are exactly those of a sequential parse.
+    """
+    split = split_class(source)
+    if split is not None and len(split[0]) >= MIN_SUBROUTINES:
+        starts, end = split
+        bounds = starts + [end]
+        sources = [source[start:stop] for start, stop in zip(bounds, bounds[1:])]
+        head = io.StringIO()
+        try:
+            CompilationEngine(io.StringIO(source[:starts[0]] + source[end:]), head).compile_class()
+        except (Exception, CompilationError):
+            head = None
+        if head is not None:
+            chunk_size = max(1, len(sources) // (workers * CHUNKS_PER_WORKER))
+            chunks = [sources[index:index + chunk_size]
+                      for index in range(0, len(sources), chunk_size)]
+            results = list(executor.map(compile_subroutines, chunks))
+            if all(result is not None for result in results):
+                lines = head.getvalue().splitlines(keepends=True)
+                output_stream.write("".join(lines[:-2]))  # up to the closing "}"
+                for result in results:
+                    output_stream.write("".join(result))
+                output_stream.write("".join(lines[-2:]))
+                return
+    CompilationEngine(io.StringIO(source), output_stream).compile_class()
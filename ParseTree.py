@@ -0,0 +1,180 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import json
+import typing
+from CompilationEngine import CompilationEngine
+from Emitter import XmlEmitter
+from JackTokenizer import Token
+
+
+class Node:
+    """A non-terminal of the parse, e.g. "letStatement". Its children are
+    nested Nodes and ints, where an int is the index of a token in the
+    tree's token list.
+    """
+    __slots__ = ('kind', 'children')
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.children: typing.List[typing.Union["Node", int]] = []
+
+
+class ParseTree:
+    """The parse of one class: the root Node and the tokens it refers to."""
+    __slots__ = ('root', 'tokens')
+
+    def __init__(self, root: Node, tokens: typing.List[Token]) -> None:
+        self.root = root
+        self.tokens = tokens
+
+    def walk(self) -> typing.Iterator[typing.Tuple[str, typing.Any]]:
+        """Yields the parse as ("open", kind), ("token", token index) and
+        ("close", kind) events in source order. Iterative, so it handles
+        any nesting depth.
+        """
+        stack = [(self.root, 0)]
+        yield "open", self.root.kind
+        while stack:
+            node, position = stack.pop()
+            children = node.children
+            while position < len(children):
+                child = children[position]
+                position += 1
+                if type(child) is int:
+                    yield "token", child
+                else:
+                    stack.append((node, position))
+                    yield "open", child.kind
+                    node, children, position = child, child.children, 0
+            yield "close", node.kind
+
+
+class TreeBuilder:
+    """An emitter for CompilationEngine which builds a ParseTree instead of
+    writing XML.
+    """
+
+    def __init__(self) -> None:
+        self.tokens: typing.List[Token] = []
+        self.root: typing.Optional[Node] = None
+        self.stack: typing.List[Node] = []
+
+    @property
+    def depth(self) -> int:
+        return len(self.stack)
+
+    @property
+    def tree(self) -> ParseTree:
+        return ParseTree(self.root, self.tokens)
+
+    def open(self, kind: str) -> None:
+        node = Node(kind)
+        if self.stack:
+            self.stack[-1].children.append(node)
+        else:
+            self.root = node
+        self.stack.append(node)
+
+    def close(self, kind: str) -> None:
+        self.stack.pop()
+
+    def token(self, token: Token) -> None:
+        self.stack[-1].children.append(len(self.tokens))
+        self.tokens.append(token)
+
+    def unwind(self, depth: int) -> None:
+        del self.stack[depth:]
+
+    def flush(self) -> None:
+        pass
+
+
+def parse_tree(input_stream: typing.TextIO, engine_class=CompilationEngine,
+               **options) -> ParseTree:
+    """Parses one class into a ParseTree, with CompilationEngine or an
+    engine with the same interface such as TableDrivenEngine. The options
+    are passed on to the engine.
+    """
+    builder = TreeBuilder()
+    engine_class(input_stream, None, builder, **options).compile_class()
+    return builder.tree
+
+
+def write_xml(tree: ParseTree, output_stream: typing.TextIO) -> None:
+    """Writes the same XML that CompilationEngine writes while parsing."""
+    emitter = XmlEmitter(output_stream)
+    tokens = tree.tokens
+    for event, value in tree.walk():
+        if event == "token":
+            emitter.token(tokens[value])
+        elif event == "open":
+            emitter.open(value)
+        else:
+            emitter.close(value)
+    emitter.flush()
+
+
+def write_json(tree: ParseTree, output_stream: typing.TextIO) -> None:
+    """Writes the tree as nested {"kind": ..., "children": [...]} objects,
+    with every token as a [type, value] pair.
+    """
+    parts = []
+    tokens = tree.tokens
+    first = True  # no comma before the first child of a node
+    for event, value in tree.walk():
+        if event == "close":
+            parts.append(']}')
+            first = False
+            continue
+        if not first:
+            parts.append(',')
+        if event == "token":
+            token = tokens[value]
+            parts.append(json.dumps([token.type, token.text], separators=(",", ":")))
+            first = False
+        else:
+            parts.append(f'{{"kind":{json.dumps(value)},"children":[')
+            first = True
+    parts.append('\n')
+    output_stream.write("".join(parts))
+
+
+def sexp_atom(token: Token) -> str:
+    """Keywords are written in lower case (they can never be identifiers),
+    identifiers and integers bare, symbols quoted and string constants as
+    (stringConstant "...").
+    """
+    if token.type == "KEYWORD":
+        return token.text.lower()
+    if token.type == "SYMBOL":
+        return json.dumps(token.text)
+    if token.type == "STRING_CONST":
+        return f'(stringConstant {json.dumps(token.text)})'
+    return str(token.text)
+
+
+def write_sexp(tree: ParseTree, output_stream: typing.TextIO) -> None:
+    """Writes the tree as a compact S-expression, (kind child ...)."""
+    parts = []
+    tokens = tree.tokens
+    for event, value in tree.walk():
+        if event == "token":
+            parts.append(' ' + sexp_atom(tokens[value]))
+        elif event == "open":
+            parts.append(f' ({value}' if parts else f'({value}')
+        else:
+            parts.append(')')
+    parts.append('\n')
+    output_stream.write("".join(parts))
+
+
+SERIALIZERS = {
+    "xml": write_xml,
+    "json": write_json,
+    "sexp": write_sexp,
+}
@@ -0,0 +1,225 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import contextlib
+import json
+import time
+import typing
+import JackTokenizer
+
+# tokenizer phases which are timed by patching them for the duration of a
+# profiled parse, as (owner, attribute, frame name)
+TOKENIZER_PHASES = [
+    (JackTokenizer.JackTokenizer, "comment_cleaner", "tokenizer.comment_cleaner"),
+    (JackTokenizer.JackTokenizer, "token_type", "tokenizer.token_type"),
+    (JackTokenizer.JackTokenizer, "process_token", "tokenizer.process_token"),
+    (JackTokenizer, "regex_maker", "tokenizer.regex_maker"),
+]
+# the rules CompilationEngine.compile_nested parses without a call each,
+# by the element they open, and the frames they get
+NESTED_RULES = {"expression": "compile_expression", "term": "compile_term",
+                "expressionList": "compile_expression_list"}
+
+
+class TimedStream:
+    """Wraps a stream so that its read and write calls are profiled."""
+
+    def __init__(self, stream: typing.TextIO, profiler: "Profiler") -> None:
+        self.stream = stream
+        self.profiler = profiler
+
+    def read(self, *args) -> str:
+        with self.profiler.frame("input.read"):
+            return self.stream.read(*args)
+
+    def write(self, text: str) -> int:
+        with self.profiler.frame("output.write"):
+            return self.stream.write(text)
+
+    def fileno(self) -> int:
+        return self.stream.fileno()
+
+
+class RuleFrames:
+    """Wraps an engine's emitter so that the rules parsed iteratively by
+    compile_nested still get a frame each: from the opening of their element
+    to its closing, as if they were still compile_* calls.
+    """
+
+    def __init__(self, emitter, profiler: "Profiler") -> None:
+        self.emitter = emitter
+        self.profiler = profiler
+        self.depths: typing.List[int] = []  # emitter depth of every open frame
+
+    def open(self, kind: str) -> None:
+        frame = NESTED_RULES.get(kind)
+        if frame is not None:
+            self.depths.append(self.emitter.depth)
+            self.profiler.enter(frame)
+        self.emitter.open(kind)
+
+    def close(self, kind: str) -> None:
+        self.emitter.close(kind)
+        if kind in NESTED_RULES:
+            self.depths.pop()
+            self.profiler.exit()
+
+    def unwind(self, depth: int) -> None:
+        self.emitter.unwind(depth)
+        while self.depths and self.depths[-1] >= depth:
+            self.depths.pop()
+            self.profiler.exit()
+
+    def __getattr__(self, name: str) -> typing.Any:
+        return getattr(self.emitter, name)
+
+
+class Profiler:
+    """Collects wall time, call counts and token counts per call stack.
+
+    Nothing is instrumented unless a parse is run through compile_class(),
+    so an analyzer without a Profiler runs exactly the code it always did.
+    Frames are the engine's compile_* (or parse) methods (see RuleFrames
+    for the expressions and terms of CompilationEngine), the tokenizer
+    phases, the token generator itself ("tokenizer.next") and the reads and
+    writes of the streams. Every distinct stack of frames is kept apart,
+    with its inclusive time and the time spent outside its nested frames
+    (exclusive), and the number of tokens the tokenizer produced meanwhile.
+    """
+
+    def __init__(self) -> None:
+        self.clock = time.perf_counter
+        self.tokens = 0
+        # path of frame names -> [calls, inclusive seconds, exclusive seconds, tokens]
+        self.stats: typing.Dict[typing.Tuple[str, ...], typing.List] = {}
+        # open frames: [path, start time, time in nested frames, tokens at start]
+        self.stack: typing.List[list] = []
+
+    def enter(self, name: str) -> int:
+        """Opens a frame. Returns the depth to unwind to when it exits."""
+        depth = len(self.stack)
+        path = self.stack[-1][0] + (name,) if self.stack else (name,)
+        self.stack.append([path, self.clock(), 0.0, self.tokens])
+        return depth
+
+    def exit(self) -> None:
+        path, start, nested, tokens = self.stack.pop()
+        inclusive = self.clock() - start
+        stats = self.stats.get(path)
+        if stats is None:
+            stats = self.stats[path] = [0, 0.0, 0.0, 0]
+        stats[0] += 1
+        stats[1] += inclusive
+        stats[2] += inclusive - nested
+        stats[3] += self.tokens - tokens
+        if self.stack:
+            self.stack[-1][2] += inclusive
+
+    def unwind(self, depth: int) -> None:
+        """Exits the frames above depth, with the nested rule frames an
+        error left open.
+        """
+        while len(self.stack) > depth:
+            self.exit()
+
+    @contextlib.contextmanager
+    def frame(self, name: str):
+        depth = self.enter(name)
+        try:
+            yield
+        finally:
+            self.unwind(depth)
+
+    def wrap(self, name: str, function: typing.Callable) -> typing.Callable:
+        def profiled(*args, **kwargs):
+            depth = self.enter(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.unwind(depth)
+        return profiled
+
+    def timed_tokens(self, generator: typing.Iterator) -> typing.Iterator:
+        """Profiles every step of a token generator as "tokenizer.next"."""
+        while True:
+            self.enter("tokenizer.next")
+            try:
+                token = next(generator)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            self.tokens += 1
+            yield token
+
+    @contextlib.contextmanager
+    def patched_tokenizer(self):
+        originals = [(owner, attribute, getattr(owner, attribute))
+                     for owner, attribute, _ in TOKENIZER_PHASES]
+        for (owner, attribute, name), (_, _, original) in zip(TOKENIZER_PHASES, originals):
+            setattr(owner, attribute, self.wrap(name, original))
+        try:
+            yield
+        finally:
+            for owner, attribute, original in originals:
+                setattr(owner, attribute, original)
+
+    def compile_class(self, engine_class, input_stream: typing.TextIO,
+                      output_stream: typing.Optional[typing.TextIO],
+                      tokenizer_mode: str = JackTokenizer.SINGLE_PASS_MODE, **options) -> None:
+        """Creates an engine of engine_class over a tokenizer_mode tokenizer,
+        instruments it and parses one class with it.
+        """
+        if output_stream is not None:
+            output_stream = TimedStream(output_stream, self)
+        with self.patched_tokenizer(), self.frame(engine_class.__name__):
+            with self.frame("tokenizer.init"):
+                tokenizer = JackTokenizer.JackTokenizer(TimedStream(input_stream, self), tokenizer_mode)
+            # wrapped before the engine is built, as its lookahead reads ahead then
+            token_generator = tokenizer.token_generator
+            tokenizer.token_generator = lambda: self.timed_tokens(token_generator())
+            engine = engine_class(tokenizer, output_stream, **options)
+            nested = hasattr(engine, "compile_nested")
+            if nested:  # the nested rules get their frames from the emitter
+                engine.emitter = RuleFrames(engine.emitter, self)
+            for name in dir(engine_class):
+                if (name.startswith("compile_") or name == "parse") and \
+                        not (nested and (name == "compile_nested" or name in NESTED_RULES.values())):
+                    setattr(engine, name, self.wrap(name, getattr(engine, name)))
+            try:
+                engine.compile_class()
+            finally:
+                tokenizer.close()
+
+    def rules(self) -> typing.Dict[str, dict]:
+        """Totals per frame name. The inclusive time of a recursive frame
+        only counts its outermost calls.
+        """
+        totals = {}
+        for path, (calls, inclusive, exclusive, tokens) in self.stats.items():
+            name = path[-1]
+            total = totals.setdefault(name, {"calls": 0, "inclusive_seconds": 0.0,
+                                             "exclusive_seconds": 0.0, "tokens": 0})
+            total["calls"] += calls
+            total["exclusive_seconds"] += exclusive
+            if name not in path[:-1]:
+                total["inclusive_seconds"] += inclusive
+                total["tokens"] += tokens
+        return totals
+
+    def write_json(self, output_stream: typing.TextIO) -> None:
+        frames = [{"stack": list(path), "calls": calls, "inclusive_seconds": inclusive,
+                   "exclusive_seconds": exclusive, "tokens": tokens}
+                  for path, (calls, inclusive, exclusive, tokens) in self.stats.items()]
+        json.dump({"rules": self.rules(), "frames": frames}, output_stream, indent=2)
+
+    def write_collapsed(self, output_stream: typing.TextIO) -> None:
+        """Writes "frame;frame;frame microseconds" lines, the collapsed
+        stack format read by flamegraph.pl and speedscope.
+        """
+        for path, (_, _, exclusive, _) in sorted(self.stats.items()):
+            output_stream.write(f'{";".join(path)} {round(exclusive * 1e6)}\n')
@@ -0,0 +1,247 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import json
+import os
+import typing
+from AtomicWrite import write_atomically
+from JackTokenizer import MASTER_REGEX
+
+INDEX_VERSION = 1  # bump whenever the saved format changes
+SUBROUTINE_KINDS = {"constructor", "function", "method"}
+VARIABLE_KINDS = {"static", "field"}
+
+# The API of the Jack OS, whose classes are never part of a project. Only
+# the declarations matter, they are scanned like any other class.
+OS_SOURCES = [
+    """class Math { function void init() {} function int abs(int x) {}
+        function int multiply(int x, int y) {} function int divide(int x, int y) {}
+        function int min(int x, int y) {} function int max(int x, int y) {}
+        function int sqrt(int x) {} }""",
+    """class String { constructor String new(int maxLength) {} method void dispose() {}
+        method int length() {} method char charAt(int j) {} method void setCharAt(int j, char c) {}
+        method String appendChar(char c) {} method void eraseLastChar() {}
+        method int intValue() {} method void setInt(int j) {} function char backSpace() {}
+        function char doubleQuote() {} function char newLine() {} }""",
+    """class Array { function Array new(int size) {} method void dispose() {} }""",
+    """class Output { function void init() {} function void moveCursor(int i, int j) {}
+        function void printChar(char c) {} function void printString(String s) {}
+        function void printInt(int i) {} function void println() {} function void backSpace() {} }""",
+    """class Screen { function void init() {} function void clearScreen() {}
+        function void setColor(boolean b) {} function void drawPixel(int x, int y) {}
+        function void drawLine(int x1, int y1, int x2, int y2) {}
+        function void drawRectangle(int x1, int y1, int x2, int y2) {}
+        function void drawCircle(int x, int y, int r) {} }""",
+    """class Keyboard { function void init() {} function char keyPressed() {}
+        function char readChar() {} function String readLine(String message) {}
+        function int readInt(String message) {} }""",
+    """class Memory { function void init() {} function int peek(int address) {}
+        function void poke(int address, int value) {} function Array alloc(int size) {}
+        function void deAlloc(Array o) {} }""",
+    """class Sys { function void init() {} function void halt() {}
+        function void error(int errorCode) {} function void wait(int duration) {} }""",
+]
+
+
+class SubroutineInfo:
+    """The signature of a subroutine. Types are written as in the source."""
+    __slots__ = ('kind', 'return_type', 'parameters')
+
+    def __init__(self, kind: str, return_type: str,
+                 parameters: typing.List[typing.Tuple[str, str]]) -> None:
+        self.kind = kind  # "constructor", "function" or "method"
+        self.return_type = return_type
+        self.parameters = parameters  # (type, name) pairs
+
+    def to_json(self) -> list:
+        return [self.kind, self.return_type, [list(parameter) for parameter in self.parameters]]
+
+    @classmethod
+    def from_json(cls, value: list) -> "SubroutineInfo":
+        kind, return_type, parameters = value
+        return cls(kind, return_type, [tuple(parameter) for parameter in parameters])
+
+
+class ClassInfo:
+    """The declarations of a class: its fields and statics (name -> type)
+    and its subroutines (name -> SubroutineInfo).
+    """
+    __slots__ = ('name', 'fields', 'statics', 'subroutines')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.fields: typing.Dict[str, str] = {}
+        self.statics: typing.Dict[str, str] = {}
+        self.subroutines: typing.Dict[str, SubroutineInfo] = {}
+
+    def variable_type(self, name: str) -> typing.Optional[str]:
+        """The type of a field or static of the class, None if it has none."""
+        return self.fields.get(name) or self.statics.get(name)
+
+    def to_json(self) -> dict:
+        return {"name": self.name, "fields": self.fields, "statics": self.statics,
+                "subroutines": {name: subroutine.to_json()
+                                for name, subroutine in self.subroutines.items()}}
+
+    @classmethod
+    def from_json(cls, value: dict) -> "ClassInfo":
+        info = cls(value["name"])
+        info.fields = value["fields"]
+        info.statics = value["statics"]
+        info.subroutines = {name: SubroutineInfo.from_json(subroutine)
+                            for name, subroutine in value["subroutines"].items()}
+        return info
+
+
+def scan_source(source: str) -> typing.Optional[ClassInfo]:
+    """Pre-scans the declarations of a class without parsing it: subroutine
+    bodies are skipped by counting braces. Stops quietly at the first token
+    that does not fit, the parser reports syntax errors.
+
+    Returns:
+        typing.Optional[ClassInfo]: None if source does not start a class.
+    """
+    words = [match.group() for match in MASTER_REGEX.finditer(source)
+             if match.lastgroup != "COMMENT"]
+    if len(words) < 3 or words[0] != "class" or words[2] != "{":
+        return None
+    info = ClassInfo(words[1])
+    position = 3
+    try:
+        while words[position] != "}":
+            kind = words[position]
+            if kind in VARIABLE_KINDS:
+                variables = info.fields if kind == "field" else info.statics
+                variable_type = words[position + 1]
+                position += 2
+                while words[position] != ";":
+                    if words[position] != ",":
+                        variables[words[position]] = variable_type
+                    position += 1
+                position += 1
+            elif kind in SUBROUTINE_KINDS:
+                return_type, name = words[position + 1], words[position + 2]
+                position += 4  # after the "("
+                parameters = []
+                while words[position] != ")":
+                    if words[position] != ",":
+                        parameters.append((words[position], words[position + 1]))
+                        position += 1
+                    position += 1
+                info.subroutines[name] = SubroutineInfo(kind, return_type, parameters)
+                position += 1  # past the ")", at the body's "{"
+                depth = 0
+                while True:
+                    word = words[position]
+                    position += 1
+                    if word == "{":
+                        depth += 1
+                    elif word == "}":
+                        depth -= 1
+                        if depth == 0:
+                            break
+            else:
+                break
+    except IndexError:  # the class is cut short
+        pass
+    return info
+
+
+OS_CLASSES = {info.name: info for info in map(scan_source, OS_SOURCES)}
+
+
+class ProjectIndex:
+    """The classes of a project, found by one pre-scan of its .jack files,
+    so the declarations of every class can be looked up with a hash lookup
+    while any file is parsed. The Jack OS classes are always included.
+
+    The index can be saved and loaded again. Every file is stored with its
+    modification time and size, so update() only scans the files that
+    changed since.
+    """
+
+    def __init__(self) -> None:
+        # path -> [mtime_ns, size, ClassInfo or None]
+        self.files: typing.Dict[str, list] = {}
+        self.classes: typing.Dict[str, ClassInfo] = dict(OS_CLASSES)
+
+    @classmethod
+    def build(cls, directory: str) -> "ProjectIndex":
+        index = cls()
+        index.update(directory)
+        return index
+
+    def update(self, directory: str) -> bool:
+        """Scans the new and changed .jack files of directory and drops the
+        removed ones.
+
+        Returns:
+            bool: whether anything changed.
+        """
+        paths = {os.path.join(directory, filename) for filename in os.listdir(directory)
+                 if os.path.splitext(filename)[1].lower() == ".jack"}
+        changed = False
+        for path in list(self.files):
+            if os.path.dirname(path) == directory and path not in paths:
+                del self.files[path]
+                changed = True
+        for path in sorted(paths):
+            status = os.stat(path)
+            entry = self.files.get(path)
+            if entry is not None and entry[:2] == [status.st_mtime_ns, status.st_size]:
+                continue
+            with open(path, 'r') as input_file:
+                self.files[path] = [status.st_mtime_ns, status.st_size, scan_source(input_file.read())]
+            changed = True
+        if changed:
+            self.collect()
+        return changed
+
+    def collect(self) -> None:
+        """Rebuilds the class table from the files. When two files declare
+        the same class, the later path wins.
+        """
+        self.classes = dict(OS_CLASSES)
+        for path in sorted(self.files):
+            info = self.files[path][2]
+            if info is not None:
+                self.classes[info.name] = info
+
+    def __contains__(self, class_name: str) -> bool:
+        return class_name in self.classes
+
+    def lookup(self, class_name: str) -> typing.Optional[ClassInfo]:
+        return self.classes.get(class_name)
+
+    def subroutine(self, class_name: str, name: str) -> typing.Optional[SubroutineInfo]:
+        info = self.classes.get(class_name)
+        return info.subroutines.get(name) if info is not None else None
+
+    def save(self, path: str) -> None:
+        """Writes the index to path, atomically."""
+        files = {file_path: [mtime, size, info.to_json() if info is not None else None]
+                 for file_path, (mtime, size, info) in self.files.items()}
+        write_atomically(path, json.dumps({"version": INDEX_VERSION, "files": files}))
+
+    @classmethod
+    def load(cls, path: str) -> "ProjectIndex":
+        """Reads an index written by save(). A missing file, or one of an
+        older format, gives an empty index.
+        """
+        index = cls()
+        try:
+            with open(path, 'r') as index_file:
+                saved = json.load(index_file)
+        except (FileNotFoundError, ValueError):
+            return index
+        if saved.get("version") != INDEX_VERSION:
+            return index
+        for file_path, (mtime, size, info) in saved["files"].items():
+            index.files[file_path] = [mtime, size,
+                                      ClassInfo.from_json(info) if info is not None else None]
+        index.collect()
+        return index
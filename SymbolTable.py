@@ -0,0 +1,65 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+# the VM segment of every kind of variable
+SEGMENTS = {"STATIC": "static", "FIELD": "this", "ARG": "argument", "VAR": "local"}
+CLASS_KINDS = ("STATIC", "FIELD")
+
+
+class SymbolTable:
+    """A symbol table that associates names with information needed for Jack
+    compilation: type, kind and running index. The symbol table has two nested
+    scopes (class/subroutine).
+    """
+
+    def __init__(self) -> None:
+        """Creates a new empty symbol table."""
+        self.class_scope: typing.Dict[str, typing.Tuple[str, str, int]] = {}
+        self.subroutine_scope: typing.Dict[str, typing.Tuple[str, str, int]] = {}
+        self.counts = dict.fromkeys(SEGMENTS, 0)
+
+    def start_subroutine(self) -> None:
+        """Starts a new subroutine scope (i.e., resets the subroutine's
+        symbol table).
+        """
+        self.subroutine_scope = {}
+        self.counts["ARG"] = self.counts["VAR"] = 0
+
+    def define(self, name: str, type: str, kind: str) -> None:
+        """Defines a new identifier of a given name, type and kind and assigns
+        it a running index. "STATIC" and "FIELD" identifiers have a class scope,
+        while "ARG" and "VAR" identifiers have a subroutine scope.
+        """
+        scope = self.class_scope if kind in CLASS_KINDS else self.subroutine_scope
+        scope[name] = (type, kind, self.counts[kind])
+        self.counts[kind] += 1
+
+    def var_count(self, kind: str) -> int:
+        """The number of variables of the given kind already defined in the
+        current scope.
+        """
+        return self.counts[kind]
+
+    def lookup(self, name: str) -> typing.Optional[typing.Tuple[str, str, int]]:
+        """(type, kind, index) of the named identifier, None if it is not
+        defined in the current scope.
+        """
+        return self.subroutine_scope.get(name) or self.class_scope.get(name)
+
+    def kind_of(self, name: str) -> typing.Optional[str]:
+        entry = self.lookup(name)
+        return entry[1] if entry else None
+
+    def type_of(self, name: str) -> typing.Optional[str]:
+        entry = self.lookup(name)
+        return entry[0] if entry else None
+
+    def index_of(self, name: str) -> typing.Optional[int]:
+        entry = self.lookup(name)
+        return entry[2] if entry else None
@@ -0,0 +1,240 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from Emitter import XmlEmitter
+from JackTokenizer import JackTokenizer, located, location_of
+from JackTokenizer import Token
+
+# The Jack grammar from the JackTokenizer docstring, left-factored so that a
+# single token decides every production. Terminals are quoted keyword/symbol
+# values as the tokenizer produces them ('CLASS', '&lt') or the token types
+# IDENTIFIER, INT_CONST and STRING_CONST. An empty production is ().
+GRAMMAR = {
+    "class": [("'CLASS'", "IDENTIFIER", "'{'", "classVarDecs", "subroutineDecs", "'}'")],
+    "classVarDecs": [("classVarDec", "classVarDecs"), ()],
+    "classVarDec": [("classVarKind", "type", "IDENTIFIER", "varNames", "';'")],
+    "classVarKind": [("'STATIC'",), ("'FIELD'",)],
+    "type": [("'INT'",), ("'CHAR'",), ("'BOOLEAN'",), ("IDENTIFIER",)],
+    "varNames": [("','", "IDENTIFIER", "varNames"), ()],
+    "subroutineDecs": [("subroutineDec", "subroutineDecs"), ()],
+    "subroutineDec": [("subroutineKind", "returnType", "IDENTIFIER",
+                       "'('", "parameterList", "')'", "subroutineBody")],
+    "subroutineKind": [("'CONSTRUCTOR'",), ("'FUNCTION'",), ("'METHOD'",)],
+    "returnType": [("'VOID'",), ("type",)],
+    "parameterList": [("type", "IDENTIFIER", "parameters"), ()],
+    "parameters": [("','", "type", "IDENTIFIER", "parameters"), ()],
+    "subroutineBody": [("'{'", "varDecs", "statements", "'}'")],
+    "varDecs": [("varDec", "varDecs"), ()],
+    "varDec": [("'VAR'", "type", "IDENTIFIER", "varNames", "';'")],
+    "statements": [("statementList",)],
+    "statementList": [("statement", "statementList"), ()],
+    "statement": [("letStatement",), ("ifStatement",), ("whileStatement",),
+                  ("doStatement",), ("returnStatement",)],
+    "letStatement": [("'LET'", "IDENTIFIER", "arrayIndex", "'='", "expression", "';'")],
+    "arrayIndex": [("'['", "expression", "']'"), ()],
+    "ifStatement": [("'IF'", "'('", "expression", "')'", "'{'", "statements", "'}'", "elseClause")],
+    "elseClause": [("'ELSE'", "'{'", "statements", "'}'"), ()],
+    "whileStatement": [("'WHILE'", "'('", "expression", "')'", "'{'", "statements", "'}'")],
+    "doStatement": [("'DO'", "IDENTIFIER", "callTail", "';'")],
+    "callTail": [("'('", "expressionList", "')'"),
+                 ("'.'", "IDENTIFIER", "'('", "expressionList", "')'")],
+    "returnStatement": [("'RETURN'", "returnValue", "';'")],
+    "returnValue": [("expression",), ()],
+    "expression": [("term", "opTerms")],
+    "opTerms": [("op", "term", "opTerms"), ()],
+    "op": [("'+'",), ("'-'",), ("'*'",), ("'/'",), ("'&amp'",), ("'|'",),
+           ("'&lt'",), ("'&gt'",), ("'='",)],
+    "term": [("INT_CONST",), ("STRING_CONST",), ("keywordConstant",),
+             ("IDENTIFIER", "termTail"), ("'('", "expression", "')'"),
+             ("unaryOp", "term")],
+    "keywordConstant": [("'TRUE'",), ("'FALSE'",), ("'NULL'",), ("'THIS'",)],
+    "termTail": [("'['", "expression", "']'"), ("callTail",), ()],
+    "unaryOp": [("'-'",), ("'~'",), ("'^'",), ("'#'",)],
+    "expressionList": [("expression", "expressions"), ()],
+    "expressions": [("','", "expression", "expressions"), ()],
+}
+START = "class"
+# the non-terminals which are XML elements, the rest only shape the grammar
+ELEMENTS = {"class", "classVarDec", "subroutineDec", "parameterList",
+            "subroutineBody", "varDec", "statements", "letStatement",
+            "ifStatement", "whileStatement", "doStatement", "returnStatement",
+            "expression", "term", "expressionList"}
+END = "$"
+TYPE_TERMINALS = ("IDENTIFIER", "INT_CONST", "STRING_CONST")
+
+
+class GrammarError(Exception):
+    pass
+
+
+def first_and_follow(grammar: dict, start: str) \
+        -> typing.Tuple[typing.Dict[str, set], typing.Dict[str, set], typing.Set[str]]:
+    """Computes the FIRST and FOLLOW sets of every non-terminal, and the set
+    of non-terminals which can derive the empty string.
+    """
+    nullable = set()
+    first = {nonterminal: set() for nonterminal in grammar}
+    follow = {nonterminal: set() for nonterminal in grammar}
+    follow[start].add(END)
+    changed = True
+    while changed:  # iterate to a fixed point
+        changed = False
+        for nonterminal, productions in grammar.items():
+            for production in productions:
+                if nonterminal not in nullable and \
+                        all(symbol in nullable for symbol in production):
+                    nullable.add(nonterminal)
+                    changed = True
+                size = len(first[nonterminal])
+                first[nonterminal] |= sequence_first(production, first, nullable)
+                changed |= len(first[nonterminal]) != size
+                for position, symbol in enumerate(production):
+                    if symbol not in grammar:
+                        continue
+                    rest = production[position + 1:]
+                    size = len(follow[symbol])
+                    follow[symbol] |= sequence_first(rest, first, nullable)
+                    if all(other in nullable for other in rest):
+                        follow[symbol] |= follow[nonterminal]
+                    changed |= len(follow[symbol]) != size
+    return first, follow, nullable
+
+
+def sequence_first(symbols: typing.Sequence[str], first: typing.Dict[str, set],
+                   nullable: typing.Set[str]) -> set:
+    """FIRST of a sequence of grammar symbols."""
+    result = set()
+    for symbol in symbols:
+        if symbol not in first:  # a terminal
+            result.add(symbol)
+            return result
+        result |= first[symbol]
+        if symbol not in nullable:
+            return result
+    return result
+
+
+class ParseTable:
+    """The LL(1) dispatch table of a grammar.
+
+    Terminals get the integer codes 0..len(terminals)-1, non-terminals the
+    codes after them and every element non-terminal a "close" code after
+    those. rows[nonterminal code - len(terminals)][token code] is what to push
+    on the parse stack (already reversed) when that non-terminal meets that
+    token, or None if the token cannot start it.
+    """
+
+    def __init__(self, grammar: dict, start: str, elements: typing.Set[str]) -> None:
+        first, follow, nullable = first_and_follow(grammar, start)
+        symbols = {symbol for productions in grammar.values()
+                   for production in productions for symbol in production}
+        self.terminals = sorted(symbols - set(grammar)) + [END]
+        self.nonterminals = list(grammar)
+        self.terminal_codes = {terminal: code for code, terminal in enumerate(self.terminals)}
+        self.nonterminal_base = len(self.terminals)
+        self.close_base = self.nonterminal_base + len(self.nonterminals)
+        codes = dict(self.terminal_codes)
+        codes.update((nonterminal, self.nonterminal_base + index)
+                     for index, nonterminal in enumerate(self.nonterminals))
+        self.start = codes[start]
+        self.end = codes[END]
+        self.kinds = [nonterminal if nonterminal in elements else None
+                      for nonterminal in self.nonterminals]
+        self.rows = []
+        for index, nonterminal in enumerate(self.nonterminals):
+            row = [None] * len(self.terminals)
+            for production in grammar[nonterminal]:
+                lookaheads = sequence_first(production, first, nullable)
+                if all(symbol in nullable for symbol in production):
+                    lookaheads |= follow[nonterminal]
+                push = tuple(codes[symbol] for symbol in reversed(production))
+                if nonterminal in elements:
+                    push = (self.close_base + index,) + push
+                for lookahead in lookaheads:
+                    if row[codes[lookahead]] is not None:
+                        raise GrammarError(f'{nonterminal} is not LL(1) on {lookahead}')
+                    row[codes[lookahead]] = push
+            self.rows.append(row)
+        # token to terminal code: by type for identifiers and constants, by
+        # value for keywords and symbols
+        self.type_codes = {token_type: codes[token_type] for token_type in TYPE_TERMINALS}
+        self.value_codes = {terminal[1:-1]: code for terminal, code in self.terminal_codes.items()
+                            if terminal.startswith("'")}
+
+    def expected(self, nonterminal_code: int) -> typing.List[str]:
+        row = self.rows[nonterminal_code - self.nonterminal_base]
+        return [self.terminals[code] for code, push in enumerate(row) if push is not None]
+
+
+JACK_TABLE = ParseTable(GRAMMAR, START, ELEMENTS)
+
+
+class TableDrivenEngine:
+    """A drop-in alternative to CompilationEngine which parses with the
+    JACK_TABLE LL(1) table and an explicit stack instead of recursive
+    compile_* methods. It reports exactly the same open/token/close events,
+    so it writes the same XML and builds the same ParseTree.
+    """
+
+    def __init__(self, input_stream, output_stream, emitter=None,
+                 table: ParseTable = JACK_TABLE) -> None:
+        self.emitter = emitter if emitter is not None else XmlEmitter(output_stream)
+        self.tokenizer = input_stream if hasattr(input_stream, "token_generator") \
+            else JackTokenizer(input_stream)
+        self.generator = self.tokenizer.token_generator()
+        self.table = table
+
+    def compile_class(self) -> None:
+        """Parses a complete class."""
+        try:
+            self.parse()
+        finally:
+            self.emitter.flush()
+
+    def parse(self) -> None:
+        table = self.table
+        rows, kinds = table.rows, table.kinds
+        type_codes, value_codes = table.type_codes, table.value_codes
+        nonterminal_base, close_base, end = table.nonterminal_base, table.close_base, table.end
+        emitter = self.emitter
+        generator = self.generator
+        stack = [end, table.start]
+
+        def code_of(token: typing.Optional[Token]) -> int:
+            if token is None:
+                return end
+            if token.type in type_codes:
+                return type_codes[token.type]
+            return value_codes.get(token.text, -1)
+
+        token = next(generator)
+        code = code_of(token)
+        while stack:
+            symbol = stack.pop()
+            if symbol < nonterminal_base:  # a terminal, must match the token
+                if symbol != code:
+                    raise Exception(located(f'Expected to get {table.terminals[symbol]} but got '
+                                            f'{token.text if token else "end of file"} instead',
+                                            location_of(self.tokenizer, token)))
+                if symbol == end:
+                    return
+                emitter.token(token)
+                token = next(generator)
+                code = code_of(token)
+            elif symbol < close_base:
+                push = rows[symbol - nonterminal_base][code] if code >= 0 else None
+                if push is None:
+                    raise Exception(located(f'Expected to get a token from {table.expected(symbol)} '
+                                            f'but got {token.text if token else "end of file"} instead',
+                                            location_of(self.tokenizer, token)))
+                kind = kinds[symbol - nonterminal_base]
+                if kind:
+                    emitter.open(kind)
+                stack.extend(push)
+            else:
+                emitter.close(kinds[symbol - close_base])
@@ -0,0 +1,145 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from array import array
+from JackTokenizer import MASTER_REGEX, KEYWORD_VALUES, SYMBOL_VALUES, TOKEN_TYPES, TYPE_CODES
+from JackTokenizer import LineIndex, Token
+
+KEYWORD_CODE = TYPE_CODES["KEYWORD"]
+SYMBOL_CODE = TYPE_CODES["SYMBOL"]
+IDENTIFIER_CODE = TYPE_CODES["IDENTIFIER"]
+INT_CONST_CODE = TYPE_CODES["INT_CONST"]
+STRING_CONST_CODE = TYPE_CODES["STRING_CONST"]
+
+
+class TokenStream:
+    """Holds all the tokens of a Jack file in parallel arrays.
+
+    Token i is described by a 1-byte type code (an index into TOKEN_TYPES),
+    its start and end offsets in the source and an index into a table of
+    interned token values, which costs 13 bytes per token. Token objects are
+    only created when a token is asked for.
+    """
+
+    def __init__(self, source: str) -> None:
+        """Tokenizes source once, with the same rules as JackTokenizer.
+
+        Args:
+            source (str): the complete text of a Jack file.
+        """
+        self.source = source
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.value_ids = array('I')
+        self.values = []
+        self.value_index = value_ids = {}  # value -> its index in values
+        self.lines: typing.Optional[LineIndex] = None
+        keyword_values = KEYWORD_VALUES
+        symbol_values = SYMBOL_VALUES
+        for match in MASTER_REGEX.finditer(source):
+            kind = match.lastgroup
+            if kind == "WORD":
+                value = match.group()
+                if value in keyword_values:
+                    code, value = KEYWORD_CODE, keyword_values[value]
+                else:
+                    code = IDENTIFIER_CODE
+            elif kind == "SYMBOL":
+                code, value = SYMBOL_CODE, symbol_values[match.group()]
+            elif kind == "INT_CONST":
+                code, value = INT_CONST_CODE, int(match.group())
+            elif kind == "STRING_CONST":
+                code, value = STRING_CONST_CODE, match.group()[1:-1]
+            elif kind == "DIGIT_WORD":
+                code, value = IDENTIFIER_CODE, match.group()
+            else:  # comment
+                continue
+            value_id = value_ids.get(value)
+            if value_id is None:
+                value_id = value_ids[value] = len(self.values)
+                self.values.append(value)
+            self.types.append(code)
+            self.starts.append(match.start())
+            self.ends.append(match.end())
+            self.value_ids.append(value_id)
+
+    @classmethod
+    def from_file(cls, input_stream: typing.TextIO) -> "TokenStream":
+        return cls(input_stream.read())
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        """Returns a Token view of the token at index."""
+        return Token(self.values[self.value_ids[index]], TOKEN_TYPES[self.types[index]],
+                     self.starts[index])
+
+    def __iter__(self) -> typing.Iterator[Token]:
+        values = self.values
+        for code, value_id, start in zip(self.types, self.value_ids, self.starts):
+            yield Token(values[value_id], TOKEN_TYPES[code], start)
+
+    @property
+    def line_index(self) -> LineIndex:
+        """The LineIndex of the source, built when first asked for."""
+        if self.lines is None:
+            self.lines = LineIndex.of(self.source)
+        return self.lines
+
+    def token_generator(self):
+        """Same protocol as JackTokenizer.token_generator: every token and
+        then None, so a stream can be fed to a CompilationEngine.
+        """
+        yield from self
+        yield None
+
+    def type_code(self, index: int) -> int:
+        return self.types[index]
+
+    def value(self, index: int) -> typing.Any:
+        return self.values[self.value_ids[index]]
+
+    def span(self, index: int) -> typing.Tuple[int, int]:
+        return self.starts[index], self.ends[index]
+
+    def source_text(self, index: int) -> str:
+        """The token exactly as written in the source, e.g. '"abc"' or '<'."""
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def splice(self, first: int, last: int,
+               tokens: typing.List[typing.Tuple[int, int, int, typing.Any]],
+               shift: int, source: str) -> None:
+        """Replaces tokens [first, last) with tokens, given as (type code,
+        start, end, value), after an edit that changed the source to source
+        and moved the text after it by shift characters.
+        """
+        value_index = self.value_index
+        value_ids = array('I')
+        for _, _, _, value in tokens:
+            value_id = value_index.get(value)
+            if value_id is None:
+                value_id = value_index[value] = len(self.values)
+                self.values.append(value)
+            value_ids.append(value_id)
+        self.types[first:last] = array('B', [token[0] for token in tokens])
+        self.value_ids[first:last] = value_ids
+        for column, offsets in ((self.starts, [token[1] for token in tokens]),
+                                (self.ends, [token[2] for token in tokens])):
+            tail = column[last:]
+            if shift:
+                tail = array('I', map(shift.__add__, tail))
+            column[first:] = array('I', offsets) + tail
+        self.source = source
+        self.lines = None
+
+    def nbytes(self) -> int:
+        """Bytes used by the per-token arrays (the value table excluded)."""
+        return sum(column.itemsize * len(column)
+                   for column in (self.types, self.starts, self.ends, self.value_ids))
@@ -0,0 +1,88 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+# pairs of commands which together leave the stack as it was
+CANCELLING = {("not", "not"), ("neg", "neg"),
+              ("push constant 0", "add"), ("push constant 0", "sub"), ("push constant 0", "or"),
+              ("push constant 1", "call Math.multiply 2"), ("push constant 1", "call Math.divide 2")}
+
+
+class VMWriter:
+    """Writes VM commands into a file. Encapsulates the VM command syntax.
+
+    With optimize, a peephole pass runs as the commands are written:
+    commands after a return or goto are dropped up to the next label, and
+    pairs that cancel out (a push and a pop of the same location, "not"
+    twice, adding a pushed 0, a goto to the very next label) are removed.
+    Commands are buffered and written by flush().
+    """
+
+    def __init__(self, output_stream: typing.TextIO, optimize: bool = True) -> None:
+        """Creates a new file and prepares it for writing VM commands."""
+        self.output_stream = output_stream
+        self.optimize = optimize
+        self.commands: typing.List[str] = []
+        self.reachable = True
+
+    def write(self, command: str) -> None:
+        if not self.optimize:
+            self.commands.append(command)
+            return
+        if command.startswith("label ") or command.startswith("function "):
+            self.reachable = True
+        elif not self.reachable:
+            return
+        commands = self.commands
+        if commands:
+            last = commands[-1]
+            if (last, command) in CANCELLING \
+                    or (command.startswith("pop ") and last == "push " + command[4:]) \
+                    or (command.startswith("label ") and last == "goto " + command[6:]):
+                commands.pop()
+                if not command.startswith("label "):
+                    return
+        commands.append(command)
+        if command == "return" or command.startswith("goto "):
+            self.reachable = False
+
+    def write_push(self, segment: str, index: int) -> None:
+        """Writes a VM push command."""
+        self.write(f'push {segment} {index}')
+
+    def write_pop(self, segment: str, index: int) -> None:
+        """Writes a VM pop command."""
+        self.write(f'pop {segment} {index}')
+
+    def write_arithmetic(self, command: str) -> None:
+        """Writes a VM arithmetic command, e.g. "add" or "shiftleft"."""
+        self.write(command)
+
+    def write_label(self, label: str) -> None:
+        self.write(f'label {label}')
+
+    def write_goto(self, label: str) -> None:
+        self.write(f'goto {label}')
+
+    def write_if(self, label: str) -> None:
+        self.write(f'if-goto {label}')
+
+    def write_call(self, name: str, n_args: int) -> None:
+        self.write(f'call {name} {n_args}')
+
+    def write_function(self, name: str, n_locals: int) -> None:
+        self.write(f'function {name} {n_locals}')
+
+    def write_return(self) -> None:
+        self.write("return")
+
+    def flush(self) -> None:
+        """Writes the buffered commands to the output stream."""
+        if self.commands:
+            self.output_stream.write("\n".join(self.commands) + "\n")
+            self.commands = []
@@ -0,0 +1,74 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import typing
+
+POLL_INTERVAL = 0.25  # seconds between two scans of the directory
+
+
+def class_name_of(path: str) -> str:
+    """A Jack file holds the class it is named after."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+class Watcher:
+    """Polls the .jack files of a directory for changes. Only the directory
+    entries are read, a file counts as changed when its modification time
+    or size differs from the last poll.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.snapshot: typing.Dict[str, typing.Tuple[int, int]] = {}
+
+    def scan(self) -> typing.Dict[str, typing.Tuple[int, int]]:
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() == ".jack" and entry.is_file():
+                    status = entry.stat()
+                    snapshot[entry.path] = (status.st_mtime_ns, status.st_size)
+        return snapshot
+
+    def poll(self) -> typing.Tuple[typing.List[str], typing.List[str]]:
+        """The files new or changed since the last poll (all of them on the
+        first one), and the files removed, sorted.
+        """
+        snapshot = self.scan()
+        changed = sorted(path for path, status in snapshot.items()
+                         if self.snapshot.get(path) != status)
+        removed = sorted(set(self.snapshot) - set(snapshot))
+        self.snapshot = snapshot
+        return changed, removed
+
+
+class ReferenceMap:
+    """The class names each file refers to, and the files referring to each
+    class name. Filled from the identifiers of every parse, so a variable
+    named like a class counts as a reference too: that only costs an extra
+    rebuild.
+    """
+
+    def __init__(self) -> None:
+        self.references: typing.Dict[str, typing.Set[str]] = {}  # path -> names
+        self.referrers: typing.Dict[str, typing.Set[str]] = {}  # name -> paths
+
+    def set(self, path: str, names: typing.Iterable[str]) -> None:
+        self.remove(path)
+        names = set(names) - {class_name_of(path)}
+        self.references[path] = names
+        for name in names:
+            self.referrers.setdefault(name, set()).add(path)
+
+    def remove(self, path: str) -> None:
+        for name in self.references.pop(path, ()):
+            self.referrers[name].discard(path)
+
+    def dependents(self, names: typing.Iterable[str]) -> typing.Set[str]:
+        """The files which refer to any of the class names."""
+        return set().union(*(self.referrers.get(name, ()) for name in names))
@@ -0,0 +1,68 @@
+import io
+import os
+import pytest
+import JackAnalyzer
+from AnalysisCache import AnalysisCache
+
+SOURCE = "class Main { function void main() { return; } }"
+
+
+def test_hit_returns_the_stored_output(tmp_path):
+    cache = AnalysisCache(str(tmp_path), "1.0")
+    key = cache.key(SOURCE)
+    assert cache.get(key) is None
+    cache.put(key, "<class></class>")
+    assert cache.get(key) == "<class></class>"
+    assert cache.key(SOURCE + " ") != key
+    assert AnalysisCache(str(tmp_path), "2.0").key(SOURCE) != key
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = AnalysisCache(str(tmp_path), "1.0", max_bytes=250)
+    keys = [cache.key(str(number)) for number in range(3)]
+    for age, key in zip([300, 100, 200], keys):
+        cache.put(key, "x" * 100)
+        os.utime(cache.path(key), (1000 - age, 1000 - age))
+    cache.put(cache.key("new"), "x" * 100)  # 400 bytes, evicted down to 225
+    assert [cache.get(key) is not None for key in keys] == [False, True, False]
+    assert cache.get(cache.key("new")) is not None
+    assert cache.size == 200
+
+
+def test_analyzer_serves_unchanged_sources_from_the_cache(tmp_path, monkeypatch):
+    cache = AnalysisCache(str(tmp_path), "1.0")
+    first = io.StringIO()
+    JackAnalyzer.analyze_file(io.StringIO(SOURCE), first, cache)
+
+    def compile_file(*args):
+        raise AssertionError("a cached source was parsed again")
+
+    monkeypatch.setattr(JackAnalyzer, "compile_file", compile_file)
+    second = io.StringIO()
+    JackAnalyzer.analyze_file(io.StringIO(SOURCE), second, cache)
+    assert second.getvalue() == first.getvalue()
+    assert first.getvalue().startswith("<class>")
+
+
+def test_overwriting_an_entry_counts_its_size_once(tmp_path):
+    cache = AnalysisCache(str(tmp_path), "1.0")
+    key = cache.key("class Main {}")
+    cache.put(cache.key("class Other {}"), "<class></class>")
+    for _ in range(3):
+        cache.put(key, "x" * 100)
+    cache.put(key, "x" * 10)
+    assert cache.size == sum(size for _, size, _ in cache.entries()) == 25
+
+
+def test_failed_put_removes_its_temporary_file(tmp_path, monkeypatch):
+    cache = AnalysisCache(str(tmp_path), "1.0")
+    key = cache.key("class Main {}")
+
+    def fail(source, destination):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        cache.put(key, "<class></class>")
+    assert os.listdir(os.path.dirname(cache.path(key))) == []
+    assert cache.get(key) is None
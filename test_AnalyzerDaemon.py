@@ -0,0 +1,54 @@
+import io
+import socket
+import threading
+import pytest
+from AnalyzerClient import analyze, call, read_message
+from AnalyzerDaemon import AnalyzerDaemon
+from CompilationEngine import CompilationEngine
+
+SOURCE = "class Main { function void main() { return; } }"
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / "analyzer.sock")
+    server = AnalyzerDaemon(path, jobs=1)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield path
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def send_line(socket_path, line):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(line)
+        with connection.makefile('rb') as reader:
+            return read_message(reader)
+
+
+def test_ping(socket_path):
+    assert call({"command": "ping"}, socket_path, timeout=30)["jobs"] == 1
+
+
+def test_batch_answers_every_request_in_order(socket_path, tmp_path):
+    expected = io.StringIO()
+    CompilationEngine(io.StringIO(SOURCE), expected).compile_class()
+    path = tmp_path / "Main.jack"
+    path.write_text(SOURCE)
+    results = analyze([{"source": SOURCE},
+                       {"source": "class Main { function f( }", "recover": True},
+                       {"path": str(path), "write": True}], socket_path, timeout=30)
+    assert results[0] == {"output": expected.getvalue()}
+    assert "error" in results[1] and results[1]["diagnostics"][0]["line"] == 1
+    assert results[2] == {"output_path": str(tmp_path / "Main.xml")}
+    assert (tmp_path / "Main.xml").read_text() == expected.getvalue()
+
+
+def test_malformed_messages_get_an_error(socket_path):
+    assert send_line(socket_path, b"not json\n") == {"error": "malformed message"}
+    assert send_line(socket_path, b"null\n") == {"error": "malformed message"}
+    assert send_line(socket_path, b'{"requests": 1}\n') == {"error": "expected requests or a command"}
+    assert analyze([42], socket_path, timeout=30) == [{"error": "expected a request object"}]
@@ -0,0 +1,22 @@
+import os
+import pytest
+from AtomicWrite import write_atomically
+
+
+def test_replaces_the_file(tmp_path):
+    path = tmp_path / "Main.vm"
+    path.write_text("old")
+    write_atomically(str(path), "new")
+    write_atomically(str(tmp_path / "Main.jtree"), b"\0\1")
+    assert path.read_text() == "new"
+    assert (tmp_path / "Main.jtree").read_bytes() == b"\0\1"
+    assert sorted(os.listdir(tmp_path)) == ["Main.jtree", "Main.vm"]
+
+
+def test_failed_write_keeps_the_old_file_and_removes_the_temporary_one(tmp_path):
+    path = tmp_path / "Main.vm"
+    path.write_text("old")
+    with pytest.raises(TypeError):
+        write_atomically(str(path), 42)
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["Main.vm"]
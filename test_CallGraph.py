@@ -0,0 +1,57 @@
+import io
+from CallGraph import CallGraph, DEFAULT_ROOT, prune
+from CompilationEngine import CompilationEngine
+from ParseTree import parse_tree
+
+SOURCES = [
+    """class Main {
+        function void main() {
+            var Point q;
+            let q = Point.new();
+            do q.move(3);
+            do Output.printInt(q.getX());
+            return;
+        }
+    }""",
+    """class Point {
+        field int x;
+        constructor Point new() { let x = 0; return this; }
+        method void move(int d) { let x = x + d; do check(); return; }
+        method void check() { return; }
+        method int dead() { return x; }
+    }""",
+    "class Unused { function void f() { do Unused.g(); return; } function void g() { return; } }",
+]
+
+
+def graph_of(sources=SOURCES):
+    graph = CallGraph()
+    trees = [parse_tree(io.StringIO(source), CompilationEngine) for source in sources]
+    for tree in trees:
+        graph.add_class(tree)
+    return graph, trees
+
+
+def test_calls_through_variables_classes_and_this():
+    graph, _ = graph_of()
+    assert graph.calls["Main.main"] == {"Point.new", "Point.move", "Point.getX", "Output.printInt"}
+    assert graph.calls["Point.move"] == {"Point.check"}
+    assert graph.reachable([DEFAULT_ROOT]) == {"Main.main", "Point.new", "Point.move", "Point.check"}
+
+
+def test_report_lists_unreachable_classes_and_subroutines():
+    graph, _ = graph_of()
+    output = io.StringIO()
+    graph.report(DEFAULT_ROOT, output)
+    assert output.getvalue() == ("reachable from Main.main: 4 of 7 subroutines in 2 of 3 classes\n"
+                                 "unreachable class Unused\n"
+                                 "unreachable subroutine Point.dead\n")
+
+
+def test_prune_drops_unreachable_subroutines():
+    graph, trees = graph_of()
+    pruned = prune(trees[1], graph.reachable([DEFAULT_ROOT]))
+    names = [pruned.tokens[child.children[2]].text for child in pruned.root.children
+             if type(child) is not int and child.kind == "subroutineDec"]
+    assert names == ["new", "move", "check"]
+    assert len(trees[1].root.children) == len(pruned.root.children) + 1
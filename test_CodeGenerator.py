@@ -0,0 +1,76 @@
+import io
+import os
+import subprocess
+import sys
+import pytest
+from CodeGenerator import write_vm
+from CompilationEngine import CompilationEngine
+from ParseTree import parse_tree
+
+ANALYZER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "JackAnalyzer.py")
+DEPTH = 20000  # far deeper than the interpreter's recursion limit
+
+
+def vm(statements, optimize=True):
+    """The VM code of the statements, in a function of one argument a."""
+    source = f'class Main {{ function int f(int a) {{ {statements} }} }}'
+    output = io.StringIO()
+    write_vm(parse_tree(io.StringIO(source), CompilationEngine), output, optimize)
+    return output.getvalue().split("\n")[1:-1]
+
+
+@pytest.mark.parametrize("statements, expected", [
+    ("return 2 * 3 + 4;", ["push constant 10", "return"]),
+    ("return -(1 + 1) * 16384;", ["push constant 32767", "neg", "push constant 1", "sub", "return"]),
+    ("return a * 8;", ["push argument 0", "shiftleft", "shiftleft", "shiftleft", "return"]),
+    ("return 4 * a;", ["push argument 0", "shiftleft", "shiftleft", "return"]),
+    ("return a + 0;", ["push argument 0", "return"]),
+    ("return ~~a;", ["push argument 0", "return"]),
+    ("let a = a; return a;", ["push argument 0", "return"]),
+    ("return 1; let a = 2;", ["push constant 1", "return"]),
+    ("if (1 < 2) { return 1; } else { return 2; }", ["push constant 1", "return"]),
+    ("while (false) { let a = 1; } return a;", ["push argument 0", "return"]),
+])
+def test_optimized_snippets(statements, expected):
+    assert vm(statements) == expected
+
+
+def test_without_optimizing_every_operation_is_compiled():
+    assert vm("return 2 * a;", optimize=False) == [
+        "push constant 2", "push argument 0", "call Math.multiply 2", "return"]
+    assert vm("let a = a; return ~~a;", optimize=False) == [
+        "push argument 0", "pop argument 0", "push argument 0", "not", "not", "return"]
+
+
+def test_division_by_a_power_of_two_truncates_towards_zero():
+    code = vm("return a / 4;")
+    assert "call Math.divide 2" not in code
+    assert code.count("shiftright") == 2
+
+
+def compile_vm(tmp_path, name, body):
+    with open(tmp_path / f'{name}.jack', 'w') as source:
+        source.write(f'class {name} {{ {body} }}')
+    subprocess.run([sys.executable, ANALYZER, "--format", "vm", str(tmp_path / f'{name}.jack')],
+                   check=True, capture_output=True, text=True)
+    with open(tmp_path / f'{name}.vm') as output:
+        return output.read().split("\n")
+
+
+def test_deeply_nested_expression(tmp_path):
+    expression = "(" * DEPTH + "a" + " + 1)" * DEPTH
+    lines = compile_vm(tmp_path, "Main", f'function int f(int a) {{ return {expression}; }}')
+    assert lines[:2] == ["function Main.f 0", "push argument 0"]
+    assert lines[2:-2] == ["push constant 1", "add"] * DEPTH
+    assert lines[-2:] == ["return", ""]
+
+
+def test_deeply_nested_unary_ops(tmp_path):
+    lines = compile_vm(tmp_path, "Main", f'function int f(int a) {{ return {"-~" * DEPTH}a; }}')
+    assert lines[2:-2] == ["not", "neg"] * DEPTH
+
+
+def test_deeply_nested_constant_folds(tmp_path):
+    expression = "(" * DEPTH + "0" + " + 1)" * DEPTH
+    lines = compile_vm(tmp_path, "Main", f'function int f() {{ return {expression}; }}')
+    assert lines == ["function Main.f 0", f'push constant {DEPTH}', "return", ""]
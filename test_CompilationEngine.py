@@ -0,0 +1,80 @@
+import io
+import pytest
+from CompilationEngine import CompilationEngine, CompilationError, STRAY_TOKENS, \
+    UNEXPECTED_TOKEN
+
+BROKEN = """class Main {
+    field int x;
+    function void a() {
+        let x = ;
+        return;
+    }
+    }
+    return;
+    function void b() {
+        let y = 1 +;
+        return;
+    }
+    method void c() {
+        do ;
+        return;
+    }
+}
+"""
+VALID = "class Main { function void a() { let x = 1; return; } }"
+
+
+def compile_xml(source, **options):
+    output = io.StringIO()
+    CompilationEngine(io.StringIO(source), output, **options).compile_class()
+    return output.getvalue()
+
+
+def test_recovery_reports_every_syntax_error():
+    output = io.StringIO()
+    with pytest.raises(CompilationError) as caught:
+        CompilationEngine(io.StringIO(BROKEN), output, recover=True).compile_class()
+    diagnostics = caught.value.diagnostics
+    assert [(diagnostic.kind, diagnostic.line, diagnostic.column) for diagnostic in diagnostics] == [
+        (UNEXPECTED_TOKEN, 4, 17), (STRAY_TOKENS, 7, 5), (UNEXPECTED_TOKEN, 10, 20),
+        (UNEXPECTED_TOKEN, 14, 12)]
+    assert str(diagnostics[0]) == "line 4, column 17: unexpected token: expected term, got ;"
+    assert output.getvalue().count("<subroutineDec>") == 3
+    assert output.getvalue().endswith("</class>\n")
+
+
+def test_without_recovery_the_first_error_stops_the_parse():
+    with pytest.raises(Exception, match="line 4, column 17"):
+        compile_xml(BROKEN)
+
+
+def test_recovery_does_not_change_valid_output():
+    assert compile_xml(VALID, recover=True) == compile_xml(VALID)
+
+
+def test_deeply_nested_expressions_parse_without_recursion():
+    depth = 2000  # past the recursion limit, the XML grows with its square
+    source = f'class Main {{ function int f() {{ return {"(" * depth}1{" + -x)" * depth}; }} }}'
+    lines = compile_xml(source).split("\n")
+    assert lines.count(" " * 5 + "<expression>") == 1  # the one of the return
+    assert sum(line.endswith("<expression>") for line in lines) == depth + 1
+    assert sum(line.endswith("<term>") for line in lines) == 3 * depth + 1
+
+
+def test_expression_list_and_precedence_free_chains():
+    xml = compile_xml("class Main { function void f() { do g(1, (2), h(3 * 4 - 5)); return; } }")
+    assert xml.count("<expressionList>") == 2
+    assert xml.count("<expression>") == 5
+    assert xml.count("<SYMBOL> * </SYMBOL>") == 1
+
+
+def test_recovery_inside_a_nested_expression_closes_its_elements():
+    source = "class Main { function int f() { return ((1 + )); } function void g() { return; } }"
+    output = io.StringIO()
+    with pytest.raises(CompilationError) as caught:
+        CompilationEngine(io.StringIO(source), output, recover=True).compile_class()
+    assert len(caught.value.diagnostics) == 1
+    xml = output.getvalue()
+    assert xml.count("<expression>") == xml.count("</expression>")
+    assert xml.count("<term>") == xml.count("</term>")
+    assert xml.count("<subroutineDec>") == 2
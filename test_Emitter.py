@@ -0,0 +1,67 @@
+import io
+from Emitter import INDENT_TABLE_SIZE, XmlEmitter
+from JackTokenizer import Token
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_writes_indented_elements_and_tokens():
+    output = io.StringIO()
+    emitter = XmlEmitter(output)
+    emitter.open("class")
+    emitter.token(Token("CLASS", "KEYWORD"))
+    emitter.open("classVarDec")
+    emitter.token(Token("&lt", "SYMBOL"))
+    emitter.close("classVarDec")
+    emitter.close("class")
+    emitter.flush()
+    assert output.getvalue() == ("<class>\n"
+                                 " <KEYWORD> CLASS </KEYWORD>\n"
+                                 " <classVarDec>\n"
+                                 "  <SYMBOL> &lt </SYMBOL>\n"
+                                 " </classVarDec>\n"
+                                 "</class>\n")
+
+
+def test_buffers_lines_into_bulk_writes():
+    output = CountingStream()
+    emitter = XmlEmitter(output, flush_threshold=100)
+    emitter.open("statements")
+    for _ in range(250):
+        emitter.token(Token("x", "IDENTIFIER"))
+    assert output.writes == 2
+    emitter.close("statements")
+    emitter.flush()
+    assert output.writes == 3
+    assert output.getvalue().count("\n") == 252
+
+
+def test_indents_past_the_precomputed_table():
+    output = io.StringIO()
+    emitter = XmlEmitter(output)
+    depth = 2 * INDENT_TABLE_SIZE + 3
+    for _ in range(depth):
+        emitter.open("term")
+    emitter.token(Token("1", "INT_CONST"))
+    emitter.flush()
+    assert output.getvalue().split("\n")[-2] == " " * depth + "<INT_CONST> 1 </INT_CONST>"
+
+
+def test_unwind_closes_the_open_elements():
+    output = io.StringIO()
+    emitter = XmlEmitter(output)
+    for kind in ["class", "subroutineDec", "statements"]:
+        emitter.open(kind)
+    emitter.unwind(1)
+    assert emitter.depth == 1
+    emitter.close("class")
+    emitter.flush()
+    assert output.getvalue().split("\n")[3:6] == ["  </statements>", " </subroutineDec>", "</class>"]
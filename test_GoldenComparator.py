@@ -0,0 +1,85 @@
+import io
+import os
+import re
+import pytest
+from CompilationEngine import CompilationEngine
+from GoldenComparator import GoldenComparator, OutputMismatch, SPEC_TAGS
+from JackAnalyzer import analyze_path
+
+SOURCE = """class Main {
+    field int x;
+    method boolean f(int a) {
+        let x = a < 3;
+        return true & (x > a);
+    }
+}
+"""
+SPEC_NAMES = {tag: spec for spec, tag in SPEC_TAGS.items()}
+
+
+def engine_xml(source=SOURCE):
+    output = io.StringIO()
+    CompilationEngine(io.StringIO(source), output).compile_class()
+    return output.getvalue()
+
+
+def spec_xml(xml):
+    """xml as the reference files of the spec write it."""
+    def token(match):
+        indent, tag, text = match.groups()
+        text = {"&lt": "&lt;", "&gt": "&gt;", "&amp": "&amp;"}.get(text, text)
+        if tag == "KEYWORD":
+            text = text.lower()
+        return f'{indent * 2}<{SPEC_NAMES[tag]}>  {text}  </{SPEC_NAMES[tag]}>'
+    xml = re.sub(r'^( *)<([A-Z_]+)> (.*) </\2>$', token, xml, flags=re.MULTILINE)
+    return re.sub(r'^( *)<', lambda match: match.group(1) * 2 + "<", xml, flags=re.MULTILINE)
+
+
+def compare(reference, output, read_size=7):
+    """Writes output to a GoldenComparator in pieces of a few lines."""
+    with open("reference.xml", 'w') as reference_file:
+        reference_file.write(reference)
+    with GoldenComparator("reference.xml", read_size) as comparator:
+        lines = output.splitlines(keepends=True)
+        for start in range(0, len(lines), 3):
+            comparator.write("".join(lines[start:start + 3]))
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 1 << 16])
+def test_same_output_in_either_form_matches(read_size):
+    compare(engine_xml(), engine_xml(), read_size)
+    compare(spec_xml(engine_xml()), engine_xml(), read_size)
+
+
+def test_mismatch_names_both_lines_and_items():
+    reference = spec_xml(engine_xml()).replace("  a  ", "  b  ", 1)  # the parameter a
+    with pytest.raises(OutputMismatch) as caught:
+        compare(reference, engine_xml())
+    line = [number for number, text in enumerate(engine_xml().split("\n"), 1)
+            if "<IDENTIFIER> a </IDENTIFIER>" in text][0]
+    assert str(caught.value) == (f"output line {line} differs from reference.xml line {line}: "
+                                 "expected 'b', got 'a'")
+
+
+def test_ends_that_differ_are_reported():
+    xml = engine_xml()
+    with pytest.raises(OutputMismatch, match="expected the end of the file, got '<class>'"):
+        compare(xml, xml + xml)
+    with pytest.raises(OutputMismatch, match="expected '<class>', got the end of the output"):
+        compare(xml + xml, xml)
+
+
+def test_analyzer_compares_instead_of_writing(tmp_path):
+    os.mkdir("references")
+    (tmp_path / "Main.jack").write_text(SOURCE)
+    (tmp_path / "references" / "Main.xml").write_text(spec_xml(engine_xml()))
+    assert analyze_path("Main.jack", "Main.xml", reference_directory="references") is None
+    (tmp_path / "references" / "Main.xml").write_text(engine_xml().replace("FIELD", "STATIC"))
+    assert "expected 'STATIC', got 'FIELD'" in \
+        analyze_path("Main.jack", "Main.xml", reference_directory="references")
+    assert not os.path.exists("Main.xml")
@@ -0,0 +1,80 @@
+import io
+import pytest
+from IncrementalParser import Document
+from ParseTree import write_xml
+from TokenStream import TokenStream
+
+SOURCE = """class Main {
+    field int x;
+    function void a() {
+        let x = 1;
+        return;
+    }
+    method int b(int y) {
+        return x + y;
+    }
+}
+"""
+
+
+def xml(tree):
+    output = io.StringIO()
+    write_xml(tree, output)
+    return output.getvalue()
+
+
+def assert_matches_a_fresh_parse(document):
+    fresh = Document(document.source)
+    assert xml(document.tree) == xml(fresh.tree)
+    assert [(token.text, token.type, token.offset) for token in document.stream] == \
+        [(token.text, token.type, token.offset) for token in TokenStream(document.source)]
+
+
+def replace(document, old, new, occurrence=0):
+    start = -1
+    for _ in range(occurrence + 1):
+        start = document.source.index(old, start + 1)
+    return document.edit(start, start + len(old), new)
+
+
+EDITS = [
+    ("let x = 1;", "let x = (1 + 2) * x;"),  # inside a subroutine
+    ("x + y", 'x + y + "a /* b"'),  # a string holding a comment opener
+    ("field int x;", "field int x, z;"),  # a class variable declaration
+    ("    }\n}", "    }\n    function void c() { return; }\n}"),  # a new member
+    ("function void a()", "method void a()"),  # the kind of a member
+    ("let x = 1;", "/* let x = 1; */"),  # a statement commented out
+]
+
+
+@pytest.mark.parametrize("old, new", EDITS)
+def test_edit_matches_a_fresh_parse(old, new):
+    document = Document(SOURCE)
+    replace(document, old, new)
+    assert_matches_a_fresh_parse(document)
+
+
+def test_edits_in_a_row_and_back():
+    document = Document(SOURCE)
+    for old, new in EDITS:
+        if old in document.source:  # not replaced by an earlier edit
+            replace(document, old, new)
+            assert_matches_a_fresh_parse(document)
+    document.edit(0, len(document.source), SOURCE)
+    assert_matches_a_fresh_parse(document)
+
+
+def test_local_edit_reparses_only_its_member():
+    document = Document(SOURCE)
+    replace(document, "return x + y;", "return x - y;")
+    assert document.relexed == 5  # lexing restarts at the start of the edited line
+    assert 0 < document.reparsed < len(document.stream) // 2
+
+
+def test_broken_edit_keeps_the_source_and_recovers_on_the_next():
+    document = Document(SOURCE)
+    with pytest.raises(Exception):
+        replace(document, "let x = 1;", "let x = ;")
+    assert "let x = ;" in document.source
+    replace(document, "let x = ;", "let x = 2;")
+    assert_matches_a_fresh_parse(document)
@@ -0,0 +1,64 @@
+import io
+import os
+import subprocess
+import sys
+import pytest
+from CompilationEngine import CompilationEngine
+from JTree import HEADER, JTreeReader, write_jtree
+from ParseTree import parse_tree
+
+SOURCE = """class Main {
+    field int x;
+    method int f(int a) {
+        let x = a + 32767;
+        return "text" + x;
+    }
+}
+"""
+
+
+def events(tree, token):
+    return [(event, token(value) if event == "token" else value) for event, value in tree.walk()]
+
+
+def write(tmp_path, source):
+    tree = parse_tree(io.StringIO(source), CompilationEngine)
+    path = tmp_path / "Main.jtree"
+    with open(path, 'wb') as output:
+        write_jtree(tree, output)
+    return tree, str(path)
+
+
+def test_reader_walks_the_written_tree(tmp_path):
+    tree, path = write(tmp_path, SOURCE)
+    expected = events(tree, lambda index: (tree.tokens[index].text, tree.tokens[index].type))
+    with JTreeReader(path) as reader:
+        assert events(reader, lambda index: (reader.token(index).text,
+                                             reader.token(index).type)) == expected
+        decoded = reader.tree()
+    assert events(decoded, lambda index: (decoded.tokens[index].text,
+                                          decoded.tokens[index].type)) == expected
+
+
+def test_records_are_packed_into_the_fewest_bytes(tmp_path):
+    tree, path = write(tmp_path, SOURCE)
+    records = sum(1 for event, _ in tree.walk() if event != "close")
+    with JTreeReader(path) as reader:
+        assert reader.record_count == records < 256
+        # a code byte, 32767 in two bytes, a sibling index in one byte
+        assert reader.offsets_start == HEADER.size + 4 * records
+
+
+def test_out_of_range_integer_constant_is_rejected(tmp_path):
+    with pytest.raises(Exception, match="Integer constant 32768 is out of range"):
+        write(tmp_path, "class Main { function int f() { return 32768; } }")
+
+
+def test_analyzer_writes_jtree_files(tmp_path):
+    (tmp_path / "Main.jack").write_text(SOURCE)
+    subprocess.run([sys.executable, "JackAnalyzer.py", "--format", "jtree", str(tmp_path)],
+                   check=True, capture_output=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    tree = parse_tree(io.StringIO(SOURCE), CompilationEngine)
+    with JTreeReader(str(tmp_path / "Main.jtree")) as reader:
+        assert [event for event, _ in reader.walk()] == [event for event, _ in tree.walk()]
+        assert reader.kind(0) == "class" and reader.token(1).text == "CLASS"
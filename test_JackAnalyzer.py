@@ -0,0 +1,64 @@
+import os
+from JackAnalyzer import analyze_paths, analyze_pipelined, files_to_analyze, output_path_for
+
+CLASSES = {
+    "Main": "class Main { function void main() { do Point.new(1, 2); return; } }",
+    "Point": """class Point {
+        field int x, y;
+        constructor Point new(int ax, int ay) { let x = ax; let y = ay; return this; }
+        method int sum() { return x + y; }
+    }""",
+    "Broken": "class Broken { function void f() { let = 1; } }",
+}
+
+
+def write_project(directory):
+    for name, source in CLASSES.items():
+        with open(os.path.join(directory, f'{name}.jack'), 'w') as source_file:
+            source_file.write(source)
+    return files_to_analyze(str(directory))
+
+
+def outputs(directory, extension=".xml"):
+    found = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(extension):
+            with open(os.path.join(directory, filename)) as output_file:
+                found[filename] = output_file.read()
+    return found
+
+
+def test_jobs_write_the_same_outputs_as_one_process(tmp_path):
+    serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+    serial.mkdir()
+    parallel.mkdir()
+    serial_errors = analyze_paths(write_project(serial))
+    parallel_errors = analyze_paths(write_project(parallel), jobs=2)
+    assert outputs(serial) == outputs(parallel)
+    assert set(outputs(serial)) == {"Broken.xml", "Main.xml", "Point.xml"}
+    assert [os.path.basename(path) for path, _ in serial_errors] == ["Broken.jack"]
+    assert [os.path.basename(path) for path, _ in parallel_errors] == ["Broken.jack"]
+    assert [error for _, error in serial_errors] == [error for _, error in parallel_errors]
+
+
+def test_pipeline_writes_the_same_outputs_as_one_process(tmp_path):
+    serial, pipelined = tmp_path / "serial", tmp_path / "pipelined"
+    serial.mkdir()
+    pipelined.mkdir()
+    serial_errors = analyze_paths(write_project(serial))
+    pipelined_errors = analyze_paths(write_project(pipelined), pipeline=True)
+    assert outputs(serial) == outputs(pipelined)
+    assert [error for _, error in serial_errors] == [error for _, error in pipelined_errors]
+
+
+def test_pipeline_reports_unreadable_files_and_goes_on(tmp_path):
+    input_paths = write_project(tmp_path)
+    with open(tmp_path / "Binary.jack", 'wb') as binary:
+        binary.write(b"class \xff {}")
+    input_paths = [str(tmp_path / "Binary.jack")] + input_paths * 3
+    results = analyze_pipelined(input_paths, [output_path_for(path) for path in input_paths],
+                                queue_size=1)
+    failed = [os.path.basename(path) for path, result in zip(input_paths, results) if result]
+    assert failed == ["Binary.jack"] + ["Broken.jack"] * 3
+    assert "UnicodeDecodeError" in results[0]
+    assert set(outputs(tmp_path)) == {"Broken.xml", "Main.xml", "Point.xml"}
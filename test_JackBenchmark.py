@@ -0,0 +1,33 @@
+import io
+from CompilationEngine import CompilationEngine
+from JackBenchmark import generate_corpus, regressions, report, tokenizer_benchmark, write_corpus
+from JackTokenizer import MMAP_MODE, SINGLE_PASS_MODE
+
+
+def test_corpus_is_deterministic_and_valid():
+    sources = generate_corpus("small", seed=3)
+    assert sources == generate_corpus("small", seed=3)
+    assert sources != generate_corpus("small", seed=4)
+    for index, source in enumerate(sources):
+        assert f'class Bench{index} {{' in source
+        CompilationEngine(io.StringIO(source), io.StringIO()).compile_class()
+
+
+def result(tokens_per_second):
+    return {"seconds": 1.0, "tokens_per_second": tokens_per_second, "lines_per_second": 1.0,
+            "peak_memory_bytes": 1024, "startup_seconds": 0.001}
+
+
+def test_regressions_flag_throughput_drops_beyond_the_tolerance():
+    baseline = {"benchmarks": {"tokenizer.single_pass": result(1000), "engine.old": result(10)}}
+    results = {"benchmarks": {"tokenizer.single_pass": result(850), "engine.new": result(1)}}
+    assert regressions(results, baseline, 0.1) == ["tokenizer.single_pass: 0.85x of baseline throughput"]
+    assert regressions(results, baseline, 0.2) == []
+    assert report(results).split("\n")[1].split() == ["tokenizer.single_pass", "850", "1", "1", "1.0"]
+
+
+def test_tokenizer_benchmarks_read_the_corpus_file(tmp_path):
+    write_corpus(str(tmp_path), generate_corpus("small"))
+    for mode in [SINGLE_PASS_MODE, MMAP_MODE]:
+        result = tokenizer_benchmark(str(tmp_path / "Bench0.jack"), mode, 1000, 100, 1)
+        assert result["tokens_per_second"] > 0 and result["startup_seconds"] > 0
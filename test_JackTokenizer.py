@@ -0,0 +1,112 @@
+import io
+import mmap
+import pytest
+from CompilationEngine import CompilationEngine
+from JackTokenizer import JackTokenizer, LEGACY_MODE, MMAP_MODE, SINGLE_PASS_MODE, STREAMING_MODE
+from JackTokenizer import LineIndex, located
+
+SOURCE = """/** A class
+ * with a doc comment */
+class Main {
+    field int x_1; // a field
+    method void f() {
+        let x_1 = x_1 + 32767 & (~2 < 3) / 4 > 5;
+        do Output.printString("a // b /* c */");
+        return;
+    }
+}
+"""
+
+
+def tokens(source, mode, **options):
+    tokenizer = JackTokenizer(io.StringIO(source), mode, **options)
+    found = []
+    for token in tokenizer.token_generator():
+        if token is None:
+            break
+        found.append((token.text, token.type, token.offset))
+    return found
+
+
+def test_single_pass_classifies_tokens_and_skips_comments():
+    found = [(text, token_type) for text, token_type, _ in tokens(SOURCE, SINGLE_PASS_MODE)]
+    assert found[:6] == [("CLASS", "KEYWORD"), ("Main", "IDENTIFIER"), ("{", "SYMBOL"),
+                         ("FIELD", "KEYWORD"), ("INT", "KEYWORD"), ("x_1", "IDENTIFIER")]
+    assert ("32767", "INT_CONST") not in found and (32767, "INT_CONST") in found
+    let = found.index(("LET", "KEYWORD"))
+    assert [text for text, token_type in found[let:] if token_type == "SYMBOL"][:10] == \
+        ["=", "+", "&amp", "(", "~", "&lt", ")", "/", "&gt", ";"]
+    assert ("a // b /* c */", "STRING_CONST") in found
+    assert found[-1] == ("}", "SYMBOL")
+
+
+def test_single_pass_matches_legacy_mode():
+    assert tokens(SOURCE, SINGLE_PASS_MODE) == tokens(SOURCE, LEGACY_MODE)
+
+
+def test_offsets_point_into_the_source():
+    for text, token_type, offset in tokens(SOURCE, SINGLE_PASS_MODE):
+        if token_type == "IDENTIFIER":
+            assert SOURCE[offset:offset + len(text)] == text
+
+
+def test_streaming_matches_single_pass_for_every_chunk_boundary():
+    expected = tokens(SOURCE, SINGLE_PASS_MODE)
+    for chunk_size in range(1, 40):
+        assert tokens(SOURCE, STREAMING_MODE, chunk_size=chunk_size) == expected, chunk_size
+
+
+def test_streaming_keeps_only_a_chunk_in_memory():
+    source = "class Main { function void f() { return; } }\n" + "// comment line\n" * 10000
+    stream = io.StringIO(source)
+    reads = []
+    read = stream.read
+    stream.read = lambda size=-1: reads.append(size) or read(size)
+    tokenizer = JackTokenizer(stream, STREAMING_MODE, chunk_size=64)
+    assert sum(1 for token in tokenizer.token_generator() if token) == 13
+    assert set(reads) == {64}
+
+
+def test_mmap_maps_the_file_and_matches_single_pass(tmp_path):
+    path = tmp_path / "Main.jack"
+    path.write_text(SOURCE)
+    with open(path, 'rb') as input_file:
+        tokenizer = JackTokenizer(input_file, MMAP_MODE)
+        assert isinstance(tokenizer.buffer, mmap.mmap)
+        found = [(token.text, token.type, token.offset)
+                 for token in tokenizer.token_generator() if token]
+        tokenizer.close()
+    assert found == tokens(SOURCE, SINGLE_PASS_MODE)
+
+
+def test_mmap_offsets_are_in_bytes(tmp_path):
+    source = 'class Main { field String s; function void f() { let s = "é"; return; } }'
+    path = tmp_path / "Main.jack"
+    path.write_bytes(source.encode())
+    with open(path, 'rb') as input_file:
+        tokenizer = JackTokenizer(input_file, MMAP_MODE)
+        found = [token for token in tokenizer.token_generator() if token]
+        assert [token.text for token in found] == [text for text, _, _ in tokens(source, SINGLE_PASS_MODE)]
+        semicolon = found[[token.type for token in found].index("STRING_CONST") + 1]
+        assert semicolon.offset == source.index('";') + 2  # "é" is two bytes
+        assert tokenizer.line_index.location(semicolon.offset) == (1, semicolon.offset + 1)
+        tokenizer.close()
+
+
+def test_line_index_locates_offsets():
+    index = LineIndex.of("ab\ncd\n\nef")
+    assert [index.location(offset) for offset in (0, 1, 3, 6, 7, 8)] == \
+        [(1, 1), (1, 2), (2, 1), (3, 1), (4, 1), (4, 2)]
+    assert located("oops", (4, 2)) == "line 4, column 2: oops"
+    assert located("oops", None) == "oops"
+
+
+@pytest.mark.parametrize("mode", [SINGLE_PASS_MODE, STREAMING_MODE, LEGACY_MODE, MMAP_MODE])
+def test_every_mode_locates_syntax_errors(tmp_path, mode):
+    path = tmp_path / "Main.jack"
+    path.write_text(SOURCE.replace("return;", "return"))
+    with open(path, 'rb' if mode == MMAP_MODE else 'r') as input_file:
+        tokenizer = JackTokenizer(input_file, mode)
+        with pytest.raises(Exception, match="^line 9, column 5: "):
+            CompilationEngine(tokenizer, io.StringIO()).compile_class()
+        tokenizer.close()
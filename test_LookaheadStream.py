@@ -0,0 +1,48 @@
+import io
+import pytest
+from CompilationEngine import CompilationEngine
+from JackTokenizer import Token
+from LookaheadStream import LookaheadStream
+from ParseTree import parse_tree
+
+
+def numbers(count):
+    for number in range(count):
+        yield Token(number, "INT_CONST")
+    yield None
+
+
+def test_peek_and_advance_across_buffer_wraps():
+    stream = LookaheadStream(numbers(50), size=4)
+    seen = []
+    while stream.current is not None:
+        assert [token and token.text for token in (stream.peek(1), stream.peek(3))] == \
+            [number if number < 50 else None for number in (stream.current.text + 1,
+                                                            stream.current.text + 3)]
+        seen.append(stream.current.text)
+        stream.advance()
+    assert seen == list(range(50))
+    assert stream.advance() is None
+
+
+def test_lookahead_past_the_buffer_is_an_error():
+    stream = LookaheadStream(numbers(50), size=4)
+    assert stream.peek(3).text == 3
+    with pytest.raises(Exception, match="Lookahead of 5 tokens exceeds the buffer of 4"):
+        stream.peek(4)
+
+
+def test_size_must_be_a_power_of_two():
+    with pytest.raises(Exception, match="not a power of two"):
+        LookaheadStream(numbers(1), size=6)
+
+
+def test_engine_tells_terms_apart_by_the_next_token():
+    source = "class Main { function int f() { return a + b[1] + c() + d.e(2); } }"
+    tree = parse_tree(io.StringIO(source), CompilationEngine)
+    statement = tree.root.children[3].children[6].children[1].children[0]
+    terms = statement.children[1].children[0::2]
+    assert [[child.kind if type(child) is not int else tree.tokens[child].text
+             for child in term.children] for term in terms] == [
+        ["a"], ["b", "[", "expression", "]"], ["c", "(", "expressionList", ")"],
+        ["d", ".", "e", "(", "expressionList", ")"]]
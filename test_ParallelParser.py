@@ -0,0 +1,53 @@
+import io
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+from CompilationEngine import CompilationEngine
+from ParallelParser import compile_class_parallel, split_class
+
+SUBROUTINE = """
+    /** {{ a comment with braces }} */
+    method int f{0}(int a) {{
+        var String s;
+        let s = "{{ not a block }}"; // }}
+        if (a > {0}) {{ return f{0}(a - 1); }}
+        return a;
+    }}
+"""
+SOURCE = "class Big {\n    field int x;\n" + \
+    "".join(SUBROUTINE.format(number) for number in range(12)) + "}\n"
+
+
+def sequential(source):
+    output = io.StringIO()
+    CompilationEngine(io.StringIO(source), output).compile_class()
+    return output.getvalue()
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def test_split_finds_the_top_level_subroutines():
+    starts, end = split_class(SOURCE)
+    assert len(starts) == 12
+    assert all(SOURCE.startswith("method", start) for start in starts)
+    assert SOURCE[end:] == "}\n"
+    assert split_class(SOURCE + "}") is None
+
+
+def test_parallel_output_matches_a_sequential_parse(executor):
+    output = io.StringIO()
+    compile_class_parallel(SOURCE, output, executor, 2)
+    assert output.getvalue() == sequential(SOURCE)
+
+
+def test_a_broken_subroutine_fails_like_a_sequential_parse(executor):
+    broken = SOURCE.replace("return a;", "return a", 1)
+    with pytest.raises(Exception) as sequential_error:
+        sequential(broken)
+    output = io.StringIO()
+    with pytest.raises(Exception) as parallel_error:
+        compile_class_parallel(broken, output, executor, 2)
+    assert str(parallel_error.value) == str(sequential_error.value)
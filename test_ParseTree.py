@@ -0,0 +1,56 @@
+import io
+import json
+from CompilationEngine import CompilationEngine
+from ParseTree import parse_tree, write_json, write_sexp, write_xml
+
+SOURCE = """class Main {
+    function void main() {
+        var int x;
+        let x = 1 + 2;
+        do Output.printString("hi");
+        return;
+    }
+}
+"""
+
+
+def tree_of(source=SOURCE):
+    return parse_tree(io.StringIO(source), CompilationEngine)
+
+
+def serialized(writer, tree):
+    output = io.StringIO()
+    writer(tree, output)
+    return output.getvalue()
+
+
+def test_xml_is_the_xml_the_engine_writes():
+    output = io.StringIO()
+    CompilationEngine(io.StringIO(SOURCE), output).compile_class()
+    assert serialized(write_xml, tree_of()) == output.getvalue()
+
+
+def test_json_nests_kinds_and_tokens():
+    root = json.loads(serialized(write_json, tree_of()))
+    assert root["kind"] == "class"
+    assert root["children"][:3] == [["KEYWORD", "CLASS"], ["IDENTIFIER", "Main"], ["SYMBOL", "{"]]
+    subroutine = root["children"][3]
+    assert subroutine["kind"] == "subroutineDec"
+    assert [child["kind"] for child in subroutine["children"] if isinstance(child, dict)] == \
+        ["parameterList", "subroutineBody"]
+    assert subroutine["children"][4] == {"kind": "parameterList", "children": []}
+
+
+def test_sexp_is_compact():
+    sexp = serialized(write_sexp, tree_of("class Main { field int x; }"))
+    assert sexp == '(class class Main "{" (classVarDec field int x ";") "}")\n'
+
+
+def test_walk_balances_open_and_close():
+    tree = tree_of()
+    depth = 0
+    for event, value in tree.walk():
+        depth += {"open": 1, "close": -1, "token": 0}[event]
+        assert depth >= 0
+    assert depth == 0
+    assert sum(event == "token" for event, _ in tree.walk()) == len(tree.tokens)
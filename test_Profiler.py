@@ -0,0 +1,62 @@
+import io
+import pytest
+from CompilationEngine import CompilationEngine
+from JackTokenizer import JackTokenizer
+from Profiler import Profiler
+from TableDrivenEngine import TableDrivenEngine
+
+SOURCE = """class Main {
+    function int f(int a) {
+        let a = (a + 1) * 2;
+        return a;
+    }
+}
+"""
+
+
+def profile(engine_class, source=SOURCE):
+    profiler = Profiler()
+    output = io.StringIO()
+    profiler.compile_class(engine_class, io.StringIO(source), output)
+    return profiler, output.getvalue()
+
+
+def compile_xml(engine_class, source):
+    output = io.StringIO()
+    engine_class(io.StringIO(source), output).compile_class()
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("engine_class", [CompilationEngine, TableDrivenEngine])
+def test_profiled_parse_writes_the_same_output(engine_class):
+    assert profile(engine_class)[1] == compile_xml(engine_class, SOURCE)
+
+
+def test_counts_rules_and_every_token():
+    profiler, _ = profile(CompilationEngine)
+    tokens = sum(1 for token in JackTokenizer(io.StringIO(SOURCE)).token_generator() if token)
+    rules = profiler.rules()
+    assert rules["CompilationEngine"]["calls"] == 1
+    assert rules["CompilationEngine"]["tokens"] == profiler.tokens == tokens + 1  # and the None
+    assert rules["tokenizer.next"]["calls"] >= tokens + 1  # the lookahead reads past the end
+    assert rules["compile_expression"]["calls"] == 3
+    assert rules["compile_term"]["calls"] == 5
+    assert profiler.stack == []
+
+
+def test_frames_are_closed_when_the_parse_fails():
+    profiler = Profiler()
+    with pytest.raises(Exception):
+        profiler.compile_class(CompilationEngine, io.StringIO("class Main { function f( }"),
+                               io.StringIO())
+    assert profiler.stack == []
+
+
+def test_collapsed_stacks_nest_rules_under_the_engine():
+    profiler, _ = profile(CompilationEngine)
+    output = io.StringIO()
+    profiler.write_collapsed(output)
+    stacks = [line.rsplit(" ", 1)[0].split(";") for line in output.getvalue().splitlines()]
+    assert all(stack[0] == "CompilationEngine" for stack in stacks)
+    assert ["CompilationEngine", "compile_class", "compile_subroutine"] in \
+        [stack[:3] for stack in stacks]
@@ -0,0 +1,66 @@
+import io
+import os
+import pytest
+from CompilationEngine import CompilationEngine, CompilationError, UNKNOWN_CLASS, \
+    UNKNOWN_SUBROUTINE
+from ProjectIndex import ProjectIndex, scan_source
+
+POINT = """class Point {
+    field int x, y;
+    static Point origin;
+    constructor Point new(int ax, int ay) { let x = ax; return this; }
+    method int getX() { return x; }
+}
+"""
+MAIN = """class Main {
+    function void main() {
+        var Point p;
+        let p = Point.new(1, 2);
+        do Output.printInt(p.getX());
+        do p.getY();
+        do Circle.new();
+        return;
+    }
+}
+"""
+
+
+def test_scan_records_the_declarations():
+    info = scan_source(POINT)
+    assert info.name == "Point"
+    assert info.fields == {"x": "int", "y": "int"} and info.variable_type("origin") == "Point"
+    assert list(info.subroutines) == ["new", "getX"]
+    new = info.subroutines["new"]
+    assert (new.kind, new.return_type, new.parameters) == \
+        ("constructor", "Point", [("int", "ax"), ("int", "ay")])
+
+
+def test_calls_are_resolved_against_the_index(tmp_path):
+    (tmp_path / "Point.jack").write_text(POINT)
+    index = ProjectIndex.build(str(tmp_path))
+    assert "Point" in index and "Output" in index and "Circle" not in index
+    engine = CompilationEngine(io.StringIO(MAIN), io.StringIO(), recover=True, index=index)
+    with pytest.raises(CompilationError) as caught:
+        engine.compile_class()
+    assert [(diagnostic.kind, diagnostic.line, diagnostic.actual)
+            for diagnostic in caught.value.diagnostics] == \
+        [(UNKNOWN_SUBROUTINE, 6, "getY"), (UNKNOWN_CLASS, 7, "Circle")]
+
+
+def test_save_load_and_update_only_rescan_changes(tmp_path):
+    (tmp_path / "Point.jack").write_text(POINT)
+    (tmp_path / "Main.jack").write_text(MAIN)
+    path = str(tmp_path / "index.json")
+    ProjectIndex.build(str(tmp_path)).save(path)
+    index = ProjectIndex.load(path)
+    assert index.subroutine("Point", "getX").return_type == "int"
+    assert not index.update(str(tmp_path))
+    os.remove(tmp_path / "Point.jack")
+    assert index.update(str(tmp_path))
+    assert "Point" not in index and "Main" in index
+
+
+def test_missing_or_old_index_loads_empty(tmp_path):
+    assert ProjectIndex.load(str(tmp_path / "missing.json")).files == {}
+    (tmp_path / "old.json").write_text('{"version": 0, "files": {}}')
+    assert ProjectIndex.load(str(tmp_path / "old.json")).files == {}
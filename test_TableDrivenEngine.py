@@ -0,0 +1,43 @@
+import io
+import pytest
+from CompilationEngine import CompilationEngine
+from TableDrivenEngine import ELEMENTS, GRAMMAR, GrammarError, ParseTable, TableDrivenEngine
+
+SOURCES = [
+    "class Main { }",
+    """class Point {
+        static int count;
+        field int x, y;
+        constructor Point new(int ax, int ay) { let x = ax; let y = ay; return this; }
+        method boolean equals(Point other, Array seen) {
+            var int i;
+            if ((x = other.getX()) & ~(y < 0)) { let seen[i] = -x * (y + 2); }
+            else { while (i > 0) { let i = i - 1; } }
+            do Output.printString("done");
+            return true;
+        }
+    }""",
+    "class Deep { function int f() { return " + "(" * 200 + "1" + ")" * 200 + "; } }",
+]
+
+
+def compile_xml(engine_class, source):
+    output = io.StringIO()
+    engine_class(io.StringIO(source), output).compile_class()
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_xml_matches_the_recursive_engine(source):
+    assert compile_xml(TableDrivenEngine, source) == compile_xml(CompilationEngine, source)
+
+
+def test_syntax_error_is_reported():
+    with pytest.raises(Exception):
+        compile_xml(TableDrivenEngine, "class Main { function void f() { let = 1; } }")
+
+
+def test_grammar_that_is_not_ll1_is_rejected():
+    grammar = dict(GRAMMAR, returnValue=[("expression",), ("term",), ()])
+    with pytest.raises(GrammarError, match="not LL\\(1\\)"):
+        ParseTable(grammar, "class", ELEMENTS)
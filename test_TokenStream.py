@@ -0,0 +1,42 @@
+import io
+from CompilationEngine import CompilationEngine
+from JackTokenizer import JackTokenizer
+from TokenStream import TokenStream
+
+SOURCE = """class Main {
+    function void main() {
+        var String s;
+        let s = "x < y"; // a comment
+        do Output.printInt(s.length() + 12);
+        return;
+    }
+}
+"""
+
+
+def compile_xml(input_stream):
+    output = io.StringIO()
+    CompilationEngine(input_stream, output).compile_class()
+    return output.getvalue()
+
+
+def test_tokens_match_the_tokenizer():
+    tokenizer = JackTokenizer(io.StringIO(SOURCE))
+    expected = [(token.text, token.type, token.offset)
+                for token in tokenizer.token_generator() if token]
+    stream = TokenStream(SOURCE)
+    assert [(token.text, token.type, token.offset) for token in stream] == expected
+    assert len(stream) == len(expected)
+    assert (stream[3].text, stream[3].type) == expected[3][:2]
+
+
+def test_values_are_interned_and_arrays_are_compact():
+    stream = TokenStream(SOURCE)
+    assert stream.values.count("s") == 1
+    string = [stream.value(index) for index in range(len(stream))].index("x < y")
+    assert stream.source_text(string) == '"x < y"'
+    assert stream.nbytes() == 13 * len(stream)
+
+
+def test_engine_parses_a_stream_like_the_tokenizer():
+    assert compile_xml(TokenStream(SOURCE)) == compile_xml(io.StringIO(SOURCE))
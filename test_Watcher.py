@@ -0,0 +1,75 @@
+import io
+import os
+import pytest
+import JackAnalyzer
+from JackAnalyzer import rebuild_file
+from Watcher import ReferenceMap, Watcher
+
+MAIN = "class Main { function void main() { do Point.new(); return; } }"
+POINT = "class Point { constructor Point new() { return this; } }"
+OTHER = "class Other { function void f() { return; } }"
+
+
+def write(path, source):
+    path.write_text(source)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # a new mtime
+
+
+def test_poll_reports_new_changed_and_removed_files(tmp_path):
+    write(tmp_path / "Main.jack", MAIN)
+    write(tmp_path / "Point.jack", POINT)
+    (tmp_path / "notes.txt").write_text("not jack")
+    watcher = Watcher(str(tmp_path))
+    assert watcher.poll() == (sorted([str(tmp_path / "Main.jack"), str(tmp_path / "Point.jack")]), [])
+    assert watcher.poll() == ([], [])
+    write(tmp_path / "Point.jack", POINT + " ")
+    os.remove(tmp_path / "Main.jack")
+    assert watcher.poll() == ([str(tmp_path / "Point.jack")], [str(tmp_path / "Main.jack")])
+
+
+def test_dependents_are_the_files_referring_to_a_class():
+    references = ReferenceMap()
+    references.set("Main.jack", {"Main", "Point", "main"})
+    references.set("Other.jack", {"Other", "f"})
+    assert references.dependents(["Point"]) == {"Main.jack"}
+    assert references.dependents(["Main", "Other"]) == set()
+    references.remove("Main.jack")
+    assert references.dependents(["Point"]) == set()
+
+
+def test_failed_rebuild_keeps_the_old_output(tmp_path):
+    path = tmp_path / "Point.jack"
+    write(path, POINT)
+    assert "Point" in rebuild_file(str(path))
+    old = (tmp_path / "Point.xml").read_text()
+    write(path, "class Point { constructor Point new( }")
+    with pytest.raises(Exception):
+        rebuild_file(str(path))
+    assert (tmp_path / "Point.xml").read_text() == old
+    assert sorted(os.listdir(tmp_path)) == ["Point.jack", "Point.xml"]
+
+
+def test_watch_rebuilds_changed_files_and_their_dependents(tmp_path, monkeypatch):
+    write(tmp_path / "Main.jack", MAIN)
+    write(tmp_path / "Point.jack", POINT)
+    write(tmp_path / "Other.jack", OTHER)
+    edits = [lambda: write(tmp_path / "Point.jack", POINT.replace("new", "create")),
+             lambda: write(tmp_path / "Other.jack", "class Other {"),
+             lambda: None]
+
+    def sleep(seconds):
+        if not edits:
+            raise KeyboardInterrupt
+        edits.pop(0)()
+
+    monkeypatch.setattr(JackAnalyzer.time, "sleep", sleep)
+    log = io.StringIO()
+    with pytest.raises(KeyboardInterrupt):
+        JackAnalyzer.watch(str(tmp_path), log_stream=log)
+    lines = [line.split(" ", 1)[1] for line in log.getvalue().splitlines() if line[0].isdigit()]
+    assert [line.split(" in ")[0] for line in lines] == [
+        "rebuilt 3 of 3 files (3 changed, 0 dependent, 0 removed, 0 failed)",
+        "rebuilt 2 of 2 files (1 changed, 1 dependent, 0 removed, 0 failed)",
+        "rebuilt 0 of 1 files (1 changed, 0 dependent, 0 removed, 1 failed)"]
+    assert "create" in (tmp_path / "Point.xml").read_text()